@@ -0,0 +1,86 @@
+"""
+bench_availability.py
+
+Benchmark for the availability index. Builds a synthetic library and compares answering
+"how many books are available" and "is this book available" from the index against the SQL
+queries, and reports the memory of the bit array next to the same ids held as a Python set
+and as the rows returned by get_books_not_borrowed.
+
+Run from the repo root:
+    python -m benchmarks.bench_availability --books 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_library
+
+
+def timed(fn, repeat=1):
+    """
+    Returns:
+        tuple: (mean seconds per call, last result).
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def allocated(fn):
+    """
+    Returns:
+        int: Bytes still allocated by the object fn builds.
+    """
+    tracemalloc.start()
+    value = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the availability index with the SQL availability queries.')
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    from src.personal_library import PersonalLibrary
+    rng = random.Random(args.seed)
+    ids = [rng.randint(1, args.books) for _ in range(args.lookups)]
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        print(f'library: {generate_library(lib, args.books, seed=args.seed)}')
+        build, count = timed(lib.count_available)
+        print(f'index build: {build * 1e3:.0f} ms, {count} available')
+
+        sql_count, _ = timed(lambda: lib.conn.execute('''SELECT COUNT(*) FROM books WHERE id NOT IN (
+            SELECT book_id FROM borrowed WHERE returned = 1)''').fetchone(), repeat=3)
+        index_count, _ = timed(lib.count_available, repeat=1000)
+        print(f'count available: SQL {sql_count * 1e3:.1f} ms, index {index_count * 1e6:.2f} us')
+
+        sql_lookup, _ = timed(lambda: [lib.conn.execute('''SELECT EXISTS (SELECT 1 FROM books WHERE id = ?)
+            AND NOT EXISTS (SELECT 1 FROM borrowed WHERE book_id = ? AND returned = 1)''', (i, i)).fetchone()
+            for i in ids])
+        index_lookup, _ = timed(lambda: [lib.is_available(i) for i in ids])
+        print(f'is_available x{args.lookups}: SQL {sql_lookup * 1e3:.1f} ms, index {index_lookup * 1e3:.1f} ms')
+
+        list_query, rows = timed(lib.get_books_not_borrowed)
+        list_index, available = timed(lib.available_ids)
+        print(f'list available: get_books_not_borrowed {list_query * 1e3:.0f} ms, available_ids {list_index * 1e3:.0f} ms')
+
+        memory = lib.availability.memory()
+        print(f"memory: bit array {memory['total_bytes'] / 1e6:.2f} MB for {memory['capacity']} ids "
+              f"({memory['bytes_per_book']:.3f} bytes/book); "
+              f'set of ids {allocated(lambda: set(available)) / 1e6:.1f} MB; '
+              f'get_books_not_borrowed rows {allocated(lib.get_books_not_borrowed) / 1e6:.1f} MB')
+        del rows
+        lib.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+bench_batch.py
+
+Benchmark comparing the batch write APIs (add_books_many, add_lenders_many, borrow_many,
+return_many) against calling the single-row methods in a loop, which commit once per row.
+
+Run from the repo root:
+    python -m benchmarks.bench_batch --rows 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.personal_library import PersonalLibrary
+
+
+def timed(fn):
+    """
+    Run fn and return (result, seconds).
+    """
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench(lib, rows):
+    """
+    Time each operation as a single-row loop and as one batch call.
+    Returns:
+        list: (operation, loop seconds, batch seconds) tuples.
+    """
+    results = []
+    loop_books, loop_time = timed(lambda: [lib.add_book(f'Loop {i}', 'Author') for i in range(rows)])
+    batch_books, batch_time = timed(lambda: lib.add_books_many((f'Batch {i}', 'Author') for i in range(rows)).ids)
+    results.append(('add books', loop_time, batch_time))
+    _, loop_time = timed(lambda: [lib.add_lender(f'Loop {i}', 'Addr', '1') for i in range(rows)])
+    lendors, batch_time = timed(lambda: lib.add_lenders_many((f'Batch {i}', 'Addr', '1') for i in range(rows)).ids)
+    results.append(('add lenders', loop_time, batch_time))
+    loop_loans, loop_time = timed(lambda: [lib.borrow_book(lendors[0], b) for b in loop_books])
+    batch_loans, batch_time = timed(lambda: lib.borrow_many((lendors[0], b) for b in batch_books).ids)
+    results.append(('borrow', loop_time, batch_time))
+    _, loop_time = timed(lambda: [lib.return_borrowed_book(b) for b in loop_loans])
+    _, batch_time = timed(lambda: lib.return_many(batch_loans))
+    results.append(('return', loop_time, batch_time))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch writes against single-row loops.')
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        results = bench(lib, args.rows)
+        lib.close()
+    print(f"{'operation':<12} {'loop rows/s':>12} {'batch rows/s':>13} {'speedup':>8}")
+    for name, loop_time, batch_time in results:
+        print(f"{name:<12} {args.rows / loop_time:>12.0f} {args.rows / batch_time:>13.0f} "
+              f"{loop_time / batch_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+bench_borrow.py
+
+Benchmark for PersonalLibrary.borrow_book. Measures borrow latency on catalogs of growing size
+to show that the indexed availability check stays flat as the catalog grows.
+
+Run from the repo root:
+    python -m benchmarks.bench_borrow --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.personal_library import PersonalLibrary
+
+
+def populate(lib, num_books, num_lendors=100):
+    """
+    Fill an empty library with synthetic books and lenders using a single transaction.
+    """
+    cursor = lib.conn.cursor()
+    cursor.executemany('INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)',
+                       ((f'Title {i}', f'Author {i % 1000}', '2025-01-01') for i in range(num_books)))
+    cursor.executemany('INSERT INTO lendors (name, address, mobile) VALUES (?, ?, ?)',
+                       ((f'Lender {i}', f'Address {i}', f'{i:010d}') for i in range(num_lendors)))
+    lib.conn.commit()
+
+
+def bench_borrow(num_books, num_borrows, seed=0):
+    """
+    Time num_borrows borrow_book calls on a library with num_books books.
+    Returns:
+        dict: Catalog size with mean and p99 borrow latency in microseconds.
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        populate(lib, num_books)
+        book_ids = rng.sample(range(1, num_books + 1), min(num_borrows, num_books))
+        timings = []
+        for book_id in book_ids:
+            start = time.perf_counter()
+            lib.borrow_book(rng.randint(1, 100), book_id)
+            timings.append(time.perf_counter() - start)
+        lib.close()
+    timings.sort()
+    return {
+        'books': num_books,
+        'mean_us': sum(timings) / len(timings) * 1e6,
+        'p99_us': timings[int(len(timings) * 0.99) - 1] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark borrow_book latency against catalog size.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--borrows', type=int, default=500)
+    args = parser.parse_args()
+    print(f"{'books':>10} {'mean (us)':>12} {'p99 (us)':>12}")
+    for size in args.sizes:
+        result = bench_borrow(size, args.borrows)
+        print(f"{result['books']:>10} {result['mean_us']:>12.1f} {result['p99_us']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
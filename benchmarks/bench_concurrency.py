@@ -0,0 +1,84 @@
+"""
+bench_concurrency.py
+
+Concurrency benchmark for PersonalLibrary. Runs read queries from a growing number of threads,
+with and without a concurrent writer, and reports read throughput for each thread count.
+
+Run from the repo root:
+    python -m benchmarks.bench_concurrency --threads 1 2 4 8
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_borrow import populate
+from src.personal_library import PersonalLibrary
+
+
+def read_worker(lib, stop, counts, index, num_books, seed):
+    """
+    Issue page and point queries until stop is set, counting completed reads.
+    """
+    rng = random.Random(seed)
+    while not stop.is_set():
+        lib.get_books_not_borrowed_page(rng.randint(0, num_books), 50)
+        lib.get_book_details(rng.randint(1, num_books))
+        counts[index] += 2
+
+
+def write_worker(lib, stop, num_books, seed):
+    """
+    Borrow and return random books until stop is set.
+    """
+    rng = random.Random(seed)
+    while not stop.is_set():
+        try:
+            borrowed_id = lib.borrow_book(1, rng.randint(1, num_books))
+            lib.return_borrowed_book(borrowed_id)
+        except Exception:
+            pass
+
+
+def run(lib, num_threads, num_books, seconds, with_writer):
+    """
+    Run num_threads readers (plus an optional writer) for the given time.
+    Returns:
+        float: Reads per second across all reader threads.
+    """
+    stop = threading.Event()
+    counts = [0] * num_threads
+    threads = [threading.Thread(target=read_worker, args=(lib, stop, counts, i, num_books, i))
+               for i in range(num_threads)]
+    if with_writer:
+        threads.append(threading.Thread(target=write_worker, args=(lib, stop, num_books, 99)))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark read throughput against thread count.')
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'), max_readers=max(args.threads))
+        populate(lib, args.books)
+        print(f"{'threads':>8} {'reads/s':>12} {'reads/s (with writer)':>24}")
+        for num_threads in args.threads:
+            alone = run(lib, num_threads, args.books, args.seconds, with_writer=False)
+            mixed = run(lib, num_threads, args.books, args.seconds, with_writer=True)
+            print(f"{num_threads:>8} {alone:>12.0f} {mixed:>24.0f}")
+        lib.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+bench_import.py
+
+Benchmark for PersonalLibrary.import_from_excel. Exports a synthetic library to a workbook and
+times the bulk re-import, printing the rows per second recorded in last_import_stats. With
+--workers, the same workbook is also imported with the sheets parsed in worker processes.
+
+Run from the repo root:
+    python -m benchmarks.bench_import --books 200000 --loans 50000 --workers 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_borrow import populate
+from src.personal_library import PersonalLibrary
+
+
+def timed_import(lib, file_path, workers=None):
+    """
+    Import the workbook and return (wall seconds, last_import_stats).
+    """
+    start = time.perf_counter()
+    print(lib.import_from_excel(file_path, workers=workers))
+    return time.perf_counter() - start, lib.last_import_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk Excel import throughput.')
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--lendors', type=int, default=1000)
+    parser.add_argument('--loans', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Also import with the sheets parsed in this many processes.')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        populate(lib, args.books, args.lendors)
+        lib.borrow_many((i % args.lendors + 1, i + 1) for i in range(min(args.loans, args.books)))
+        file_path = os.path.join(tmp, 'bench.xlsx')
+        print(lib.export_to_excel(file_path))
+        runs = [('sequential', None)] + ([(f'{args.workers} workers', args.workers)] if args.workers else [])
+        results = [(label,) + timed_import(lib, file_path, workers) for label, workers in runs]
+        lib.close()
+    for label, wall, stats in results:
+        print(f"{label}: rows: {stats['rows']}  load: {stats['seconds']:.2f}s  "
+              f"rows/s: {stats['rows_per_sec']:.0f}  wall incl. parsing: {wall:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
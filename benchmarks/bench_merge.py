@@ -0,0 +1,79 @@
+"""
+bench_merge.py
+
+Benchmark for merge-mode imports. Exports a synthetic library to NDJSON, edits a few rows, and
+re-imports the near-identical file with import_from_json in merge and in replace mode, printing
+the time, the rows written (sqlite3 total_changes: triggers and merge staging tables included)
+and the WAL bytes written to the database.
+
+Run from the repo root:
+    python -m benchmarks.bench_merge --books 200000 --edits 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_library
+
+
+def edit_rows(lib, edits, seed):
+    """
+    Rename edits random books directly on the writer connection.
+    """
+    rng = random.Random(seed)
+    num_books = lib.conn.execute('SELECT MAX(id) FROM books').fetchone()[0]
+    lib.conn.executemany('UPDATE books SET title = ? WHERE id = ?',
+                         ((f'Edited {i}', rng.randint(1, num_books)) for i in range(edits)))
+    lib.conn.commit()
+
+
+def timed_import(lib, file_path, mode):
+    """
+    Import file_path in the given mode.
+    Returns:
+        tuple: (seconds, rows written, WAL bytes written, result message).
+    """
+    wal_path = lib.db_name + '-wal'
+    lib.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    changes = lib.conn.total_changes
+    start = time.perf_counter()
+    message = lib.import_from_json(file_path, mode=mode)
+    elapsed = time.perf_counter() - start
+    wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    return elapsed, lib.conn.total_changes - changes, wal_bytes, message
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare merge and replace re-imports of a near-identical file.')
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    from src.personal_library import PersonalLibrary
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        counts = generate_library(lib, args.books, seed=args.seed)
+        file_path = os.path.join(tmp, 'bench.ndjson')
+        lib.export_to_ndjson(file_path)
+        print(f'library: {counts}, {args.edits} edited rows before each re-import')
+
+        lib.import_from_json(file_path, mode='merge', dry_run=True)
+        edit_rows(lib, args.edits, args.seed)
+        lib.import_from_json(file_path, mode='merge', dry_run=True)
+        print(f"dry run: {lib.last_import_stats['tables']}")
+        results = {}
+        for mode in ('merge', 'replace'):
+            results[mode] = timed_import(lib, file_path, mode)
+            edit_rows(lib, args.edits, args.seed)
+        lib.close()
+    for mode, (elapsed, changes, wal_bytes, message) in results.items():
+        print(f'{mode:<8} {elapsed:8.2f}s  rows written: {changes:>10}  WAL: {wal_bytes / 1e6:8.1f} MB  {message}')
+    merge, replace = results['merge'], results['replace']
+    print(f'merge writes {replace[1] / max(merge[1], 1):.0f}x fewer rows and '
+          f'{replace[2] / max(merge[2], 1):.0f}x fewer WAL bytes, {replace[0] / merge[0]:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
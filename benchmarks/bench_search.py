@@ -0,0 +1,77 @@
+"""
+bench_search.py
+
+Benchmark for PersonalLibrary.search_books. Builds a catalog of synthetic titles and authors and
+times prefix, rare-word and common-word searches against it.
+
+Run from the repo root:
+    python -m benchmarks.bench_search --books 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from itertools import accumulate
+
+from src.personal_library import PersonalLibrary
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'to', 'vi', 'ze', 'bo', 'da', 'fe', 'gi', 'hu', 'jo', 'pe',
+             'chess', 'end', 'game', 'open', 'ing', 'tac', 'tics', 'mas', 'ter', 'mod', 'ern', 'fisch', 'er')
+
+
+def vocabulary(rng, size):
+    """
+    Build a list of distinct pseudo-words from the syllable table.
+    """
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def populate(lib, num_books, seed=0):
+    """
+    Fill an empty library with synthetic titles. Words are drawn with a Zipf-like skew, so a
+    few words are very common and most are rare, as in a real catalog.
+    Returns:
+        list: Sample queries mixing common and rare words.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(rng, 20000)
+    names = vocabulary(rng, 5000)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+    def title():
+        return ' '.join(w.title() for w in rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5)))
+
+    rows = ((title(), f'{rng.choice(names).title()} {rng.choice(names).title()}', '2025-01-01')
+            for _ in range(num_books))
+    lib.conn.cursor().executemany('INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)', rows)
+    lib.conn.commit()
+    return [words[200][:4], words[2000], f'{words[50]} {words[500]}', names[10][:5],
+            f'{words[5000]} {names[42][:3]}', words[10]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark search_books latency.')
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        queries = populate(lib, args.books)
+        print(f"{'query':<28} {'hits':>5} {'mean (ms)':>10} {'max (ms)':>10}")
+        for query in queries:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                hits = lib.search_books(query, args.limit)
+                timings.append(time.perf_counter() - start)
+            print(f"{query:<28} {len(hits):>5} {sum(timings) / len(timings) * 1e3:>10.2f} {max(timings) * 1e3:>10.2f}")
+        lib.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+bench_snapshot.py
+
+Benchmark for binary snapshots. Builds a synthetic library and compares backing it up and
+restoring it with snapshot()/restore() (plain, gzip and lzma) against the NDJSON and JSON
+export/import round trips, printing time and file size. Also measures how long single borrows
+take while a snapshot is running on another thread.
+
+Run from the repo root:
+    python -m benchmarks.bench_snapshot --books 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import generate_library
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def writes_during(lib, backup, num_books, num_lendors, seed):
+    """
+    Borrow and return books in a loop while backup() runs on another thread.
+    Returns:
+        tuple: (backup seconds, writes done, worst write latency in seconds).
+    """
+    rng = random.Random(seed)
+    done = threading.Event()
+    latencies = []
+
+    def run():
+        try:
+            backup()
+        finally:
+            done.set()
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=run)
+    thread.start()
+    while not done.is_set():
+        t = time.perf_counter()
+        try:
+            lib.return_borrowed_book(lib.borrow_book(rng.randint(1, num_lendors), rng.randint(1, num_books)))
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - t)
+    thread.join()
+    return time.perf_counter() - start, len(latencies), max(latencies, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare database snapshots with JSON export/import.')
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    from src.personal_library import PersonalLibrary
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        counts = generate_library(lib, args.books, seed=args.seed)
+        print(f'library: {counts}')
+        runs = [
+            ('snapshot', 'snap.db', lambda p: lib.snapshot(p), lambda p: lib.restore(p)),
+            ('snapshot gzip', 'snap.db.gz', lambda p: lib.snapshot(p, 'gzip'), lambda p: lib.restore(p)),
+            ('snapshot lzma', 'snap.db.xz', lambda p: lib.snapshot(p, 'lzma'), lambda p: lib.restore(p)),
+            ('ndjson', 'data.ndjson', lib.export_to_ndjson, lib.import_from_json),
+            ('json', 'data.json', lib.export_to_json, lib.import_from_json),
+        ]
+        for name, file_name, save, load in runs:
+            path = os.path.join(tmp, file_name)
+            save_s, message = timed(save, path)
+            load_s, load_message = timed(load, path)
+            print(f'{name:<14} save {save_s:7.2f}s  load {load_s:7.2f}s  size {os.path.getsize(path) / 1e6:8.1f} MB'
+                  f'  {load_message}')
+        num_lendors = counts['lendors']
+        seconds, writes, worst = writes_during(lib, lambda: lib.snapshot(os.path.join(tmp, 'busy.db')),
+                                               counts['books'], num_lendors, args.seed)
+        print(f'snapshot under load: {seconds:.2f}s, {writes} borrow/return pairs, worst {worst * 1e3:.1f} ms')
+        lib.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+bench_startup.py
+
+Cold-start measurement for the library module and the Kivy app module. Each import is timed in
+a fresh interpreter and compared with the same import preceded by `import pandas`, which is
+what the library used to pay at module top before export/import moved to src.library_io.
+The app is then started headless (mock GL backend) to report the median of each startup phase
+main.py records, up to the first frame of the main menu and the library being open.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = (
+    ('library', 'import src.personal_library'),
+    ('library + pandas', 'import pandas; import src.personal_library'),
+    ('kivy app', 'import main'),
+    ('kivy app + pandas', 'import pandas; import main'),
+)
+
+
+def time_import(code, runs, cwd):
+    """
+    Run `python -c code` runs times in fresh interpreters.
+    Returns:
+        float: Median wall-clock seconds, or None if the import fails (e.g. pandas missing).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1')
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True)
+        timings.append(time.perf_counter() - start)
+        if done.returncode != 0:
+            return None
+    return statistics.median(timings)
+
+
+def time_app_start(runs, cwd):
+    """
+    Start the app headless runs times; main.py prints its startup phases and exits.
+    Returns:
+        dict: Phase -> median milliseconds since launch, or None if the app fails to start.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1',
+               KIVY_GL_BACKEND=os.environ.get('KIVY_GL_BACKEND', 'mock'),
+               PERSONAL_LIBRARY_STARTUP_REPORT='1')
+    phases = {}
+    for _ in range(runs):
+        done = subprocess.run([sys.executable, os.path.join(REPO_ROOT, 'main.py')], cwd=cwd, env=env,
+                              capture_output=True, text=True, timeout=120)
+        lines = done.stdout.strip().splitlines()
+        if done.returncode != 0 or not lines:
+            return None
+        for phase, ms in json.loads(lines[-1]).items():
+            phases.setdefault(phase, []).append(ms)
+    return {phase: statistics.median(values) for phase, values in phases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of the library and the app.')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        interpreter = time_import('pass', args.runs, tmp)
+        print(f"{'import':<20} {'median (ms)':>12} {'over bare python (ms)':>22}")
+        for name, code in CASES:
+            seconds = time_import(code, args.runs, tmp)
+            if seconds is None:
+                print(f"{name:<20} {'failed':>12}")
+                continue
+            print(f"{name:<20} {seconds * 1e3:>12.0f} {(seconds - interpreter) * 1e3:>22.0f}")
+        phases = time_app_start(args.runs, tmp)
+        if phases is None:
+            print('\napp start            failed')
+            return
+        print(f"\n{'app start phase':<20} {'median (ms)':>12}")
+        for phase, ms in phases.items():
+            print(f"{phase:<20} {ms:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+load_test.py
+
+Load test for the PersonalLibrary HTTP service. Builds a synthetic library, starts
+`python -m src.server` on it in a separate process (or targets --url), and runs client threads
+that each hold one keep-alive connection and issue a mix of reads and borrow/return writes.
+Reports requests per second and latency percentiles.
+
+Run from the repo root:
+    python -m benchmarks.load_test --books 100000 --clients 8 --seconds 10
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.synthetic import WORDS, generate_library
+
+
+def client(host, port, stop, num_books, num_lendors, write_ratio, seed, latencies, errors):
+    """
+    Issue requests on one keep-alive connection until stop is set.
+    """
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    def call(method, path, body=None):
+        start = time.perf_counter()
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 500:
+            errors.append(payload)
+        return response.status, payload
+
+    while not stop.is_set():
+        if rng.random() < write_ratio:
+            status, loan = call('POST', '/loans', {'lendor_id': rng.randint(1, num_lendors),
+                                                   'book_id': rng.randint(1, num_books)})
+            if status == 201:
+                call('POST', f"/loans/{loan['id']}/return")
+            continue
+        choice = rng.random()
+        if choice < 0.6:
+            call('GET', f'/books/{rng.randint(1, num_books)}')
+        elif choice < 0.8:
+            call('GET', f'/books/available?after_id={rng.randint(0, num_books)}&limit=20')
+        else:
+            call('GET', f'/books/search?q={rng.choice(WORDS).lower()}&limit=10')
+    conn.close()
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server did not start on {host}:{port}')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run(host, port, args, num_books, num_lendors):
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client, args=(host, port, stop, num_books, num_lendors,
+                                                     args.write_ratio, i, latencies, errors))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request('GET', '/stats')
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e3
+
+    print(f'clients: {args.clients}  requests: {len(latencies)}  errors: {len(errors)}  '
+          f'rps: {len(latencies) / elapsed:.0f}')
+    print(f'latency ms  p50: {pct(0.50):.2f}  p90: {pct(0.90):.2f}  p99: {pct(0.99):.2f}  max: {latencies[-1] * 1e3:.2f}')
+    print(f"server: {stats['batched_writes']} writes in {stats['write_batches']} batches, cache {stats['cache']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the PersonalLibrary HTTP service.')
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8, help='Server worker threads.')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--url', help='Target a running server (its library must have --books books).')
+    args = parser.parse_args()
+    num_lendors = max(10, args.books // 20)
+    if args.url:
+        url = urlsplit(args.url)
+        run(url.hostname, url.port, args, args.books, num_lendors)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        from src.personal_library import PersonalLibrary
+        lib = PersonalLibrary(db_path)
+        print(f'library: {generate_library(lib, args.books, num_lendors)}')
+        lib.close()
+        port = free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'src.server', '--db', db_path, '--port', str(port),
+                                   '--workers', str(args.workers)], stdout=subprocess.DEVNULL)
+        try:
+            wait_for_port('127.0.0.1', port)
+            run('127.0.0.1', port, args, args.books, num_lendors)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,486 @@
+"""
+suite.py
+
+Benchmark suite for every public PersonalLibrary method. Builds seeded synthetic libraries at
+the requested sizes, times each method, and writes the results as JSON. With --compare, the run
+is checked against a saved baseline and the command exits with status 1 if any method got
+slower by more than the threshold.
+
+Run from the repo root:
+    python -m benchmarks.suite --sizes 1k 100k --out bench_results.json
+    python -m benchmarks.suite --sizes 1k 100k --compare bench_results.json --threshold 0.25
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import generate_library, library_sources, parse_size
+from src.personal_library import PersonalLibrary
+
+# Public methods that are schema/lifecycle plumbing rather than library operations.
+EXCLUDED = {'close', 'create_tables', 'create_schema', 'create_indexes', 'create_search_index',
+            'create_circulation_counters', 'create_change_log', 'create_titles',
+            'enable_instrumentation', 'disable_instrumentation'}
+
+# Slowdowns smaller than this are timer noise and never flagged, whatever the ratio.
+NOISE_FLOOR_S = 0.0005
+
+CASES = []
+
+
+def case(method, repeat=100, heavy=False, fresh=False):
+    """
+    Register fn(ctx) as the benchmark for a PersonalLibrary method.
+    Args:
+        method (str): Name of the method being timed.
+        repeat (int): Calls per measurement for fast operations.
+        heavy (bool): Whole-table operations, timed with a single call.
+        fresh (bool): Regenerate the synthetic library (untimed) before this case.
+    """
+    def register(fn):
+        CASES.append((method, fn, 1 if heavy else repeat, fresh))
+        return fn
+    return register
+
+
+class Context:
+    """
+    State shared by the cases of one library size.
+    """
+
+    def __init__(self, lib, counts, tmp, seed):
+        self.lib = lib
+        self.num_books = counts['books']
+        self.num_lendors = counts['lendors']
+        self.num_history = counts['books'] * 2
+        self.tmp = tmp
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.watermark = lib.change_watermark()
+        self._titles = self._title_ids = None
+
+    def book_id(self):
+        return self.rng.randint(1, self.num_books)
+
+    def lendor_id(self):
+        return self.rng.randint(1, self.num_lendors)
+
+    def title(self):
+        # (title, author) of a random book, from a sample read once per library.
+        if self._titles is None:
+            books = (self.lib.get_book_details(self.book_id()) for _ in range(200))
+            self._titles = [book[1:3] for book in books if book][:100]
+        return self.rng.choice(self._titles)
+
+    def title_id(self):
+        if self._title_ids is None:
+            found = (self.lib.find_title(*self.title()) for _ in range(100))
+            self._title_ids = [title[0] for title in found if title]
+        return self.rng.choice(self._title_ids)
+
+    def history_loan_id(self):
+        # The generator writes the returned loan history first, so these IDs stay returned
+        # and returning them again leaves the active loans alone.
+        return self.rng.randint(1, self.num_history)
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+
+# Reads
+
+@case('get_book_details')
+def bench_get_book_details(ctx):
+    ctx.lib.get_book_details(ctx.book_id())
+
+
+@case('get_lendor_details')
+def bench_get_lendor_details(ctx):
+    ctx.lib.get_lendor_details(ctx.lendor_id())
+
+
+@case('get_all_books', heavy=True)
+def bench_get_all_books(ctx):
+    ctx.lib.get_all_books()
+
+
+@case('get_all_lendors', heavy=True)
+def bench_get_all_lendors(ctx):
+    ctx.lib.get_all_lendors()
+
+
+@case('get_books_not_borrowed', heavy=True)
+def bench_get_books_not_borrowed(ctx):
+    ctx.lib.get_books_not_borrowed()
+
+
+@case('is_available')
+def bench_is_available(ctx):
+    ctx.lib.is_available(ctx.book_id())
+
+
+@case('count_available')
+def bench_count_available(ctx):
+    ctx.lib.count_available()
+
+
+@case('available_ids', heavy=True)
+def bench_available_ids(ctx):
+    ctx.lib.available_ids()
+
+
+@case('find_title')
+def bench_find_title(ctx):
+    ctx.lib.find_title(*ctx.title())
+
+
+@case('find_available_copy')
+def bench_find_available_copy(ctx):
+    ctx.lib.find_available_copy(ctx.title_id())
+
+
+@case('get_books_borrowed_with_lender_details', heavy=True)
+def bench_get_books_borrowed_with_lender_details(ctx):
+    ctx.lib.get_books_borrowed_with_lender_details()
+
+
+@case('get_books_page')
+def bench_get_books_page(ctx):
+    ctx.lib.get_books_page(ctx.book_id())
+
+
+@case('get_lendors_page')
+def bench_get_lendors_page(ctx):
+    ctx.lib.get_lendors_page(ctx.lendor_id())
+
+
+@case('get_books_not_borrowed_page')
+def bench_get_books_not_borrowed_page(ctx):
+    ctx.lib.get_books_not_borrowed_page(ctx.book_id())
+
+
+@case('get_books_borrowed_with_lender_details_page')
+def bench_get_books_borrowed_with_lender_details_page(ctx):
+    ctx.lib.get_books_borrowed_with_lender_details_page(ctx.book_id())
+
+
+@case('get_borrowed_page')
+def bench_get_borrowed_page(ctx):
+    ctx.lib.get_borrowed_page(ctx.history_loan_id())
+
+
+@case('iter_books', heavy=True)
+def bench_iter_books(ctx):
+    for _ in ctx.lib.iter_books(1000):
+        pass
+
+
+@case('iter_lendors', heavy=True)
+def bench_iter_lendors(ctx):
+    for _ in ctx.lib.iter_lendors(1000):
+        pass
+
+
+@case('iter_books_not_borrowed', heavy=True)
+def bench_iter_books_not_borrowed(ctx):
+    for _ in ctx.lib.iter_books_not_borrowed(1000):
+        pass
+
+
+@case('iter_books_borrowed_with_lender_details', heavy=True)
+def bench_iter_books_borrowed_with_lender_details(ctx):
+    for _ in ctx.lib.iter_books_borrowed_with_lender_details(1000):
+        pass
+
+
+@case('iter_borrowed', heavy=True)
+def bench_iter_borrowed(ctx):
+    for _ in ctx.lib.iter_borrowed(1000):
+        pass
+
+
+@case('search_books', repeat=20)
+def bench_search_books(ctx):
+    ctx.lib.search_books(ctx.rng.choice(('chess end', 'fisch', 'polgar problems', 'gambit', 'ri')))
+
+
+@case('get_most_borrowed_book')
+def bench_get_most_borrowed_book(ctx):
+    ctx.lib.get_most_borrowed_book()
+
+
+@case('get_least_borrowed_book')
+def bench_get_least_borrowed_book(ctx):
+    ctx.lib.get_least_borrowed_book()
+
+
+@case('top_borrowed')
+def bench_top_borrowed(ctx):
+    ctx.lib.top_borrowed(10)
+
+
+@case('bottom_borrowed')
+def bench_bottom_borrowed(ctx):
+    ctx.lib.bottom_borrowed(10)
+
+
+# Writes. These grow the library, so the export cases start from a regenerated one.
+
+@case('add_book')
+def bench_add_book(ctx):
+    ctx.lib.add_book('Benchmark Title', 'Benchmark Author')
+
+
+@case('remove_book')
+def bench_remove_book(ctx):
+    ctx.lib.remove_book(ctx.lib.add_book('Benchmark Title', 'Benchmark Author'))
+
+
+@case('add_lender')
+def bench_add_lender(ctx):
+    ctx.lib.add_lender('Benchmark Lender', 'Address', '0000000000')
+
+
+@case('remove_lender')
+def bench_remove_lender(ctx):
+    ctx.lib.remove_lender(ctx.lib.add_lender('Benchmark Lender', 'Address', '0000000000'))
+
+
+@case('borrow_book')
+def bench_borrow_book(ctx):
+    book_id = ctx.lib.add_book('Benchmark Loan', 'Author')
+    ctx.lib.return_borrowed_book(ctx.lib.borrow_book(ctx.lendor_id(), book_id))
+
+
+@case('return_borrowed_book')
+def bench_return_borrowed_book(ctx):
+    ctx.lib.return_borrowed_book(ctx.history_loan_id())
+
+
+@case('add_books_many', repeat=5)
+def bench_add_books_many(ctx):
+    ctx.lib.add_books_many(('Batch Title', 'Batch Author') for _ in range(1000))
+
+
+@case('add_lenders_many', repeat=5)
+def bench_add_lenders_many(ctx):
+    ctx.lib.add_lenders_many(('Batch Lender', 'Address', '0') for _ in range(1000))
+
+
+@case('borrow_many', repeat=5)
+def bench_borrow_many(ctx):
+    books = ctx.lib.add_books_many(('Batch Loan', 'Author') for _ in range(1000)).ids
+    loans = ctx.lib.borrow_many((ctx.lendor_id(), book_id) for book_id in books).ids
+    ctx.lib.return_many(loans)
+
+
+@case('return_many', repeat=5)
+def bench_return_many(ctx):
+    ctx.lib.return_many(ctx.history_loan_id() for _ in range(1000))
+
+
+@case('upsert_many', repeat=5)
+def bench_upsert_many(ctx):
+    # Rewrites existing lenders with their own values, as re-importing an export does.
+    ids = sorted({ctx.lendor_id() for _ in range(1000)})
+    ctx.lib.upsert_many('lendors', [ctx.lib.get_lendor_details(lendor_id) for lendor_id in ids])
+
+
+@case('change_watermark')
+def bench_change_watermark(ctx):
+    ctx.lib.change_watermark()
+
+
+@case('export_changes', repeat=3)
+def bench_export_changes(ctx):
+    # The delta holds every row the write cases above touched.
+    ctx.lib.export_changes(ctx.watermark, ctx.path('bench.changes'))
+
+
+@case('apply_changes', repeat=3)
+def bench_apply_changes(ctx):
+    ctx.lib.apply_changes(ctx.path('bench.changes'))
+
+
+# Export/import. The imports and the restore reload the exported data, so the library is unchanged.
+
+@case('export_to_json', heavy=True, fresh=True)
+def bench_export_to_json(ctx):
+    ctx.lib.export_to_json(ctx.path('bench.json'))
+
+
+@case('export_to_ndjson', heavy=True)
+def bench_export_to_ndjson(ctx):
+    ctx.lib.export_to_ndjson(ctx.path('bench.ndjson'))
+
+
+@case('export_to_excel', heavy=True)
+def bench_export_to_excel(ctx):
+    ctx.lib.export_to_excel(ctx.path('bench.xlsx'))
+
+
+@case('import_from_json', heavy=True)
+def bench_import_from_json(ctx):
+    ctx.lib.import_from_json(ctx.path('bench.ndjson'))
+
+
+@case('import_from_excel', heavy=True)
+def bench_import_from_excel(ctx):
+    ctx.lib.import_from_excel(ctx.path('bench.xlsx'))
+
+
+@case('snapshot', heavy=True)
+def bench_snapshot(ctx):
+    ctx.lib.snapshot(ctx.path('bench.snapshot.db'))
+
+
+@case('restore', heavy=True)
+def bench_restore(ctx):
+    # Restores the snapshot just taken, so the library is unchanged.
+    ctx.lib.restore(ctx.path('bench.snapshot.db'))
+
+
+@case('merge_load', heavy=True)
+def bench_merge_load(ctx):
+    # Same seed as the loaded library, so the merge finds nothing to write.
+    ctx.lib.merge_load(library_sources(ctx.num_books, ctx.num_lendors, seed=ctx.seed))
+
+
+@case('bulk_load', heavy=True)
+def bench_bulk_load(ctx):
+    generate_library(ctx.lib, ctx.num_books, ctx.num_lendors, seed=ctx.seed)
+
+
+@case('clear_all_tables', heavy=True)
+def bench_clear_all_tables(ctx):
+    ctx.lib.clear_all_tables()
+
+
+def public_methods():
+    """
+    Names of the public PersonalLibrary methods that the suite is expected to cover.
+    """
+    return sorted(name for name, _ in inspect.getmembers(PersonalLibrary, inspect.isfunction)
+                  if not name.startswith('_') and name not in EXCLUDED)
+
+
+def measure(fn, ctx, repeat, rounds):
+    """
+    Time repeat calls of fn, rounds times.
+    Returns:
+        dict: Median, min and max seconds per call, and calls per round.
+    """
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(ctx)
+        per_call.append((time.perf_counter() - start) / repeat)
+    return {'median_s': statistics.median(per_call), 'min_s': min(per_call),
+            'max_s': max(per_call), 'calls': repeat}
+
+
+def run_size(size, rounds, only, seed):
+    """
+    Build a library of the given size and time every selected case against it.
+    Returns:
+        dict: Library row counts and per-method timings.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = PersonalLibrary(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        counts = generate_library(lib, size, seed=seed)
+        print(f'[{size} books] generated {counts} in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+        ctx = Context(lib, counts, tmp, seed)
+        methods = {}
+        for method, fn, repeat, fresh in CASES:
+            if only and method not in only:
+                continue
+            if fresh:
+                generate_library(lib, size, seed=seed)
+            methods[method] = measure(fn, ctx, repeat, 1 if repeat == 1 and size >= 100000 else rounds)
+            print(f'[{size} books] {method:<45} {methods[method]["median_s"] * 1e3:>10.3f} ms',
+                  file=sys.stderr)
+        lib.close()
+    return {'rows': counts, 'methods': methods}
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median timings against a baseline run.
+    Returns:
+        list: (size, method, baseline seconds, current seconds, ratio) for each regression.
+    """
+    regressions = []
+    for size, current in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if previous is None:
+            continue
+        for method, timing in current['methods'].items():
+            before = previous['methods'].get(method)
+            if before is None or before['median_s'] <= 0:
+                continue
+            ratio = timing['median_s'] / before['median_s']
+            if ratio > 1 + threshold and timing['median_s'] - before['median_s'] > NOISE_FLOOR_S:
+                regressions.append((size, method, before['median_s'], timing['median_s'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every public PersonalLibrary method at scale.')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k', '1M'],
+                        help='Library sizes in books, e.g. 1k 100k 1M.')
+    parser.add_argument('--rounds', type=int, default=3, help='Measurements per method (median is reported).')
+    parser.add_argument('--only', nargs='*', help='Only run these methods.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Baseline JSON file to check for regressions.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown before a method is flagged (0.25 = 25%%).')
+    args = parser.parse_args()
+
+    covered = {method for method, *_ in CASES}
+    missing = [m for m in public_methods() if m not in covered]
+    if missing:
+        print(f'warning: no benchmark for {", ".join(missing)}', file=sys.stderr)
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'sizes': {},
+    }
+    for text in args.sizes:
+        size = parse_size(text)
+        results['sizes'][str(size)] = run_size(size, args.rounds, args.only, args.seed)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output)
+    elif not args.compare:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for size, method, before, after, ratio in regressions:
+            print(f'REGRESSION [{size} books] {method}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms '
+                  f'({ratio:.2f}x)')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions above {args.threshold:.0%} against {args.compare}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+synthetic.py
+
+Seeded generator for synthetic libraries used by the benchmarks. The same seed and sizes always
+produce the same books, lenders and borrow history.
+"""
+import random
+from datetime import date, timedelta
+
+WORDS = ('Chess', 'Endgame', 'Opening', 'Tactics', 'Strategy', 'Mastering', 'Modern', 'Classic', 'Attack',
+         'Defence', 'Gambit', 'Sicilian', 'French', 'Queen', 'King', 'Pawn', 'Rook', 'Bishop', 'Knight',
+         'Combinations', 'Problems', 'Course', 'Manual', 'Secrets', 'Lessons', 'Garden', 'River', 'Night',
+         'History', 'Science', 'Journey', 'Letters', 'Stories', 'Music', 'Ocean', 'Mountain', 'City')
+FIRST_NAMES = ('Bobby', 'Judit', 'Bruce', 'Garry', 'Anatoly', 'Mikhail', 'Jose', 'Aron', 'Mark', 'Jeremy',
+               'Artur', 'Mikhail', 'Jacob', 'Alexander', 'Max', 'Emanuel', 'Laszlo', 'Vera', 'Nona', 'Maia')
+LAST_NAMES = ('Fischer', 'Polgar', 'Pandolfini', 'Kasparov', 'Karpov', 'Tal', 'Capablanca', 'Nimzowitsch',
+              'Dvoretsky', 'Silman', 'Yusupov', 'Aagaard', 'Kotov', 'Euwe', 'Lasker', 'Menchik', 'Gaprindashvili')
+
+START_DATE = date(2015, 1, 1)
+
+
+def parse_size(text):
+    """
+    Parse a size such as "1000", "100k" or "1M".
+    Returns:
+        int: Number of books.
+    """
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def generate_books(rng, num_books):
+    """
+    Yield (id, title, author, added_date) rows.
+    """
+    for book_id in range(1, num_books + 1):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+        author = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        added = START_DATE + timedelta(days=rng.randrange(3650))
+        yield book_id, title, author, added.isoformat()
+
+
+def generate_lendors(rng, num_lendors):
+    """
+    Yield (id, name, address, mobile) rows.
+    """
+    for lendor_id in range(1, num_lendors + 1):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        yield lendor_id, name, f'{rng.randint(1, 999)} {rng.choice(WORDS)} Street', f'{rng.randrange(10 ** 10):010d}'
+
+
+def generate_loans(rng, num_books, num_lendors, num_loans, active_fraction):
+    """
+    Yield (id, lendor_id, book_id, returned) rows: num_loans returned loans, half of them on
+    the most popular 1% of books, followed by one active loan (returned = 1) for roughly
+    active_fraction of all books.
+    """
+    popular = max(1, num_books // 100)
+    loan_id = 0
+    for loan_id in range(1, num_loans + 1):
+        book_id = rng.randint(1, popular) if rng.random() < 0.5 else rng.randint(1, num_books)
+        yield loan_id, rng.randint(1, num_lendors), book_id, 0
+    for book_id in range(1, num_books + 1):
+        if rng.random() < active_fraction:
+            loan_id += 1
+            yield loan_id, rng.randint(1, num_lendors), book_id, 1
+
+
+def library_sources(num_books, num_lendors=None, num_loans=None, active_fraction=0.3, seed=0):
+    """
+    Build the (table, rows) sources of a synthetic library, as taken by bulk_load and merge_load.
+    Args:
+        num_books (int): Number of books.
+        num_lendors (int): Number of lenders; defaults to one per 20 books (at least 10).
+        num_loans (int): Returned loans in the history; defaults to two per book.
+        active_fraction (float): Share of books that are currently borrowed.
+        seed (int): Random seed.
+    Returns:
+        list: (table, row generator) pairs.
+    """
+    rng = random.Random(seed)
+    num_lendors = num_lendors if num_lendors is not None else max(10, num_books // 20)
+    num_loans = num_loans if num_loans is not None else num_books * 2
+    return [
+        ('books', generate_books(rng, num_books)),
+        ('lendors', generate_lendors(rng, num_lendors)),
+        ('borrowed', generate_loans(rng, num_books, num_lendors, num_loans, active_fraction)),
+    ]
+
+
+def generate_library(lib, num_books, num_lendors=None, num_loans=None, active_fraction=0.3, seed=0):
+    """
+    Replace the contents of lib with a synthetic library in one bulk load.
+    Takes the arguments of library_sources.
+    Returns:
+        dict: Row counts per table.
+    """
+    stats = lib.bulk_load(library_sources(num_books, num_lendors, num_loans, active_fraction, seed))
+    return stats['tables']
@@ -38,7 +38,7 @@ version = 0.1
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
 # requirements = python3,kivy,sqlite3,db-sqlite3,matplotlib,kiteconnect,beautifulsoup4,pandas,Click,matplotlib
-requirements = python3,kivy,db-sqlite3,pandas,openpyxl,et_xmlfile,xlrd,xlwt
+requirements = python3,kivy,db-sqlite3,openpyxl,et_xmlfile
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
@@ -5,18 +5,154 @@ Kivy UI for PersonalLibrary management. Provides screens for adding/removing boo
 borrowing/returning books, and viewing book/lender details. Uses src.personal_library.PersonalLibrary
 for backend operations.
 """
+import json
 import os
+import time
+
+STARTED = time.perf_counter()
+
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.metrics import dp
 from kivy.uix.button import Button
 from kivy.uix.spinner import Spinner
 from kivy.uix.textinput import TextInput
-from src.personal_library import PersonalLibrary
+from kivy.logger import Logger
+from src.background_jobs import CANCELLED, FAILED, BackgroundJob
+from src.query_cache import DEFAULT_CACHE_SIZE
+from src.startup import DeferredLibrary, StartupTimer
+
+startup = StartupTimer(STARTED)
+startup.mark('imports')
+
+# Set to print the startup phases as JSON and exit once the main menu is shown and the library
+# is open (used by benchmarks.bench_startup).
+STARTUP_REPORT_ENV = 'PERSONAL_LIBRARY_STARTUP_REPORT'
+
+
+def open_library():
+    from src.personal_library import PersonalLibrary
+    return PersonalLibrary(cache_size=DEFAULT_CACHE_SIZE)
+
+
+def on_library_open(lib, error):
+    startup.mark('library_open')
+    if error is not None:
+        Logger.error(f'Startup: opening the library failed: {error}')
+    Clock.schedule_once(lambda dt: report_startup())
+
+
+library = DeferredLibrary(open_library, on_open=on_library_open)
+
+# Database snapshot formats offered on ManageDataScreen and their compression.
+SNAPSHOT_FORMATS = {'db': None, 'db.gz': 'gzip', 'db.xz': 'lzma'}
+
+# Excel workbooks at least this large are parsed one sheet per process on multi-core desktops;
+# for smaller ones, starting the worker processes costs more than it saves.
+PARALLEL_IMPORT_BYTES = 4 << 20
+
+# Rows fetched per database page by the scrolling result lists.
+LIST_PAGE_SIZE = 50
+
+# The next page is loaded once the list is scrolled within this many rows of its end.
+LIST_PREFETCH_ROWS = 20
+
+
+def format_book(b):
+    return f"ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}"
+
+
+def excel_import_workers(file_path):
+    """Worker processes for parsing an Excel import, or None to parse it on the job thread."""
+    from kivy.utils import platform
+    cores = os.cpu_count() or 1
+    if platform in ('android', 'ios') or cores < 2:
+        return None
+    if not os.path.isfile(file_path) or os.path.getsize(file_path) < PARALLEL_IMPORT_BYTES:
+        return None
+    return cores
+
+
+class ListRow(Label):
+    """
+    One row of a PagedList: left-aligned text wrapped to the row's size.
+    """
+
+    def on_size(self, instance, size):
+        self.text_size = size
+
+
+class PagedList(RecycleView):
+    """
+    Virtualized list of library rows. Widgets exist only for the visible rows, and rows are read
+    one keyset page at a time as the user scrolls towards the end, so the list opens instantly
+    and scrolls smoothly however many rows the library holds.
+    """
+
+    def __init__(self, row_height, **kwargs):
+        """
+        Args:
+            row_height (float): Height of every row, in pixels.
+        """
+        super().__init__(bar_width=10, **kwargs)
+        self.row_height = row_height
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, row_height), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = 'ListRow'
+        self.page_method = None
+        self.format_row = None
+        self.after_id = None
+        self._loading = False
+        self.bind(scroll_y=self.on_scroll, height=self.on_scroll)
+
+    def load(self, page_method, format_row, empty_text='No rows.'):
+        """
+        Show the first page of a keyset-paginated query.
+        Args:
+            page_method (callable): A PersonalLibrary get_*_page method.
+            format_row (callable): Turns a row into its display text.
+            empty_text (str): Shown when the query returns no rows.
+        """
+        self.page_method, self.format_row = page_method, format_row
+        self.after_id = 0
+        self.data = []
+        self.scroll_y = 1
+        self.load_more()
+        if not self.data:
+            self.data = [{'text': empty_text, 'halign': 'left', 'valign': 'top'}]
+
+    def load_more(self):
+        """
+        Append the next page, keeping the rows on screen where they are.
+        """
+        if self.after_id is None or self.page_method is None or self._loading:
+            return
+        self._loading = True
+        try:
+            rows, self.after_id = self.page_method(self.after_id, LIST_PAGE_SIZE)
+            offset = (1 - self.scroll_y) * self._scrollable()
+            self.data.extend({'text': self.format_row(row), 'halign': 'left', 'valign': 'top'} for row in rows)
+            self.scroll_y = max(0.0, 1 - offset / self._scrollable())
+        finally:
+            self._loading = False
+        # A short first page may not fill the view, leaving nothing to scroll.
+        if self.after_id is not None and self._scrollable() <= LIST_PREFETCH_ROWS * self.row_height:
+            Clock.schedule_once(lambda dt: self.load_more())
 
-library = PersonalLibrary()
+    def _scrollable(self):
+        return max(1.0, len(self.data) * self.row_height - self.height)
+
+    def on_scroll(self, *args):
+        if self.scroll_y * self._scrollable() < LIST_PREFETCH_ROWS * self.row_height:
+            self.load_more()
 
 
 class MainMenu(Screen):
@@ -33,6 +169,7 @@ class MainMenu(Screen):
             ("Get Borrowed Books with Lender details", "borrowed_books_lender"),
             ("Show Available Books", "show_available_books"),
             ("Manage Tables", "manage_tables"),
+            ("Diagnostics", "diagnostics"),
         ]
         for text, screen in buttons:
             btn = Button(text=text)
@@ -89,9 +226,12 @@ class ManageBooksScreen(Screen):
         return_btn.bind(on_release=self.show_return_book)
         remove_btn = Button(text='Remove Book')
         remove_btn.bind(on_release=self.show_remove_book)
+        search_btn = Button(text='Search Books')
+        search_btn.bind(on_release=self.show_search_books)
         back_btn = Button(text='Back', on_release=lambda x: setattr(self.manager, 'current', 'main_menu'))
         layout.add_widget(add_btn)
         layout.add_widget(show_btn)
+        layout.add_widget(search_btn)
         layout.add_widget(borrow_btn)
         layout.add_widget(return_btn)
         layout.add_widget(remove_btn)
@@ -113,6 +253,9 @@ class ManageBooksScreen(Screen):
     def show_remove_book(self, instance):
         self.manager.current = 'remove_book'
 
+    def show_search_books(self, instance):
+        self.manager.current = 'search_books'
+
 
 class ManageDataScreen(Screen):
     """
@@ -124,7 +267,12 @@ class ManageDataScreen(Screen):
         self.filename_input = TextInput(text='data', hint_text='Enter filename (e.g. data)', size_hint_y=0.1)
         self.format_spinner = Spinner(
             text='json',
-            values=('xls', 'json'),
+            values=('xls', 'json', 'ndjson') + tuple(SNAPSHOT_FORMATS),
+            size_hint_y=0.1
+        )
+        self.import_mode_spinner = Spinner(
+            text='replace',
+            values=('replace', 'merge', 'merge (dry run)'),
             size_hint_y=0.1
         )
         self.selected_path = None
@@ -134,15 +282,21 @@ class ManageDataScreen(Screen):
         import_btn.bind(on_release=self.import_tables)
         clear_btn = Button(text='Clear All Tables', size_hint_y=0.15)
         clear_btn.bind(on_release=self.clear_tables)
+        self.cancel_btn = Button(text='Cancel', size_hint_y=0.15, disabled=True)
+        self.cancel_btn.bind(on_release=self.cancel_job)
+        self.job_buttons = (export_btn, import_btn, clear_btn)
+        self.job = None
         self.result = Label(text='', size_hint_y=0.15, valign='top', halign='left')
         self.result.bind(texture_size=lambda instance, value: setattr(self.result, 'height', value[1]))
         self.result.text_size = (None, None)
         back_btn = Button(text='Back', size_hint_y=0.15, on_release=lambda x: setattr(self.manager, 'current', 'main_menu'))
         layout.add_widget(self.filename_input)
         layout.add_widget(self.format_spinner)
+        layout.add_widget(self.import_mode_spinner)
         layout.add_widget(export_btn)
         layout.add_widget(import_btn)
         layout.add_widget(clear_btn)
+        layout.add_widget(self.cancel_btn)
         layout.add_widget(self.result)
         layout.add_widget(back_btn)
         self.add_widget(layout)
@@ -164,28 +318,38 @@ class ManageDataScreen(Screen):
 
     def export_tables(self, instance):
         folder, filename = self.get_file_path()
-        file_format = filename.split('.')[-1].lower()
-        if file_format not in ('xls', 'json'):
-            self.result.text = "Supported formats are .xls and .json."
+        file_format = self.format_spinner.text.strip().lower()
+        if file_format not in ('xls', 'json', 'ndjson') + tuple(SNAPSHOT_FORMATS):
+            self.result.text = "Supported formats are .xls, .json, .ndjson and .db snapshots."
             return
         if not folder or not filename or not file_format:
             self.result.text = "Directory or filename is invalid."
             return
         os.makedirs(folder, exist_ok=True)
         file_path = os.path.join(folder, filename)
+        if file_format in SNAPSHOT_FORMATS:
+            self.start_job('Snapshot', lambda progress: library.snapshot(
+                file_path, SNAPSHOT_FORMATS[file_format], progress=progress))
+            return
         if file_format == 'xls':
-            result = library.export_to_excel(file_path)
+            export = library.export_to_excel
         elif file_format == 'json':
-            result = library.export_to_json(file_path)
+            export = library.export_to_json
         else:
-            result = f"Unsupported format: {file_format}"
-        self.result.text = self._wrap_text(result)
+            export = library.export_to_ndjson
+
+        def run(progress):
+            result = export(file_path, progress=progress)
+            if self.job.stopped and os.path.exists(file_path):
+                os.remove(file_path)
+            return result
+        self.start_job('Export', run)
 
     def import_tables(self, instance):
         folder, filename = self.get_file_path()
-        file_format = filename.split('.')[-1].lower()
-        if file_format not in ('xls', 'json'):
-            self.result.text = "Supported formats are .xls and .json."
+        file_format = self.format_spinner.text.strip().lower()
+        if file_format not in ('xls', 'json', 'ndjson') + tuple(SNAPSHOT_FORMATS):
+            self.result.text = "Supported formats are .xls, .json, .ndjson and .db snapshots."
             return
         if not folder or not filename or not file_format:
             self.result.text = "Directory or filename is invalid."
@@ -193,17 +357,56 @@ class ManageDataScreen(Screen):
         if not folder or not filename or not file_format:
             return
         file_path = os.path.join(folder, filename)
+        if file_format in SNAPSHOT_FORMATS:
+            self.start_job('Restore', lambda progress: library.restore(file_path, progress=progress))
+            return
+        mode = self.import_mode_spinner.text
+        options = {'mode': 'replace' if mode == 'replace' else 'merge', 'dry_run': mode == 'merge (dry run)'}
         if file_format == 'xls':
-            result = library.import_from_excel(file_path)
-        elif file_format == 'json':
-            result = library.import_from_json(file_path)
+            options['workers'] = excel_import_workers(file_path)
+            self.start_job('Import', lambda progress: library.import_from_excel(file_path, progress=progress, **options))
         else:
-            result = f"Unsupported format: {file_format}"
-        self.result.text = self._wrap_text(result)
+            self.start_job('Import', lambda progress: library.import_from_json(file_path, progress=progress, **options))
 
     def clear_tables(self, instance):
-        result = library.clear_all_tables()
-        self.result.text = self._wrap_text(result)
+        self.start_job('Clear', lambda progress: library.clear_all_tables(progress=progress))
+
+    def start_job(self, name, target):
+        """Run a library operation on a worker thread, reporting progress through the Kivy clock."""
+        if self.job is not None:
+            return
+        for btn in self.job_buttons:
+            btn.disabled = True
+        self.cancel_btn.disabled = False
+        self.result.text = f"{name} started..."
+        self.job = BackgroundJob(name, target, on_progress=self.on_job_progress,
+                                 on_finish=self.on_job_finish,
+                                 dispatch=lambda fn, *args: Clock.schedule_once(lambda dt: fn(*args)))
+        self.job.start()
+
+    def cancel_job(self, instance):
+        if self.job is not None:
+            self.job.cancel()
+            self.result.text = f"Cancelling {self.job.name.lower()}..."
+
+    def on_job_progress(self, job):
+        if job is self.job and not job.cancelled and job.name in ('Snapshot', 'Restore'):
+            self.result.text = f"{job.name}: {job.rows_processed} pages copied."
+        elif job is self.job and not job.cancelled:
+            self.result.text = self._wrap_text(
+                f"{job.name}: {job.rows_processed} rows processed, {job.tables_done} of 3 tables done.")
+
+    def on_job_finish(self, job):
+        self.job = None
+        for btn in self.job_buttons:
+            btn.disabled = False
+        self.cancel_btn.disabled = True
+        if job.status == CANCELLED:
+            self.result.text = f"{job.name} cancelled; no changes were kept."
+        elif job.status == FAILED:
+            self.result.text = self._wrap_text(f"{job.name} failed: {job.error}")
+        else:
+            self.result.text = self._wrap_text(job.result)
 
     def _wrap_text(self, text, width=40):
         import textwrap
@@ -218,24 +421,19 @@ class ShowAllLendorsScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
-        self.result = Label(text='', size_hint_y=None, valign='top', halign='left')
-        self.result.bind(texture_size=lambda instance, value: setattr(instance, 'height', value[1]))
-        self.result.text_size = (None, None)
         show_btn = Button(text='Show All Lenders')
         show_btn.bind(on_release=self.show_lendors)
         layout.add_widget(show_btn)
-        scroll = ScrollView(size_hint=(1, 1), bar_width=10)
-        scroll.add_widget(self.result)
-        layout.add_widget(scroll)
+        self.result = PagedList(row_height=dp(90), size_hint=(1, 1))
+        layout.add_widget(self.result)
         layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
             self.manager, 'current', 'manage_lendors')))
         self.add_widget(layout)
 
     def show_lendors(self, instance):
-        lendors = library.get_all_lendors()
-        self.result.text = '\n\n'.join([
-            f"ID: {l[0]}\nName: {l[1]}\nAddress: {l[2]}\nMobile: {l[3]}" for l in lendors
-        ])
+        self.result.load(library.get_lendors_page,
+                         lambda l: f"ID: {l[0]}\nName: {l[1]}\nAddress: {l[2]}\nMobile: {l[3]}",
+                         'No lenders.')
 
 
 class AddBookScreen(Screen):
@@ -270,6 +468,9 @@ class AddBookScreen(Screen):
         if title and author:
             book_id = library.add_book(title, author)
             self.result.text = f"Book added with ID: {book_id}\nTitle: {title}\nAuthor: {author}"
+            copies = library.find_title(title, author)[3]
+            if copies > 1:
+                self.result.text += f"\nThe library now has {copies} copies of this title."
         else:
             self.result.text = "Please enter both title and author."
 
@@ -329,52 +530,74 @@ class ShowAllBooksScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
-        self.result = Label(text='', size_hint_y=None, valign='top', halign='left')
-        self.result.bind(texture_size=lambda instance, value: setattr(instance, 'height', value[1]))
-        self.result.text_size = (None, None)
         show_btn = Button(text='Show All Books')
         show_btn.bind(on_release=self.show_books)
         layout.add_widget(show_btn)
-        scroll = ScrollView(size_hint=(1, 1), bar_width=10)
-        scroll.add_widget(self.result)
-        layout.add_widget(scroll)
+        self.result = PagedList(row_height=dp(70), size_hint=(1, 1))
+        layout.add_widget(self.result)
         layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
             self.manager, 'current', 'manage_books')))
         self.add_widget(layout)
 
     def show_books(self, instance):
         """Show all books in the library."""
-        books = library.get_all_books()
-        self.result.text = '\n\n'.join(
-            [f"ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}" for b in books])
+        self.result.load(library.get_books_page, format_book, 'No books.')
 
 
-class ShowAvailableBooksScreen(Screen):
+class SearchBooksScreen(Screen):
     """
-    Screen to display all available (not borrowed) books.
+    Screen to search books by title or author words.
     """
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
+        self.query_input = TextInput(hint_text='Title or author words', multiline=False)
+        self.query_input.bind(on_text_validate=self.search_books)
+        search_btn = Button(text='Search Books')
+        search_btn.bind(on_release=self.search_books)
         self.result = Label(text='', size_hint_y=None, valign='top', halign='left')
         self.result.bind(texture_size=lambda instance, value: setattr(instance, 'height', value[1]))
         self.result.text_size = (None, None)
-        show_btn = Button(text='Show Available Books')
-        show_btn.bind(on_release=self.show_books)
-        layout.add_widget(show_btn)
+        layout.add_widget(self.query_input)
+        layout.add_widget(search_btn)
         scroll = ScrollView(size_hint=(1, 1), bar_width=10)
         scroll.add_widget(self.result)
         layout.add_widget(scroll)
+        layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
+            self.manager, 'current', 'manage_books')))
+        self.add_widget(layout)
+
+    def search_books(self, instance):
+        """Show the best matches for the search words."""
+        books = library.search_books(self.query_input.text.strip())
+        if books:
+            self.result.text = '\n\n'.join(
+                [f"ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}" for b in books])
+        else:
+            self.result.text = "No books found."
+
+
+class ShowAvailableBooksScreen(Screen):
+    """
+    Screen to display all available (not borrowed) books.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
+        show_btn = Button(text='Show Available Books')
+        show_btn.bind(on_release=self.show_books)
+        layout.add_widget(show_btn)
+        self.result = PagedList(row_height=dp(70), size_hint=(1, 1))
+        layout.add_widget(self.result)
         layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
             self.manager, 'current', 'main_menu')))
         self.add_widget(layout)
 
     def show_books(self, instance):
         """Show all available books."""
-        books = library.get_books_not_borrowed()
-        self.result.text = '\n\n'.join(
-            [f"ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}" for b in books])
+        self.result.load(library.get_books_not_borrowed_page, format_book, 'No available books.')
 
 
 class AddLenderScreen(Screen):
@@ -613,53 +836,180 @@ class BorrowedBooksLenderScreen(Screen):
         show_btn = Button(text='Show Borrowed Books with Lender Details')
         show_btn.bind(on_release=self.show_borrowed)
         layout.add_widget(show_btn)
-        # Create a scrollable label for results
-        scroll = ScrollView(size_hint=(1, 1), bar_width=10)
+        self.result = PagedList(row_height=dp(150), size_hint=(1, 1))
+        layout.add_widget(self.result)
+        layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
+            self.manager, 'current', 'main_menu')))
+        self.add_widget(layout)
+
+    def show_borrowed(self, instance):
+        """Show borrowed books with lender details."""
+        self.result.load(
+            library.get_books_borrowed_with_lender_details_page,
+            lambda b: f"Book ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}\nLender: {b[3]}\nAddress: {b[4]}\nMobile: {b[5]}\nBorrowed ID: {b[6]}",
+            'No borrowed books.')
+
+
+class DiagnosticsScreen(Screen):
+    """
+    Screen to show the startup phases, switch query instrumentation on or off and show
+    per-method timings, the slowest SQL statements and the slow-query log with query plans.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
+        self.toggle_btn = Button(text='Start Recording', size_hint_y=0.12)
+        self.toggle_btn.bind(on_release=self.toggle)
+        refresh_btn = Button(text='Refresh', size_hint_y=0.12)
+        refresh_btn.bind(on_release=self.show_stats)
+        reset_btn = Button(text='Reset', size_hint_y=0.12)
+        reset_btn.bind(on_release=self.reset)
         self.result = Label(text='', size_hint_y=None, valign='top', halign='left')
         self.result.bind(texture_size=lambda instance, value: setattr(instance, 'height', value[1]))
         self.result.text_size = (None, None)
+        layout.add_widget(self.toggle_btn)
+        layout.add_widget(refresh_btn)
+        layout.add_widget(reset_btn)
+        scroll = ScrollView(size_hint=(1, 1), bar_width=10)
         scroll.add_widget(self.result)
         layout.add_widget(scroll)
-        layout.add_widget(Button(text='Back', on_release=lambda x: setattr(
+        layout.add_widget(Button(text='Back', size_hint_y=0.12, on_release=lambda x: setattr(
             self.manager, 'current', 'main_menu')))
         self.add_widget(layout)
 
-    def show_borrowed(self, instance):
-        """Show borrowed books with lender details."""
-        books = library.get_books_borrowed_with_lender_details()
-        self.result.text = '\n\n'.join(
-            [f"Book ID: {b[0]}\nTitle: {b[1]}\nAuthor: {b[2]}\nLender: {b[3]}\nAddress: {b[4]}\nMobile: {b[5]}\nBorrowed ID: {b[6]}" for b in books])
+    def on_pre_enter(self, *args):
+        self.show_stats(None)
+
+    def toggle(self, instance):
+        """Switch instrumentation on or off."""
+        if library.instrumentation is None:
+            library.enable_instrumentation()
+        else:
+            library.disable_instrumentation()
+        self.show_stats(instance)
+
+    def reset(self, instance):
+        """Drop the recorded timings."""
+        if library.instrumentation is not None:
+            library.instrumentation.reset()
+        self.show_stats(instance)
+
+    def show_stats(self, instance):
+        """Show the slowest methods, statements and logged slow queries."""
+        recording = library.instrumentation is not None
+        self.toggle_btn.text = 'Stop Recording' if recording else 'Start Recording'
+        lines = ['Startup (ms since launch):']
+        lines += [f'  {phase}: {ms:.0f}' for phase, ms in startup.phases().items() if phase != 'reported']
+        if not recording:
+            lines.append('\nRecording is off. Start it, use the app, then come back and refresh.')
+            self.result.text = '\n'.join(lines)
+            return
+        stats = library.instrumentation.stats()
+        methods = sorted(stats['methods'].items(), key=lambda item: -item[1]['total_ms'])[:10]
+        lines.append('\nMethods (calls, mean ms, max ms, rows):')
+        lines += [f"  {name}: {m['calls']}, {m['mean_ms']:.2f}, {m['max_ms']:.2f}, {m['rows']}" for name, m in methods]
+        lines.append('\nStatements by total time (calls, total ms, rows returned, rows written):')
+        lines += [f"  {self._wrap_text(sql, 60)}\n    {st['calls']}, {st['total_ms']:.1f}, {st['rows']}, {st['changes']}"
+                  for sql, st in list(stats['statements'].items())[:10]]
+        lines.append(f"\nSlow queries (>= {stats['slow_ms']} ms):")
+        for entry in reversed(stats['slow_queries'][-10:]):
+            lines.append(f"  {entry['ms']:.1f} ms, {entry['rows']} rows in {entry['method']}: "
+                         f"{self._wrap_text(entry['sql'][:200], 60)}")
+            lines += [f'    {step}' for step in entry['plan']]
+        self.result.text = '\n'.join(lines)
+
+    def _wrap_text(self, text, width=40):
+        return '\n    '.join(text[i:i + width] for i in range(0, len(text), width))
+
+
+class LazyScreenManager(ScreenManager):
+    """
+    ScreenManager that builds each registered screen the first time it is shown.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, factory):
+        """
+        Register a screen by name; factory(name=name) builds it on first navigation.
+        """
+        self.factories[name] = factory
+
+    def get_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            start = time.perf_counter()
+            self.add_widget(factory(name=name))
+            Logger.debug(f'Startup: built screen {name} in {(time.perf_counter() - start) * 1e3:.1f} ms')
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+
+def report_startup():
+    """
+    Log the startup phases once the main menu is shown and the library is open.
+    """
+    if not (startup.has('first_frame') and startup.has('library_open')) or startup.has('reported'):
+        return
+    startup.mark('reported')
+    Logger.info('Startup: ' + ', '.join(f'{phase} {ms:.0f} ms' for phase, ms in startup.phases().items()
+                                        if phase != 'reported'))
+    if os.environ.get(STARTUP_REPORT_ENV):
+        print(json.dumps({phase: ms for phase, ms in startup.phases().items() if phase != 'reported'}))
+        App.get_running_app().stop()
 
 
 class PersonalLibraryApp(App):
     """
-    Main Kivy App class. Sets up the ScreenManager and all screens.
+    Main Kivy App class. Sets up the ScreenManager and registers all screens; only the main
+    menu is built up front, the others on first navigation. The library opens on a worker
+    thread once the app starts.
     """
 
     def build(self):
-        sm = ScreenManager()
+        sm = LazyScreenManager()
         sm.add_widget(MainMenu(name='main_menu'))
-        sm.add_widget(ManageBooksScreen(name='manage_books'))
-        sm.add_widget(ManageLendorsScreen(name='manage_lendors'))
-        sm.add_widget(AddBookScreen(name='add_book'))
-        sm.add_widget(ShowAllBooksScreen(name='show_all_books'))
-        sm.add_widget(BorrowedBooksLenderScreen(name='borrowed_books_lender'))
-        sm.add_widget(ShowAvailableBooksScreen(name='show_available_books'))
-        sm.add_widget(ShowAllLendorsScreen(name='show_all_lendors'))
-        sm.add_widget(AddLenderScreen(name='add_lender'))
-        sm.add_widget(BorrowBookScreen(name='borrow_book'))
-        sm.add_widget(ReturnBookScreen(name='return_book'))
-        sm.add_widget(RemoveBookScreen(name='remove_book'))
-        sm.add_widget(RemoveLenderScreen(name='remove_lender'))
-        sm.add_widget(ManageDataScreen(name='manage_tables'))
+        for name, screen in (
+                ('manage_books', ManageBooksScreen),
+                ('manage_lendors', ManageLendorsScreen),
+                ('add_book', AddBookScreen),
+                ('show_all_books', ShowAllBooksScreen),
+                ('search_books', SearchBooksScreen),
+                ('borrowed_books_lender', BorrowedBooksLenderScreen),
+                ('show_available_books', ShowAvailableBooksScreen),
+                ('show_all_lendors', ShowAllLendorsScreen),
+                ('add_lender', AddLenderScreen),
+                ('borrow_book', BorrowBookScreen),
+                ('return_book', ReturnBookScreen),
+                ('remove_book', RemoveBookScreen),
+                ('remove_lender', RemoveLenderScreen),
+                ('manage_tables', ManageDataScreen),
+                ('diagnostics', DiagnosticsScreen)):
+            sm.register(name, screen)
+        startup.mark('build')
         return sm
 
+    def on_start(self):
+        library.open_async()
+        self.root_window.bind(on_flip=self.on_first_frame)
+
+    def on_first_frame(self, *args):
+        self.root_window.unbind(on_flip=self.on_first_frame)
+        startup.mark('first_frame')
+        report_startup()
+
 
 if __name__ == '__main__':
     run_ui = True
     if run_ui:
         PersonalLibraryApp().run()
     else:
+        from src.personal_library import PersonalLibrary
         lib = PersonalLibrary()
         # Add books
         b1 = lib.add_book('The Hobbit', 'J.R.R. Tolkien')
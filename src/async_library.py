@@ -0,0 +1,115 @@
+"""
+async_library.py
+
+Asyncio facade for PersonalLibrary. Every public library method has an awaitable counterpart
+that runs on a dedicated thread pool, so the event loop never blocks on SQLite. Reads run
+concurrently on the library's pooled read-only connections; writes are queued behind an
+asyncio lock and run one at a time. The iter_* list queries become async iterators that await
+one keyset page at a time.
+"""
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from src.connection_pool import MAX_READERS
+from src.personal_library import PAGE_SIZE, PersonalLibrary
+
+# Library methods that write. They are serialized so that a queue of writes waiting for the
+# writer connection never occupies the threads that reads need.
+WRITE_METHODS = frozenset({
+    'add_book', 'remove_book', 'add_lender', 'remove_lender', 'borrow_book', 'return_borrowed_book',
+    'add_books_many', 'add_lenders_many', 'borrow_many', 'return_many', 'upsert_many',
+    'clear_all_tables', 'bulk_load', 'merge_load', 'import_from_json', 'import_from_excel', 'apply_changes',
+    'restore',
+})
+
+# Page method behind each async iterator.
+ITER_PAGES = {
+    'iter_books': 'get_books_page',
+    'iter_lendors': 'get_lendors_page',
+    'iter_books_not_borrowed': 'get_books_not_borrowed_page',
+    'iter_books_borrowed_with_lender_details': 'get_books_borrowed_with_lender_details_page',
+    'iter_borrowed': 'get_borrowed_page',
+}
+
+# Library methods that are not exposed: schema setup and the lifecycle handled here.
+NOT_WRAPPED = frozenset({'close', 'create_tables'})
+
+
+class AsyncPersonalLibrary:
+    """
+    Awaitable PersonalLibrary. Create it, then await its methods; await close() (or use
+    "async with") when done. Progress callbacks passed to the wrapped methods are called on a
+    worker thread.
+    """
+
+    def __init__(self, db_name='library.db', max_readers=MAX_READERS, **kwargs):
+        """
+        Open the library and its executor.
+        Args:
+            db_name (str): Path of the SQLite database.
+            max_readers (int): Reads that may run at the same time.
+            kwargs: Further PersonalLibrary arguments, e.g. busy_timeout or cache_size.
+        """
+        self.library = PersonalLibrary(db_name, max_readers=max_readers, **kwargs)
+        # One thread per reader connection plus one for the writer.
+        self._executor = ThreadPoolExecutor(max_workers=max_readers + 1, thread_name_prefix='async-library')
+        self._write_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _read(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+    async def _write(self, method, *args, **kwargs):
+        async with self._write_lock:
+            return await self._read(method, *args, **kwargs)
+
+    async def _iter_pages(self, page_method, batch_size):
+        """
+        Yield rows from a page method, awaiting one page at a time.
+        """
+        after_id = 0
+        while after_id is not None:
+            rows, after_id = await self._read(page_method, after_id, batch_size)
+            for row in rows:
+                yield row
+
+    async def close(self):
+        """
+        Wait for running calls, then close the library connections and the executor.
+        """
+        async with self._write_lock:
+            await self._read(self.library.close)
+        self._executor.shutdown(wait=True)
+
+
+def _wrap(name, method):
+    """
+    Build the awaitable (or async iterator) counterpart of a PersonalLibrary method.
+    """
+    if name in ITER_PAGES:
+        page_name = ITER_PAGES[name]
+
+        @wraps(method)
+        def iterate(self, batch_size=PAGE_SIZE):
+            return self._iter_pages(getattr(self.library, page_name), batch_size)
+        return iterate
+    run = AsyncPersonalLibrary._write if name in WRITE_METHODS else AsyncPersonalLibrary._read
+
+    @wraps(method)
+    async def call(self, *args, **kwargs):
+        return await run(self, getattr(self.library, name), *args, **kwargs)
+    return call
+
+
+for _name, _method in inspect.getmembers(PersonalLibrary, inspect.isfunction):
+    if _name.startswith('_') or _name.startswith('create_') or _name in NOT_WRAPPED:
+        continue
+    setattr(AsyncPersonalLibrary, _name, _wrap(_name, _method))
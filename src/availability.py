@@ -0,0 +1,159 @@
+"""
+availability.py
+
+In-process availability index for PersonalLibrary: one bit per book id, set while the book
+exists and has no active loan. It is built from books and borrowed on first use, then kept in
+step by the library's single-row and batch write paths; whole-table writes drop it and it is
+rebuilt on the next query. A change of SQLite's PRAGMA data_version (a commit from another
+connection or process) also triggers a rebuild. Statements run directly on PersonalLibrary.conn
+bypass it, so call invalidate() after using it.
+"""
+import sys
+import threading
+
+# Offsets of the set bits of every byte value, so scans skip straight to available ids.
+BIT_POSITIONS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+# Books that are on the shelf: the book exists and has no active loan (returned = 1).
+AVAILABLE_SQL = '''SELECT id FROM books WHERE NOT EXISTS (
+    SELECT 1 FROM borrowed WHERE borrowed.book_id = books.id AND borrowed.returned = 1
+)'''
+
+
+class AvailabilityIndex:
+    """
+    Bit array of available book ids with a running count.
+    Writers update it while holding the library's writer connection; readers only take its lock.
+    """
+
+    def __init__(self):
+        self.rebuilds = 0
+        self._bits = bytearray()
+        self._count = 0
+        self._built = False
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self):
+        return self._built
+
+    def is_current(self, data_version):
+        """
+        Check whether the index can answer queries without a rebuild.
+        Args:
+            data_version (int): Current PRAGMA data_version, or None if it could not be read
+                because a write is in flight; the index then trusts its own updates.
+        """
+        return self._built and (data_version is None or data_version == self._data_version)
+
+    def refresh(self, conn):
+        """
+        Rebuild the index from books and borrowed unless it is already current.
+        Must be called while holding the writer connection, so no write commits meanwhile.
+        Args:
+            conn (sqlite3.Connection): The library's writer connection.
+        """
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if self.is_current(data_version):
+            return
+        max_id = conn.execute('SELECT MAX(id) FROM books').fetchone()[0] or 0
+        bits = bytearray((max_id >> 3) + 1)
+        count = 0
+        for (book_id,) in conn.execute(AVAILABLE_SQL):
+            bits[book_id >> 3] |= 1 << (book_id & 7)
+            count += 1
+        with self._lock:
+            self._bits, self._count = bits, count
+            self._data_version = data_version
+            self._built = True
+            self.rebuilds += 1
+
+    def invalidate(self):
+        """
+        Drop the index; the next query rebuilds it.
+        """
+        with self._lock:
+            self._built = False
+            self._bits = bytearray()
+            self._count = 0
+
+    def mark(self, book_ids, available):
+        """
+        Record committed changes. Does nothing until the index is built.
+        Args:
+            book_ids (iterable): Book ids whose availability changed.
+            available (bool): True for added or returned books, False for removed or lent ones.
+        """
+        if not self._built:
+            return
+        with self._lock:
+            bits = self._bits
+            for book_id in book_ids:
+                byte, mask = book_id >> 3, 1 << (book_id & 7)
+                if byte >= len(bits):
+                    if not available:
+                        continue
+                    bits.extend(bytearray(max(byte + 1, len(bits) + len(bits) // 8) - len(bits)))
+                if bool(bits[byte] & mask) != available:
+                    bits[byte] ^= mask
+                    self._count += 1 if available else -1
+
+    def is_available(self, book_id):
+        """
+        Returns:
+            bool: True if the book exists and is not currently borrowed.
+        """
+        byte = book_id >> 3
+        bits = self._bits
+        return 0 <= byte < len(bits) and bool(bits[byte] >> (book_id & 7) & 1)
+
+    def count(self):
+        """
+        Returns:
+            int: Number of available books.
+        """
+        return self._count
+
+    def ids(self, after_id=0, limit=None):
+        """
+        List available book ids in ascending order.
+        Args:
+            after_id (int): Only ids greater than this.
+            limit (int): Maximum ids to return; None for all.
+        Returns:
+            list: Book ids.
+        """
+        with self._lock:
+            bits = bytes(self._bits)
+        result = []
+        start = max(after_id + 1, 0)
+        for byte in range(start >> 3, len(bits)):
+            value = bits[byte]
+            if not value:
+                continue
+            base = byte << 3
+            for bit in BIT_POSITIONS[value]:
+                if base + bit >= start:
+                    result.append(base + bit)
+                    if len(result) == limit:
+                        return result
+        return result
+
+    def memory(self):
+        """
+        Report the memory held by the index.
+        Returns:
+            dict: capacity (book ids covered), available, bitmap_bytes (bit array payload),
+                total_bytes (including the Python object) and bytes_per_book.
+        """
+        with self._lock:
+            capacity = len(self._bits) * 8
+            total = sys.getsizeof(self._bits)
+            return {
+                'capacity': capacity,
+                'available': self._count,
+                'bitmap_bytes': len(self._bits),
+                'total_bytes': total,
+                'bytes_per_book': total / capacity if capacity else 0.0,
+            }
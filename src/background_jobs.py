@@ -0,0 +1,136 @@
+"""
+background_jobs.py
+
+Background job runner for long PersonalLibrary operations (export, import, clear). A job runs its
+target on a worker thread, collects progress (rows processed, tables done) and supports
+cooperative cancellation. Callbacks are handed to a dispatch function so a UI can deliver them
+on its own thread, e.g. through Kivy's Clock.
+"""
+import threading
+
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+
+class JobCancelled(Exception):
+    """
+    Raised from a job's progress callback once cancellation has been requested.
+    """
+
+
+def call_now(fn, *args):
+    """
+    Default dispatch: invoke the callback immediately on the calling thread.
+    """
+    fn(*args)
+
+
+class BackgroundJob:
+    """
+    Run target(progress) on a daemon worker thread.
+    The target receives the job's progress method as a progress(table, rows, done) callback,
+    the signature accepted by the PersonalLibrary export/import/clear methods. Calling
+    cancel() makes the next progress call raise JobCancelled, which the library methods
+    treat as a failure and roll back. The job ends CANCELLED only if JobCancelled was raised;
+    a cancel that comes after the last progress report leaves it FINISHED.
+    """
+
+    def __init__(self, name, target, on_progress=None, on_finish=None, dispatch=call_now):
+        """
+        Args:
+            name (str): Label for the job, e.g. "Export".
+            target (callable): Function taking the progress callback and returning a result.
+            on_progress (callable): Called as on_progress(job) after each progress update.
+            on_finish (callable): Called as on_finish(job) once the job has ended.
+            dispatch (callable): dispatch(fn, *args) delivers callbacks, e.g. on the UI thread.
+        """
+        self.name = name
+        self.target = target
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.dispatch = dispatch
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.rows_processed = 0
+        self.tables_done = 0
+        self._table_rows = {}
+        self._finished_tables = set()
+        self._cancel = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        """
+        bool: True once cancel() has been called.
+        """
+        return self._cancel.is_set()
+
+    @property
+    def stopped(self):
+        """
+        bool: True once a progress call has raised JobCancelled, so the operation did not complete.
+        """
+        return self._stopped
+
+    def start(self):
+        """
+        Start the worker thread.
+        Returns:
+            BackgroundJob: This job, for chaining.
+        """
+        self.status = RUNNING
+        self._thread = threading.Thread(target=self._run, name=f'job-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """
+        Request cancellation. The job stops at its next progress report.
+        """
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        """
+        Wait for the worker thread to end.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def progress(self, table, rows, done=False):
+        """
+        Record progress for a table and notify the listener.
+        Args:
+            table (str): Table being processed.
+            rows (int): Rows processed so far for that table.
+            done (bool): True when the table is complete.
+        Raises:
+            JobCancelled: If cancellation has been requested.
+        """
+        if self._cancel.is_set():
+            # The library methods may catch JobCancelled and return an error instead.
+            self._stopped = True
+            raise JobCancelled(f'{self.name} cancelled')
+        self._table_rows[table] = rows
+        self.rows_processed = sum(self._table_rows.values())
+        if done:
+            self._finished_tables.add(table)
+        self.tables_done = len(self._finished_tables)
+        if self.on_progress:
+            self.dispatch(self.on_progress, self)
+
+    def _run(self):
+        try:
+            self.result = self.target(self.progress)
+            self.status = CANCELLED if self._stopped else FINISHED
+        except JobCancelled:
+            self.status = CANCELLED
+        except Exception as e:
+            self.error = e
+            self.status = CANCELLED if self._stopped else FAILED
+        if self.on_finish:
+            self.dispatch(self.on_finish, self)
@@ -0,0 +1,220 @@
+"""
+cli.py
+
+Command-line entry point for scripted bulk jobs, run as `python -m src.personal_library`.
+`import` streams CSV rows from a file or stdin into books, lendors or borrowed through the batch
+write methods, committing every --batch-size rows; a CSV written by `export` is restored with its
+IDs, loan states and dates. `export` streams a table out as CSV one keyset page at a time.
+Neither holds more than one batch in memory. Row counts and throughput go to stderr, so CSV can
+be piped through stdout.
+
+    python -m src.personal_library --db library.db import books books.csv --batch-size 5000
+    python -m src.personal_library --db library.db export borrowed > loans.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from functools import partial
+
+from src.personal_library import BULK_CHUNK_SIZE, TABLE_COLUMNS, PersonalLibrary
+
+# Per table: CSV columns read on import, with the converter of each value, and the batch write
+# method they are passed to, when the CSV lacks some of the exported columns. Other columns are ignored.
+IMPORT_COLUMNS = {
+    'books': ((('title', str), ('author', str)), 'add_books_many'),
+    'lendors': ((('name', str), ('address', str), ('mobile', str)), 'add_lenders_many'),
+    'borrowed': ((('lendor_id', int), ('book_id', int)), 'borrow_many'),
+}
+
+# Per table: converter of each TABLE_COLUMNS value. A CSV with all of them, such as an export, is
+# written through upsert_many, keeping its IDs, added dates and loan states.
+EXPORT_TYPES = {
+    'books': (int, str, str, str),
+    'lendors': (int, str, str, str),
+    'borrowed': (int, int, int, int),
+}
+
+# Keyset iterator streaming each table on export, in TABLE_COLUMNS order.
+EXPORT_ITERATORS = {'books': 'iter_books', 'lendors': 'iter_lendors', 'borrowed': 'iter_borrowed'}
+
+# Accepted spellings of the table names.
+TABLE_ALIASES = {'lenders': 'lendors', 'loans': 'borrowed'}
+
+# Failed rows reported individually on stderr; the rest are only counted.
+MAX_REPORTED_ERRORS = 20
+
+
+def table_name(name):
+    name = TABLE_ALIASES.get(name, name)
+    if name not in TABLE_COLUMNS:
+        raise argparse.ArgumentTypeError(f"unknown table {name!r} (choose from books, lendors, borrowed)")
+    return name
+
+
+def _convert(value, converter):
+    # Empty optional text is stored as NULL, as an export writes it.
+    if converter is str:
+        return value or None
+    return converter(value)
+
+
+def import_csv(library, table, csv_file, batch_size=BULK_CHUNK_SIZE, reject_duplicates=False, on_error=None):
+    """
+    Stream CSV rows into a table, one transaction per batch.
+    A header naming every TABLE_COLUMNS column, as export_csv writes, restores the rows with their
+    IDs, replacing rows with the same ID; otherwise the IMPORT_COLUMNS are added as new rows.
+    Rows that cannot be parsed or written are skipped and reported; earlier batches stay committed.
+    Args:
+        library (PersonalLibrary): Library to write to.
+        table (str): 'books', 'lendors' or 'borrowed' (new active loans, unless restored from an export).
+        csv_file (file): Open text file with a header row naming at least the IMPORT_COLUMNS.
+        batch_size (int): Rows written per transaction.
+        reject_duplicates (bool): For books, skip rows whose title is already held.
+        on_error (callable): Optional on_error(line, message) for each failed row, called in
+            line order once the row's batch is written.
+    Returns:
+        dict: rows read, written, failed, batches, seconds and rows_per_sec.
+    Raises:
+        ValueError: If the header lacks a required column, or reject_duplicates is set for a
+            CSV with IDs.
+    """
+    reader = csv.reader(csv_file)
+    header = [name.strip().lower() for name in next(reader, [])]
+    if all(name in header for name in TABLE_COLUMNS[table]):
+        if reject_duplicates:
+            raise ValueError('--reject-duplicates cannot be used with a CSV that has IDs')
+        columns = tuple(zip(TABLE_COLUMNS[table], EXPORT_TYPES[table]))
+        write = partial(library.upsert_many, table)
+        options = {}
+    else:
+        columns, method_name = IMPORT_COLUMNS[table]
+        write = getattr(library, method_name)
+        options = {'reject_duplicates': reject_duplicates} if table == 'books' else {}
+    missing = [name for name, _ in columns if name not in header]
+    if missing:
+        raise ValueError(f"CSV for {table} needs columns: {', '.join(missing)}")
+    positions = [(header.index(name), converter) for name, converter in columns]
+    stats = {'rows': 0, 'written': 0, 'failed': 0, 'batches': 0}
+    start = time.perf_counter()
+
+    def flush(batch, lines, errors):
+        # Parse errors were queued with the batch; report them with its write errors in line order.
+        if batch:
+            result = write(batch, **options)
+            stats['batches'] += 1
+            stats['written'] += len(batch) - len(result.errors)
+            errors += [(lines[index], message) for index, message in result.errors]
+        stats['failed'] += len(errors)
+        if on_error:
+            for line, message in sorted(errors):
+                on_error(line, message)
+
+    batch, lines, errors = [], [], []
+    for row in reader:
+        if not row:
+            continue
+        stats['rows'] += 1
+        try:
+            batch.append(tuple(_convert(row[i], converter) for i, converter in positions))
+        except (IndexError, ValueError) as e:
+            errors.append((reader.line_num, f'bad row: {e}'))
+            continue
+        lines.append(reader.line_num)
+        if len(batch) >= batch_size:
+            flush(batch, lines, errors)
+            batch, lines, errors = [], [], []
+    if batch or errors:
+        flush(batch, lines, errors)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+def export_csv(library, table, csv_file, batch_size=BULK_CHUNK_SIZE):
+    """
+    Stream a table out as CSV with a header row, one keyset page of batch_size rows at a time.
+    Returns:
+        dict: rows written, seconds and rows_per_sec.
+    """
+    start = time.perf_counter()
+    writer = csv.writer(csv_file)
+    writer.writerow(TABLE_COLUMNS[table])
+    rows = 0
+    for row in getattr(library, EXPORT_ITERATORS[table])(batch_size):
+        writer.writerow(row)
+        rows += 1
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds > 0 else 0.0}
+
+
+def _open(path, mode):
+    if path == '-':
+        return None
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.personal_library',
+                                     description='Bulk CSV import and export for a PersonalLibrary database.')
+    parser.add_argument('--db', default='library.db')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('import', help='Add rows from CSV (books, lendors or new loans).')
+    ingest.add_argument('table', type=table_name)
+    ingest.add_argument('file', nargs='?', default='-', help='CSV file; - or omitted for stdin.')
+    ingest.add_argument('--batch-size', type=int, default=BULK_CHUNK_SIZE, help='Rows committed per transaction.')
+    ingest.add_argument('--reject-duplicates', action='store_true',
+                        help='Skip books whose title and author are already in the library.')
+    dump = commands.add_parser('export', help='Write a table as CSV.')
+    dump.add_argument('table', type=table_name)
+    dump.add_argument('file', nargs='?', default='-', help='CSV file; - or omitted for stdout.')
+    dump.add_argument('--batch-size', type=int, default=BULK_CHUNK_SIZE, help='Rows read per page.')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+
+    reported = 0
+
+    def report_error(line, message):
+        nonlocal reported
+        if reported < MAX_REPORTED_ERRORS:
+            print(f'line {line}: {message}', file=sys.stderr)
+        reported += 1
+
+    library = PersonalLibrary(args.db)
+    try:
+        if args.command == 'import':
+            f = _open(args.file, 'r')
+            try:
+                stats = import_csv(library, args.table, f or sys.stdin, args.batch_size,
+                                   args.reject_duplicates, report_error)
+            except ValueError as e:
+                parser.error(str(e))
+            finally:
+                if f:
+                    f.close()
+            print(f"{args.table}: {stats['written']} of {stats['rows']} rows imported, {stats['failed']} failed, "
+                  f"{stats['batches']} batches in {stats['seconds']:.2f} s ({stats['rows_per_sec']:.0f} rows/s)",
+                  file=sys.stderr)
+            return 1 if stats['failed'] else 0
+        f = _open(args.file, 'w')
+        try:
+            stats = export_csv(library, args.table, f or sys.stdout, args.batch_size)
+        except BrokenPipeError:
+            # The reader, e.g. `| head`, closed the pipe early; stop quietly, and keep the
+            # interpreter from failing again when it flushes stdout on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+        finally:
+            if f:
+                f.close()
+        print(f"{args.table}: {stats['rows']} rows exported in {stats['seconds']:.2f} s "
+              f"({stats['rows_per_sec']:.0f} rows/s)", file=sys.stderr)
+        return 0
+    finally:
+        library.close()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
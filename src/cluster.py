@@ -0,0 +1,197 @@
+"""
+cluster.py
+
+One PersonalLibrary shard per branch database. Operations on a single branch are routed to its
+shard by branch key; cross-branch queries (search, availability, most/least borrowed) are fanned
+out to every shard in parallel on a thread pool and merged. Each shard keeps its own connections,
+so shard queries run on separate SQLite databases and do not contend for locks.
+"""
+import inspect
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from src.personal_library import PersonalLibrary
+
+# Result of a fan-out query: merged items, each tagged with its branch, and per-branch metadata
+# {branch: {'seconds': float, 'rows': int, 'error': str or None}}.
+ClusterResult = namedtuple('ClusterResult', ['items', 'shards'])
+
+
+class LibraryCluster:
+    """
+    A set of branch libraries addressed by branch key.
+    Every public PersonalLibrary method is available with the branch as first argument, e.g.
+    cluster.add_book('north', title, author); the fan-out queries below cover all branches.
+    """
+
+    def __init__(self, branches, max_workers=None, **library_kwargs):
+        """
+        Open a shard per branch.
+        Args:
+            branches (dict): Branch key -> database path (or an open PersonalLibrary).
+            max_workers (int): Shards queried at the same time; defaults to one per branch.
+            library_kwargs: PersonalLibrary arguments for the shards opened here.
+        """
+        self.shards = {}
+        self._owned = set()
+        for branch, db in branches.items():
+            self.add_branch(branch, db, **library_kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.shards)),
+                                            thread_name_prefix='library-cluster')
+
+    def add_branch(self, branch, db, **library_kwargs):
+        """
+        Add a branch shard.
+        Args:
+            branch (str): Branch key.
+            db (str or PersonalLibrary): Database path, or an open library the caller keeps owning.
+        """
+        if branch in self.shards:
+            raise ValueError(f'Branch already exists: {branch}')
+        if isinstance(db, PersonalLibrary):
+            self.shards[branch] = db
+        else:
+            self.shards[branch] = PersonalLibrary(db, **library_kwargs)
+            self._owned.add(branch)
+
+    def shard(self, branch):
+        """
+        Get the library of a branch.
+        Raises:
+            KeyError: If the branch is unknown.
+        """
+        try:
+            return self.shards[branch]
+        except KeyError:
+            raise KeyError(f'Unknown branch: {branch}')
+
+    def fan_out(self, query):
+        """
+        Run query(library) on every shard in parallel.
+        A failing shard is reported in the metadata instead of failing the whole query.
+        Args:
+            query (callable): Function of one PersonalLibrary returning a list of rows.
+        Returns:
+            ClusterResult: items is {branch: rows} for the shards that answered.
+        """
+        def timed(branch, library):
+            start = time.perf_counter()
+            try:
+                rows, error = query(library), None
+            except Exception as e:
+                rows, error = None, str(e)
+            return branch, rows, error, time.perf_counter() - start
+
+        results, shards = {}, {}
+        for branch, rows, error, seconds in self._executor.map(lambda item: timed(*item), self.shards.items()):
+            shards[branch] = {'seconds': seconds, 'rows': len(rows) if rows is not None else 0, 'error': error}
+            if error is None:
+                results[branch] = rows
+        return ClusterResult(results, shards)
+
+    def _tagged(self, result):
+        """
+        Prefix every row with its branch.
+        """
+        return {branch: [(branch,) + tuple(row) for row in rows] for branch, rows in result.items.items()}
+
+    def search_books(self, query, limit=20, available_only=False):
+        """
+        Search every branch. Results are interleaved by rank, so each branch's best match comes
+        before any branch's second best.
+        Args:
+            query (str): Words to search for.
+            limit (int): Maximum books to return.
+            available_only (bool): Only books that are not currently borrowed.
+        Returns:
+            ClusterResult: items are (branch, id, title, author, added_date).
+        """
+        result = self.fan_out(lambda library: library.search_books(query, limit, available_only=available_only))
+        per_branch = self._tagged(result)
+        merged = []
+        for rank in range(limit):
+            for branch in self.shards:
+                rows = per_branch.get(branch, ())
+                if rank < len(rows):
+                    merged.append(rows[rank])
+        return ClusterResult(merged[:limit], result.shards)
+
+    def find_available(self, query, limit=20):
+        """
+        Answer "is this title available anywhere?": matching books that are on the shelf in any branch.
+        Returns:
+            ClusterResult: items are (branch, id, title, author, added_date).
+        """
+        return self.search_books(query, limit, available_only=True)
+
+    def top_borrowed(self, k=10):
+        """
+        The k most borrowed books across branches, ties broken by branch order then book ID.
+        Returns:
+            ClusterResult: items are (branch, id, title, author, borrow_count).
+        """
+        return self._ranked(lambda library: library.top_borrowed(k), k, descending=True)
+
+    def bottom_borrowed(self, k=10):
+        """
+        The k least borrowed books across branches, never-borrowed books included.
+        Returns:
+            ClusterResult: items are (branch, id, title, author, borrow_count).
+        """
+        return self._ranked(lambda library: library.bottom_borrowed(k), k, descending=False)
+
+    def get_most_borrowed_book(self):
+        """
+        Returns:
+            ClusterResult: items holds the single most borrowed book, if any.
+        """
+        return self.top_borrowed(1)
+
+    def get_least_borrowed_book(self):
+        """
+        Returns:
+            ClusterResult: items holds the single least borrowed book, if any.
+        """
+        return self.bottom_borrowed(1)
+
+    def count_available(self):
+        """
+        Count books that are not currently borrowed, per branch.
+        Returns:
+            ClusterResult: items are (branch, available count).
+        """
+        result = self.fan_out(lambda library: [(library.count_available(),)])
+        return ClusterResult([row for rows in self._tagged(result).values() for row in rows], result.shards)
+
+    def _ranked(self, query, k, descending):
+        result = self.fan_out(query)
+        order = {branch: i for i, branch in enumerate(self.shards)}
+        rows = [row for rows in self._tagged(result).values() for row in rows]
+        rows.sort(key=lambda row: (-row[4] if descending else row[4], order[row[0]], row[1]))
+        return ClusterResult(rows[:k], result.shards)
+
+    def close(self):
+        """
+        Close the shards opened by the cluster and stop the thread pool.
+        """
+        self._executor.shutdown(wait=True)
+        for branch in self._owned:
+            self.shards[branch].close()
+
+
+def _routed(name, method):
+    """
+    Build the branch-routed counterpart of a PersonalLibrary method.
+    """
+    @wraps(method)
+    def call(self, branch, *args, **kwargs):
+        return getattr(self.shard(branch), name)(*args, **kwargs)
+    return call
+
+
+for _name, _method in inspect.getmembers(PersonalLibrary, inspect.isfunction):
+    if _name.startswith('_') or _name.startswith('create_') or hasattr(LibraryCluster, _name):
+        continue
+    setattr(LibraryCluster, _name, _routed(_name, _method))
@@ -0,0 +1,159 @@
+"""
+connection_pool.py
+
+Connection management for PersonalLibrary. One writer connection is shared behind a lock and a
+bounded pool of read-only connections serves queries, so reads on any thread never wait for
+the writer. Databases are switched to WAL journal mode so readers and the writer do not block
+each other at the SQLite level either.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+# Default number of read-only connections kept by the pool.
+MAX_READERS = 4
+
+# Seconds a connection waits on a locked database before raising "database is locked".
+BUSY_TIMEOUT = 5.0
+
+
+class ConnectionPool:
+    """
+    A writer connection plus a pool of read-only connections for one SQLite database.
+    A thread holds a reader for the duration of a reader() block; nested blocks, and reads
+    made while the thread holds the writer, reuse the connection it already has.
+    """
+
+    def __init__(self, db_name, max_readers=MAX_READERS, busy_timeout=BUSY_TIMEOUT):
+        """
+        Open the writer connection and switch the database to WAL mode.
+        Args:
+            db_name (str): Path of the SQLite database, or ':memory:'.
+            max_readers (int): Maximum number of read-only connections.
+            busy_timeout (float): Seconds to wait on a locked database.
+        """
+        self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self.in_memory = db_name in ('', ':memory:')
+        self.writer_conn = sqlite3.connect(db_name, timeout=busy_timeout, check_same_thread=False)
+        if not self.in_memory:
+            self.writer_conn.execute('PRAGMA journal_mode=WAL')
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(max_readers)
+        self._idle = queue.LifoQueue()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._trace_factory = None
+        self._row_factory = None
+
+    def _open_reader(self):
+        """
+        Open a new read-only connection to the database.
+        """
+        uri = f'file:{pathname2url(os.path.abspath(self.db_name))}?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout, check_same_thread=False)
+        with self._readers_lock:
+            self._readers.append(conn)
+            if self._trace_factory is not None:
+                conn.set_trace_callback(self._trace_factory(conn))
+            conn.row_factory = self._row_factory
+        return conn
+
+    def set_trace_callback(self, factory):
+        """
+        Install an SQL trace callback on the writer and every reader, including readers opened later.
+        Args:
+            factory (callable): factory(conn) returning the trace callback for that connection,
+                or None to remove tracing.
+        """
+        with self._readers_lock:
+            self._trace_factory = factory
+            for conn in [self.writer_conn] + self._readers:
+                conn.set_trace_callback(factory(conn) if factory is not None else None)
+
+    def set_row_factory(self, row_factory):
+        """
+        Install a row factory on the writer and every reader, including readers opened later.
+        It applies to cursors created afterwards.
+        Args:
+            row_factory (callable): row_factory(cursor, row) returning the row, or None for plain tuples.
+        """
+        with self._readers_lock:
+            self._row_factory = row_factory
+            for conn in [self.writer_conn] + self._readers:
+                conn.row_factory = row_factory
+
+    @contextmanager
+    def writer(self):
+        """
+        Hold the writer connection exclusively for the duration of the block.
+        Yields:
+            sqlite3.Connection: The writer connection.
+        """
+        with self._write_lock:
+            previous = getattr(self._local, 'conn', None)
+            self._local.conn = self.writer_conn
+            try:
+                yield self.writer_conn
+            finally:
+                self._local.conn = previous
+
+    @contextmanager
+    def reader(self):
+        """
+        Check out a read-only connection for the duration of the block. Blocks while all
+        max_readers connections are in use by other threads. In-memory databases cannot be
+        shared, so they are read through the writer connection.
+        Yields:
+            sqlite3.Connection: A connection owned by this thread until the block exits.
+        """
+        current = getattr(self._local, 'conn', None)
+        if current is not None:
+            yield current
+            return
+        if self.in_memory:
+            with self.writer() as conn:
+                yield conn
+            return
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open_reader()
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                self._idle.put(conn)
+
+    def data_version(self):
+        """
+        Read PRAGMA data_version on the writer connection. The value changes whenever another
+        connection or process commits to the database, but not for the writer's own commits.
+        Returns:
+            int: Current data version, or None while this thread is inside a writer() block or
+                another thread holds the writer, i.e. while a write may be in flight.
+        """
+        if getattr(self._local, 'conn', None) is self.writer_conn:
+            return None
+        if not self._write_lock.acquire(blocking=False):
+            return None
+        try:
+            return self.writer_conn.execute('PRAGMA data_version').fetchone()[0]
+        finally:
+            self._write_lock.release()
+
+    def close(self):
+        """
+        Close every reader connection and the writer connection.
+        """
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self.writer_conn.close()
@@ -0,0 +1,300 @@
+"""
+instrumentation.py
+
+Runtime instrumentation for PersonalLibrary. While enabled, every public method of the library
+instance is wrapped to count calls and build a latency histogram, and an SQLite trace callback on
+every pooled connection records each statement. A statement is timed from its start to the next
+statement on the same thread or the end of the library call, so the time includes fetching its
+rows; a row factory on the connections counts the rows it returns, and total_changes the rows it
+writes. Statements slower than the threshold go to a bounded slow-query log; their EXPLAIN QUERY
+PLAN output is computed when the stats are read, off the hot path. When disabled, the library's
+methods and connections run untouched.
+"""
+import inspect
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+
+# Upper bounds, in milliseconds, of the latency histogram buckets; slower calls land in a last,
+# open-ended bucket.
+LATENCY_BUCKETS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000)
+
+# Statements at least this slow, in milliseconds, are logged with their query plan.
+SLOW_QUERY_MS = 50
+
+# Number of slow statements kept; the oldest are dropped first.
+SLOW_LOG_SIZE = 100
+
+# Longest SQL text kept per slow-query log entry.
+MAX_SQL_LENGTH = 1000
+
+# Library methods that are never wrapped.
+NOT_INSTRUMENTED = {'close', 'enable_instrumentation', 'disable_instrumentation'}
+
+# String and number literals, replaced by ? to group statements that differ only in values.
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Statements EXPLAIN QUERY PLAN can describe.
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+def statement_shape(sql):
+    """
+    Normalize a traced statement for aggregation.
+    Args:
+        sql (str): Statement text with its parameters expanded.
+    Returns:
+        str: The statement with literals replaced by ? and whitespace collapsed.
+    """
+    return ' '.join(LITERALS.sub('?', sql).split())
+
+
+def _bucket_labels():
+    labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS]
+    return labels + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+
+
+class _Timings:
+    """
+    Call count, latency histogram and row totals of one method or statement shape.
+    """
+    __slots__ = ('calls', 'errors', 'total', 'max', 'rows', 'changes', 'histogram')
+
+    def __init__(self):
+        self.calls = self.errors = self.rows = self.changes = 0
+        self.total = self.max = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, seconds, rows, error, changes=0):
+        ms = seconds * 1e3
+        self.calls += 1
+        self.errors += error
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.rows += rows
+        self.changes += changes
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def summary(self, changes=False):
+        summary = {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': self.total,
+            'mean_ms': self.total / self.calls if self.calls else 0.0,
+            'max_ms': self.max,
+            'rows': self.rows,
+            'histogram': dict(zip(_bucket_labels(), self.histogram)),
+        }
+        if changes:
+            summary['changes'] = self.changes
+        return summary
+
+
+def _result_rows(result):
+    """
+    Rows returned by a library call: the length of a list, else 1 for any value and 0 for None.
+    """
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+class Instrumentation:
+    """
+    Method timings, statement timings and slow-query log of one PersonalLibrary.
+    Use PersonalLibrary.enable_instrumentation() rather than attaching it directly.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_size=SLOW_LOG_SIZE):
+        """
+        Args:
+            slow_ms (float): Statements at least this slow, in milliseconds, are logged.
+            slow_log_size (int): Number of slow statements kept.
+        """
+        self.slow_ms = slow_ms
+        self._methods = defaultdict(_Timings)
+        self._statements = defaultdict(_Timings)
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._library = None
+        self._wrapped = []
+
+    def attach(self, library):
+        """
+        Wrap the public methods of a library instance and trace its connections.
+        """
+        self._library = library
+        for name, _ in inspect.getmembers(type(library), inspect.isfunction):
+            if name.startswith('_') or name.startswith('create_') or name in NOT_INSTRUMENTED:
+                continue
+            setattr(library, name, self._wrap(name, getattr(library, name)))
+            self._wrapped.append(name)
+        library.pool.set_trace_callback(self._tracer)
+        library.pool.set_row_factory(self._count_row)
+
+    def detach(self):
+        """
+        Restore the library's methods and remove the trace callbacks.
+        """
+        library = self._library
+        library.pool.set_trace_callback(None)
+        library.pool.set_row_factory(None)
+        for name in self._wrapped:
+            library.__dict__.pop(name, None)
+        self._wrapped = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _wrap(self, name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(name)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self._finish(name, start, 0, True)
+                raise
+            finally:
+                stack.pop()
+            if inspect.isgenerator(result):
+                return self._iterate(name, start, result)
+            self._finish(name, start, _result_rows(result), False)
+            return result
+        return wrapper
+
+    def _iterate(self, name, start, rows):
+        """
+        Pass a streamed result through, recording the call once the stream ends.
+        """
+        count, error = 0, False
+        try:
+            for row in rows:
+                count += 1
+                yield row
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._finish(name, start, count, error)
+
+    def _finish(self, name, start, rows, error):
+        now = time.perf_counter()
+        self._close_statement(now)
+        with self._lock:
+            self._methods[name].add(now - start, rows, error)
+
+    def _tracer(self, conn):
+        """
+        Build the trace callback of one connection.
+        """
+        def trace(sql):
+            # Statements run by triggers and virtual tables are reported with a '--' prefix;
+            # their time belongs to the statement that fired them.
+            if sql.startswith('--') or getattr(self._local, 'quiet', False):
+                return
+            now = time.perf_counter()
+            self._close_statement(now)
+            stack = self._stack()
+            self._local.statement = (sql, now, conn, conn.total_changes, stack[-1] if stack else None)
+            self._local.rows = 0
+        return trace
+
+    def _count_row(self, cursor, row):
+        """
+        Row factory counting the rows fetched on this thread for the statement running on it.
+        """
+        self._local.rows = getattr(self._local, 'rows', 0) + 1
+        return row
+
+    def _close_statement(self, now):
+        """
+        Record the statement running on this thread, if any, as ending at now.
+        """
+        current = getattr(self._local, 'statement', None)
+        if current is None:
+            return
+        self._local.statement = None
+        sql, start, conn, changes, method = current
+        seconds = now - start
+        changed = conn.total_changes - changes
+        rows = self._local.rows
+        with self._lock:
+            self._statements[statement_shape(sql)].add(seconds, rows, False, changed)
+            if seconds * 1e3 >= self.slow_ms:
+                self._slow.append({'sql': sql[:MAX_SQL_LENGTH], 'method': method, 'ms': seconds * 1e3,
+                                   'rows': rows, 'changes': changed, 'at': time.time(), 'plan': None})
+
+    def _explain(self, sql):
+        """
+        Returns:
+            list: EXPLAIN QUERY PLAN detail lines, indented by depth.
+        """
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        self._local.quiet = True
+        try:
+            with self._library.pool.reader() as conn:
+                rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+        except Exception as e:
+            return [f'unavailable: {e}']
+        finally:
+            self._local.quiet = False
+        depth = {0: 0}
+        plan = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, 0) + 1
+            plan.append('  ' * (depth[node] - 1) + detail)
+        return plan
+
+    def slow_queries(self):
+        """
+        Returns:
+            list: Slow-query log entries, oldest first: sql, method, ms, rows (returned), changes
+                (rows written), at (epoch seconds) and plan (EXPLAIN QUERY PLAN lines).
+        """
+        with self._lock:
+            entries = list(self._slow)
+        for entry in entries:
+            if entry['plan'] is None:
+                entry['plan'] = self._explain(entry['sql'])
+        return [dict(entry) for entry in entries]
+
+    def stats(self):
+        """
+        Returns:
+            dict: slow_ms; methods {name: calls, errors, total/mean/max_ms, rows returned,
+                histogram}; statements {normalized sql: the same, plus changes (rows written)};
+                slow_queries (see slow_queries()).
+        """
+        slow = self.slow_queries()
+        with self._lock:
+            return {
+                'slow_ms': self.slow_ms,
+                'methods': {name: t.summary() for name, t in sorted(self._methods.items())},
+                'statements': {sql: t.summary(changes=True) for sql, t in
+                               sorted(self._statements.items(), key=lambda item: -item[1].total)},
+                'slow_queries': slow,
+            }
+
+    def reset(self):
+        """
+        Drop every recorded timing and slow query.
+        """
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self._slow.clear()
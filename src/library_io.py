@@ -0,0 +1,436 @@
+"""
+library_io.py
+
+File formats for PersonalLibrary export/import: JSON, newline-delimited JSON, Excel workbooks and
+compressed, checksummed database snapshots. Only the standard library and openpyxl are needed. PersonalLibrary imports this module on first
+use of an export/import method, and openpyxl is imported only when a workbook is touched, so
+neither costs anything at application start-up. pandas is used only as a fallback reader for
+legacy binary .xls workbooks, when it happens to be installed.
+"""
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import shutil
+import zipfile
+from functools import partial
+from itertools import chain
+
+# Workbook sheet name for each table, in the order sheets are written.
+SHEETS = (('Books', 'books'), ('Lendors', 'lendors'), ('Borrowed', 'borrowed'))
+
+# Rows written between progress reports while streaming a table out.
+PROGRESS_INTERVAL = 1000
+
+# Snapshot compressions and the functions that open a compressed file. gzip runs at level 6,
+# several times faster than its default of 9 for a few percent larger files; lzma keeps its
+# default preset, for the smallest (and slowest) snapshots.
+SNAPSHOT_COMPRESSIONS = {None: open, 'gzip': partial(gzip.open, compresslevel=6), 'lzma': lzma.open}
+
+# Leading bytes of each compressed snapshot format, used to detect it on restore.
+SNAPSHOT_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'\xfd7zXZ\x00', 'lzma'))
+
+# Suffix of the sha256sum-style checksum file written next to a snapshot.
+CHECKSUM_SUFFIX = '.sha256'
+
+# Bytes read per chunk when hashing or (de)compressing a snapshot.
+COPY_CHUNK = 1 << 20
+
+
+def _stream(table, rows, progress):
+    """
+    Yield rows while reporting progress(table, count, done) every PROGRESS_INTERVAL rows
+    and once more when the table is finished.
+    """
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if progress and count % PROGRESS_INTERVAL == 0:
+            progress(table, count, False)
+    if progress:
+        progress(table, count, True)
+
+
+def record_rows(records, columns):
+    """
+    Lazily convert record dicts into tuples in column order.
+    Args:
+        records (iterable): Dicts keyed by column name.
+        columns (tuple): Column names in insert order.
+    Yields:
+        tuple: Column values for each record.
+    """
+    for record in records:
+        yield tuple(record[c] for c in columns)
+
+
+def read_ndjson_record(line):
+    """
+    Parse one NDJSON line into a (table, record) pair.
+    Args:
+        line (str): A single line of the file.
+    Returns:
+        tuple: (table, record dict), or None if the line is not a table-tagged JSON object.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or 'table' not in record:
+        return None
+    return record.pop('table'), record
+
+
+def read_ndjson(first_line, f):
+    """
+    Lazily yield (table, record) pairs from an NDJSON file, skipping blank lines.
+    Args:
+        first_line (str): Line already consumed from f.
+        f (file): Open text file positioned after first_line.
+    Yields:
+        tuple: (table, record dict) for each line.
+    """
+    for line in chain((first_line,), f):
+        if not line.strip():
+            continue
+        item = read_ndjson_record(line)
+        if item is None:
+            raise ValueError(f"Invalid NDJSON record: {line[:80]!r}")
+        yield item
+
+
+def write_json(file_path, tables, progress=None):
+    """
+    Write tables to a single JSON object of {table: [record, ...]}.
+    Args:
+        file_path (str): Path to save the JSON file.
+        tables (iterable): (table, columns, rows) triples.
+        progress (callable): Optional progress(table, rows, done) callback.
+    """
+    data = {}
+    for table, columns, rows in tables:
+        data[table] = [dict(zip(columns, row)) for row in _stream(table, rows, progress)]
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def write_ndjson(file_path, tables, progress=None):
+    """
+    Stream tables to a newline-delimited JSON file, one record per line tagged with its table.
+    Args:
+        file_path (str): Path to save the NDJSON file.
+        tables (iterable): (table, columns, rows) triples.
+        progress (callable): Optional progress(table, rows, done) callback.
+    """
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for table, columns, rows in tables:
+            for row in _stream(table, rows, progress):
+                record = {'table': table}
+                record.update(zip(columns, row))
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+
+
+def write_changes(file_path, header, tables, deletes, progress=None):
+    """
+    Write a delta file: a header line, then one NDJSON line per upserted row and one per
+    deleted row ID.
+    Args:
+        file_path (str): Path to save the delta file.
+        header (dict): Watermarks of the delta, written as {"changes": header}.
+        tables (iterable): (table, columns, rows) triples of rows to upsert.
+        deletes (iterable): (table, row ID) pairs of deleted rows.
+        progress (callable): Optional progress(table, rows, done) callback.
+    """
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'changes': header}))
+        f.write('\n')
+        for table, columns, rows in tables:
+            for row in _stream(table, rows, progress):
+                record = {'table': table, 'op': 'upsert'}
+                record.update(zip(columns, row))
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+        for table, row_id in deletes:
+            f.write(json.dumps({'table': table, 'op': 'delete', 'id': row_id}))
+            f.write('\n')
+
+
+def read_changes(f):
+    """
+    Read the header of a delta file written by write_changes.
+    Args:
+        f (file): Open text file positioned at the start.
+    Returns:
+        tuple: (header dict, iterator of (table, op, record dict) for the remaining lines).
+    Raises:
+        ValueError: If the file does not start with a delta header.
+    """
+    try:
+        header = json.loads(f.readline()).get('changes')
+    except (ValueError, AttributeError):
+        header = None
+    if not isinstance(header, dict):
+        raise ValueError('Not a change file')
+
+    def records():
+        for line in f:
+            if not line.strip():
+                continue
+            item = read_ndjson_record(line)
+            if item is None or 'op' not in item[1]:
+                raise ValueError(f"Invalid change record: {line[:80]!r}")
+            table, record = item
+            yield table, record.pop('op'), record
+    return header, records()
+
+
+def write_excel(file_path, tables, progress=None, row_counts=None):
+    """
+    Stream tables into an Excel workbook, one sheet per table with a header row.
+    The workbook is always written in the xlsx format, whatever the file extension.
+    Args:
+        file_path (str): Path to save the workbook.
+        tables (iterable): (table, columns, rows) triples.
+        progress (callable): Optional progress(table, rows, done) callback.
+        row_counts (dict): Optional number of rows of each table, recorded as the sheet's size.
+            Without it, openpyxl reads every sheet in full to size it when the workbook is opened.
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    sheet_names = {table: sheet for sheet, table in SHEETS}
+    workbook = Workbook(write_only=True)
+    for table, columns, rows in tables:
+        sheet = workbook.create_sheet(sheet_names.get(table, table))
+        if row_counts and table in row_counts:
+            # Write-only sheets stream out before their size is known; openpyxl writes the
+            # <dimension> element only for sheets that can calculate it.
+            ref = f'A1:{get_column_letter(len(columns))}{row_counts[table] + 1}'
+            sheet.calculate_dimension = lambda ref=ref: ref
+        sheet.append(list(columns))
+        for row in _stream(table, rows, progress):
+            sheet.append(row)
+    workbook.save(file_path)
+
+
+class ExcelReader:
+    """
+    Read-only access to the sheets of an Excel workbook.
+    xlsx workbooks are streamed with openpyxl. Legacy binary .xls workbooks are read with
+    pandas, which must then be installed together with xlrd.
+    """
+
+    def __init__(self, file_path):
+        """
+        Open the workbook.
+        Args:
+            file_path (str): Path to the workbook.
+        """
+        self._workbook = None
+        self._frames = None
+        if zipfile.is_zipfile(file_path):
+            from openpyxl import load_workbook
+            # Pass a file object so openpyxl does not reject xlsx content saved as .xls.
+            self._file = open(file_path, 'rb')
+            self._workbook = load_workbook(self._file, read_only=True, data_only=True)
+            self.sheet_names = self._workbook.sheetnames
+        else:
+            try:
+                import pandas as pd
+            except ImportError:
+                raise ValueError('Legacy .xls workbooks can only be read when pandas and xlrd are installed')
+            self._file = None
+            self._frames = pd.read_excel(file_path, sheet_name=None, dtype=object)
+            self.sheet_names = list(self._frames)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def rows(self, sheet, columns):
+        """
+        Lazily yield the rows of a sheet as tuples in the given column order.
+        Empty rows are skipped and empty cells are returned as None.
+        Args:
+            sheet (str): Sheet name.
+            columns (tuple): Column names to pick, matched against the header row.
+        Yields:
+            tuple: Values of the requested columns.
+        Raises:
+            KeyError: If a requested column is missing from the header row.
+        """
+        if self._frames is not None:
+            df = self._frames[sheet]
+            values = df.where(df.notna(), None)
+            records = values.to_dict(orient='records')
+            yield from record_rows(records, columns)
+            return
+        worksheet = self._workbook[sheet]
+        # Read to the last row, whatever size the sheet records; it may be stale.
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        positions = {name: i for i, name in enumerate(header) if name is not None}
+        indexes = [positions[c] for c in columns]
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            yield tuple(row[i] if i < len(row) else None for i in indexes)
+
+    def close(self):
+        """
+        Release the workbook and its file handle.
+        """
+        if self._workbook is not None:
+            self._workbook.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def read_sheet_columns(file_path, sheet, columns):
+    """
+    Parse one sheet of a workbook into column lists. Runs in a ParallelExcelReader worker
+    process; columns pickle into far fewer objects than one tuple per row.
+    Args:
+        file_path (str): Path to the workbook.
+        sheet (str): Sheet name.
+        columns (tuple): Column names to pick, matched against the header row.
+    Returns:
+        list: One list of values per column, or None if the workbook has no such sheet.
+    Raises:
+        KeyError: If a requested column is missing from the header row.
+    """
+    with ExcelReader(file_path) as workbook:
+        if sheet not in workbook.sheet_names:
+            return None
+        rows = list(workbook.rows(sheet, columns))
+    if not rows:
+        return [[] for _ in columns]
+    return [list(values) for values in zip(*rows)]
+
+
+class ParallelExcelReader:
+    """
+    Parse the sheets of an Excel workbook in parallel, one worker process per sheet.
+    Parsing is pure Python and CPU-bound, so threads would not overlap it. Workers start as soon
+    as the reader is created; sources() hands the parsed tables back in SHEETS order, which is
+    foreign-key order, so a single writer can load each table while later sheets are still
+    being parsed. Unlike ExcelReader, every parsed sheet is held in memory until it is loaded.
+    """
+
+    def __init__(self, file_path, tables, max_workers=None):
+        """
+        Start parsing the workbook.
+        Args:
+            file_path (str): Path to the workbook.
+            tables (dict): Column names to read for each table, keyed by table name.
+            max_workers (int): Sheets parsed at the same time; defaults to, and is capped at,
+                one per sheet.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        sheets = [(sheet, table) for sheet, table in SHEETS if table in tables]
+        # Spawned workers start from a clean interpreter instead of a fork of a process that
+        # holds SQLite connections and threads.
+        self._executor = ProcessPoolExecutor(max_workers=min(max_workers or len(sheets), len(sheets)) or 1,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._futures = [(table, self._executor.submit(read_sheet_columns, file_path, sheet, tables[table]))
+                         for sheet, table in sheets]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sources(self):
+        """
+        Yield each parsed table as soon as it and every table before it are ready.
+        Sheets missing from the workbook are skipped.
+        Yields:
+            tuple: (table, rows), rows being an iterator of tuples in column order.
+        Raises:
+            Exception: Whatever a worker raised while parsing, e.g. KeyError for a missing column.
+        """
+        while self._futures:
+            table, future = self._futures.pop(0)
+            columns = future.result()
+            if columns is not None:
+                yield table, zip(*columns)
+
+    def close(self):
+        """
+        Shut the workers down. Sheets not yet started are cancelled; a sheet still being parsed
+        after a failed load finishes in the background and is discarded.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def file_sha256(file_path):
+    """
+    Returns:
+        str: Hex SHA-256 digest of the file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_snapshot_file(database_path, file_path, compression=None):
+    """
+    Move a backed-up database file to file_path, compressing it on the way, and write the
+    checksum file next to it.
+    Args:
+        database_path (str): Database file written by the backup; removed afterwards.
+        file_path (str): Snapshot path.
+        compression (str): None, 'gzip' or 'lzma'.
+    Returns:
+        str: Hex SHA-256 digest of the snapshot file.
+    """
+    if compression not in SNAPSHOT_COMPRESSIONS:
+        raise ValueError(f"compression must be one of {', '.join(str(c) for c in SNAPSHOT_COMPRESSIONS)}")
+    if compression is None:
+        os.replace(database_path, file_path)
+    else:
+        part_path = file_path + '.part'
+        with open(database_path, 'rb') as src, SNAPSHOT_COMPRESSIONS[compression](part_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+        os.replace(part_path, file_path)
+        os.remove(database_path)
+    checksum = file_sha256(file_path)
+    with open(file_path + CHECKSUM_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write(f'{checksum}  {os.path.basename(file_path)}\n')
+    return checksum
+
+
+def read_snapshot_file(file_path, database_path, verify=True):
+    """
+    Verify a snapshot against its checksum file and write the decompressed database to
+    database_path. The compression is detected from the file's leading bytes.
+    Args:
+        file_path (str): Snapshot path.
+        database_path (str): Where to write the plain database file.
+        verify (bool): Compare the snapshot with its checksum file, if there is one.
+    Returns:
+        str: The detected compression (None, 'gzip' or 'lzma').
+    Raises:
+        ValueError: If the checksum does not match.
+    """
+    checksum_path = file_path + CHECKSUM_SUFFIX
+    if verify and os.path.exists(checksum_path):
+        with open(checksum_path, 'r', encoding='utf-8') as f:
+            expected = f.read().split()[0].lower()
+        if file_sha256(file_path) != expected:
+            raise ValueError(f'Checksum mismatch for {file_path}')
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+    compression = next((name for magic, name in SNAPSHOT_MAGIC if head.startswith(magic)), None)
+    with SNAPSHOT_COMPRESSIONS[compression](file_path, 'rb') as src, open(database_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+    return compression
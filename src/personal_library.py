@@ -4,84 +4,341 @@ personal_library.py
 Backend logic for PersonalLibrary Kivy app. Implements book and lender management, borrowing/returning,
 and queries for book/lender details using SQLite.
 """
+import json
+import os
+import re
 import sqlite3
+import tempfile
+import time
+import unicodedata
+from collections import namedtuple
+from hashlib import blake2b
 from datetime import datetime
-import pandas as pd
+from itertools import chain, groupby, islice
+from src.availability import AvailabilityIndex
+from src.connection_pool import BUSY_TIMEOUT, MAX_READERS, ConnectionPool
+from src.instrumentation import SLOW_QUERY_MS, Instrumentation
+from src.query_cache import QueryCache, cached, invalidates
+
+# Columns written by the import paths, in insert order.
+TABLE_COLUMNS = {
+    'books': ('id', 'title', 'author', 'added_date'),
+    'lendors': ('id', 'name', 'address', 'mobile'),
+    'borrowed': ('id', 'lendor_id', 'book_id', 'returned'),
+}
+
+# Columns of a book row as returned by the read methods; books.title_id is internal.
+BOOK_COLUMNS = ', '.join(TABLE_COLUMNS['books'])
+
+# Rows sent to executemany per call during a bulk load.
+BULK_CHUNK_SIZE = 5000
+
+# Rows held in memory per batch while streaming an NDJSON import.
+NDJSON_BATCH_SIZE = 1000
+
+# Default page size for the keyset-paginated queries.
+PAGE_SIZE = 100
+
+# Database pages copied per step of a snapshot or restore; other threads run between steps.
+SNAPSHOT_PAGES = 1024
+
+# Secondary indexes on the borrowed table. returned = 1 marks an active loan, so the
+# partial unique index guarantees at most one active loan per book.
+SECONDARY_INDEXES = (
+    ('idx_borrowed_book_returned',
+     'CREATE INDEX IF NOT EXISTS idx_borrowed_book_returned ON borrowed (book_id, returned)'),
+    ('idx_borrowed_active_book',
+     'CREATE UNIQUE INDEX IF NOT EXISTS idx_borrowed_active_book ON borrowed (book_id) WHERE returned = 1'),
+)
+
+# Marks all but the newest active loan of each book as returned. Databases and import files from
+# before the one-active-loan index can hold several active loans of a book, which the index rejects.
+CLOSE_DUPLICATE_LOANS = '''UPDATE {table} SET returned = 0
+    WHERE returned = 1 AND id NOT IN (SELECT MAX(id) FROM {table} WHERE returned = 1 GROUP BY book_id)'''
+
+# Titles catalog: one row per distinct title and author, with title_key() as its id. Every book
+# row is a copy whose title_id is that same key, so a book is linked to its title without a
+# lookup and copies of a title are an index seek away. Rows inserted into books from other
+# connections are linked the next time the library is opened or loads data.
+TITLES_TABLE = '''CREATE TABLE IF NOT EXISTS titles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL
+)'''
+TITLE_INDEXES = (
+    ('idx_books_title', 'CREATE INDEX IF NOT EXISTS idx_books_title ON books (title_id)'),
+)
+
+# Bulk-load insert of a book row in TABLE_COLUMNS order, linked to its title on the way in.
+BULK_BOOK_INSERT = (f"INSERT INTO books ({', '.join(TABLE_COLUMNS['books'])}, title_id) "
+                    f"VALUES (?1, ?2, ?3, ?4, title_key(?2, ?3))")
+
+# Words of an ASCII title or author, underscores excluded.
+TITLE_WORD = re.compile(r'[^\W_]+')
+
+# Diacritics dropped when comparing titles: the combining diacritical mark blocks. Other marks,
+# such as Indic vowel signs, stay part of the word.
+DIACRITICS = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+
+# Full-text index over book titles and authors. It is an external-content FTS5 table, so the
+# text lives only in books; the triggers keep the index in step with every books write.
+SEARCH_TABLE = '''CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, author, content='books', content_rowid='id', prefix='2 3 4', tokenize='unicode61 remove_diacritics 2'
+)'''
+SEARCH_TRIGGERS = (
+    ('books_fts_insert', '''CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+    END'''),
+    ('books_fts_delete', '''CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END'''),
+    ('books_fts_update', '''CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF id, title, author ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+    END'''),
+)
+
+# Per-book borrow counts, kept in step with books and borrowed by triggers so the most/least
+# borrowed queries read an index instead of grouping the whole loan history. A new book picks
+# up any loans already recorded against its id.
+CIRCULATION_TABLE = '''CREATE TABLE IF NOT EXISTS book_circulation (
+    book_id INTEGER PRIMARY KEY,
+    borrow_count INTEGER NOT NULL DEFAULT 0
+)'''
+CIRCULATION_INDEXES = (
+    ('idx_circulation_most',
+     'CREATE INDEX IF NOT EXISTS idx_circulation_most ON book_circulation (borrow_count DESC, book_id)'),
+    ('idx_circulation_least',
+     'CREATE INDEX IF NOT EXISTS idx_circulation_least ON book_circulation (borrow_count, book_id)'),
+)
+CIRCULATION_TRIGGERS = (
+    ('circulation_book_insert', '''CREATE TRIGGER IF NOT EXISTS circulation_book_insert AFTER INSERT ON books BEGIN
+        INSERT OR REPLACE INTO book_circulation (book_id, borrow_count)
+        VALUES (new.id, (SELECT COUNT(*) FROM borrowed WHERE book_id = new.id));
+    END'''),
+    ('circulation_book_delete', '''CREATE TRIGGER IF NOT EXISTS circulation_book_delete AFTER DELETE ON books BEGIN
+        DELETE FROM book_circulation WHERE book_id = old.id;
+    END'''),
+    ('circulation_book_update', '''CREATE TRIGGER IF NOT EXISTS circulation_book_update AFTER UPDATE OF id ON books BEGIN
+        DELETE FROM book_circulation WHERE book_id = old.id;
+        INSERT OR REPLACE INTO book_circulation (book_id, borrow_count)
+        VALUES (new.id, (SELECT COUNT(*) FROM borrowed WHERE book_id = new.id));
+    END'''),
+    ('circulation_loan_insert', '''CREATE TRIGGER IF NOT EXISTS circulation_loan_insert AFTER INSERT ON borrowed BEGIN
+        UPDATE book_circulation SET borrow_count = borrow_count + 1 WHERE book_id = new.book_id;
+    END'''),
+    ('circulation_loan_delete', '''CREATE TRIGGER IF NOT EXISTS circulation_loan_delete AFTER DELETE ON borrowed BEGIN
+        UPDATE book_circulation SET borrow_count = borrow_count - 1 WHERE book_id = old.book_id;
+    END'''),
+    ('circulation_loan_update', '''CREATE TRIGGER IF NOT EXISTS circulation_loan_update AFTER UPDATE OF book_id ON borrowed BEGIN
+        UPDATE book_circulation SET borrow_count = borrow_count - 1 WHERE book_id = old.book_id;
+        UPDATE book_circulation SET borrow_count = borrow_count + 1 WHERE book_id = new.book_id;
+    END'''),
+)
+CIRCULATION_REBUILD = '''INSERT INTO book_circulation (book_id, borrow_count)
+    SELECT b.id, COUNT(br.id) FROM books b LEFT JOIN borrowed br ON br.book_id = b.id GROUP BY b.id'''
+
+# Change log for incremental backups. Triggers append one entry per inserted, updated or deleted
+# row; the seq watermark only ever grows. A bulk load or clear replaces the log with a single
+# 'reload' entry, since every row changed.
+CHANGE_LOG_TABLE = '''CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT,
+    op TEXT NOT NULL,
+    row_id INTEGER
+)'''
+CHANGE_TRIGGERS = tuple(
+    (f'changes_{table}_{op}', f'''CREATE TRIGGER IF NOT EXISTS changes_{table}_{op} AFTER {op.upper()} ON {table} BEGIN
+        {body.format(table=table)}
+    END''')
+    for table in TABLE_COLUMNS
+    for op, body in (
+        ('insert', "INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'insert', new.id);"),
+        ('update', "INSERT INTO change_log (table_name, op, row_id) SELECT '{table}', 'delete', old.id "
+                   "WHERE old.id IS NOT new.id;\n"
+                   "        INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'update', new.id);"),
+        ('delete', "INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'delete', old.id);"),
+    )
+)
+
+# Relative bm25 weights of the title and author columns when ranking search results.
+SEARCH_WEIGHTS = (2.0, 1.0)
+
+# Maximum number of matches scored per search before the best ones are returned.
+SEARCH_CANDIDATES = 1000
+
+# Result of the batch write methods: ids in input order (None where an item failed) and
+# (index, error message) pairs for the failed items.
+BatchResult = namedtuple('BatchResult', ['ids', 'errors'])
+
+
+def normalize_title(text):
+    """
+    Normalize a title or author for comparison: case, accents, punctuation and spacing are
+    ignored, so "Bobby Fischer Teaches Chess" and "bobby fischer teaches chess." match.
+    Args:
+        text (str): Title or author.
+    Returns:
+        str: Lower-case words separated by single spaces.
+    """
+    text = str(text)
+    if text.isascii():
+        return ' '.join(TITLE_WORD.findall(text.lower()))
+    text = DIACRITICS.sub('', unicodedata.normalize('NFKD', text)).casefold()
+    return ' '.join(''.join(c if c.isalnum() or unicodedata.category(c).startswith('M') else ' '
+                            for c in text).split())
+
+
+def title_key(title, author):
+    """
+    Hash key of a title for duplicate detection.
+    Args:
+        title (str): Book title.
+        author (str): Book author.
+    Returns:
+        int: Signed 64-bit BLAKE2b hash of the normalized title and author.
+    """
+    text = f'{normalize_title(title)}\x1f{normalize_title(author)}'
+    return int.from_bytes(blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+def search_match_expression(query):
+    """
+    Build an FTS5 MATCH expression that prefix-matches every word of the query.
+    Args:
+        query (str): Free text typed by the user.
+    Returns:
+        str: MATCH expression, or None if the query has no words.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
 
 
 class PersonalLibrary:
-    def export_to_json(self, file_path):
+    def export_to_json(self, file_path, progress=None):
         """
         Export all tables to a single JSON file.
+        Args:
+            file_path (str): Path to save the JSON file.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
+        Returns:
+            str: Success message or error.
         """
         try:
-            with self.conn:
-                books_df = pd.read_sql_query('SELECT * FROM books', self.conn)
-                lendors_df = pd.read_sql_query('SELECT * FROM lendors', self.conn)
-                borrowed_df = pd.read_sql_query('SELECT * FROM borrowed', self.conn)
-            data = {
-                'books': books_df.to_dict(orient='records'),
-                'lendors': lendors_df.to_dict(orient='records'),
-                'borrowed': borrowed_df.to_dict(orient='records')
-            }
-            import json
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            from src import library_io
+            with self.pool.reader() as conn:
+                library_io.write_json(file_path, self._table_rows(conn), progress)
             return f"Exported to {file_path} as JSON."
         except Exception as e:
             return f"Export failed: {e}"
 
-    def import_from_json(self, file_path):
+    def export_to_ndjson(self, file_path, progress=None):
+        """
+        Export all tables to a newline-delimited JSON file, one record per line tagged
+        with its table. Rows are streamed from the cursor, so memory use does not grow
+        with the size of the library.
+        Args:
+            file_path (str): Path to save the NDJSON file.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
+        Returns:
+            str: Success message or error.
+        """
+        try:
+            from src import library_io
+            with self.pool.reader() as conn:
+                library_io.write_ndjson(file_path, self._table_rows(conn), progress)
+            return f"Exported to {file_path} as NDJSON."
+        except Exception as e:
+            return f"Export failed: {e}"
+
+    def import_from_json(self, file_path, batch_size=NDJSON_BATCH_SIZE, progress=None, mode='replace',
+                         dry_run=False):
         """
-        Import all tables from a single JSON file.
+        Import all tables from a JSON file and overwrite existing tables.
+        Accepts both the export_to_json layout and the newline-delimited layout written
+        by export_to_ndjson. NDJSON files are read incrementally and inserted in batches
+        of batch_size rows, so peak memory stays constant regardless of file size.
+        Args:
+            file_path (str): Path to the JSON or NDJSON file.
+            batch_size (int): Rows inserted per batch when streaming NDJSON.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
+            mode (str): 'replace' reloads every table; 'merge' writes only the rows that differ
+                (see merge_load).
+            dry_run (bool): In merge mode, only compute the summary in self.last_import_stats.
+        Returns:
+            str: Success message or error.
         """
         try:
-            import json
+            load = self._import_loader(mode, dry_run)
+            from src import library_io
             with open(file_path, 'r', encoding='utf-8') as f:
+                first_line = f.readline()
+                if library_io.read_ndjson_record(first_line) is not None:
+                    records = library_io.read_ndjson(first_line, f)
+                    sources = ((table, library_io.record_rows((record for _, record in group), TABLE_COLUMNS[table]))
+                               for table, group in groupby(records, key=lambda item: item[0]))
+                    load(sources, chunk_size=batch_size, progress=progress)
+                    return self._import_message('JSON')
+                f.seek(0)
                 data = json.load(f)
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM books')
-            cursor.execute('DELETE FROM lendors')
-            cursor.execute('DELETE FROM borrowed')
-            self.conn.commit()
-            for row in data.get('books', []):
-                cursor.execute('INSERT INTO books (id, title, author, added_date) VALUES (?, ?, ?, ?)',
-                               (row['id'], row['title'], row['author'], row['added_date']))
-            for row in data.get('lendors', []):
-                cursor.execute('INSERT INTO lendors (id, name, address, mobile) VALUES (?, ?, ?, ?)',
-                               (row['id'], row['name'], row['address'], row['mobile']))
-            for row in data.get('borrowed', []):
-                cursor.execute('INSERT INTO borrowed (id, lendor_id, book_id, returned) VALUES (?, ?, ?, ?)',
-                               (row['id'], row['lendor_id'], row['book_id'], row['returned']))
-            self.conn.commit()
-            return "Data imported from JSON and tables overwritten."
+            sources = [(table, library_io.record_rows(data.get(table, []), columns))
+                       for table, columns in TABLE_COLUMNS.items()]
+            load(sources, progress=progress)
+            return self._import_message('JSON')
         except Exception as e:
             return f"Error importing from JSON: {e}"
     """
     PersonalLibrary manages books, lenders, and borrowing/returning operations using SQLite.
     """
     
-    def export_to_excel(self, file_path):
+    def export_to_excel(self, file_path, progress=None):
         """
         Export all tables (books, lendors, borrowed) to an Excel file at the given path.
         Args:
             file_path (str): Path to save the Excel file.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
         Returns:
             str: Success message or error.
         """
         try:
-            with self.conn:
-                books_df = pd.read_sql_query('SELECT * FROM books', self.conn)
-                lendors_df = pd.read_sql_query('SELECT * FROM lendors', self.conn)
-                borrowed_df = pd.read_sql_query('SELECT * FROM borrowed', self.conn)
-            with pd.ExcelWriter(file_path) as writer:
-                books_df.to_excel(writer, sheet_name='Books', index=False)
-                lendors_df.to_excel(writer, sheet_name='Lendors', index=False)
-                borrowed_df.to_excel(writer, sheet_name='Borrowed', index=False)
+            from src import library_io
+            with self.pool.reader() as conn:
+                began = not conn.in_transaction
+                if began:
+                    # One read transaction, so the recorded sheet sizes match the rows written.
+                    conn.execute('BEGIN')
+                try:
+                    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                              for table in TABLE_COLUMNS}
+                    library_io.write_excel(file_path, self._table_rows(conn), progress, counts)
+                finally:
+                    if began:
+                        conn.commit()
             return f"Exported to {file_path}"
         except Exception as e:
             return f"Export failed: {e}"
 
+    def _table_rows(self, conn, tables=TABLE_COLUMNS):
+        """
+        Lazily yield (table, columns, cursor) for every table, streaming rows in ID order.
+        Args:
+            conn (sqlite3.Connection): Connection to read from.
+            tables (iterable): Table names to read.
+        Yields:
+            tuple: (table, column names, cursor over the rows).
+        """
+        for table in tables:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} ORDER BY id")
+            yield table, [d[0] for d in cursor.description], cursor
+
+    @cached('books')
     def get_book_details(self, book_id):
         """
         Get details of a book by its ID.
@@ -90,10 +347,12 @@ class PersonalLibrary:
         Returns:
             tuple: Book details (id, title, author, added_date) or None.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM books WHERE id = ?', (book_id,))
-        return cursor.fetchone()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {BOOK_COLUMNS} FROM books WHERE id = ?', (book_id,))
+            return cursor.fetchone()
 
+    @cached('lendors')
     def get_lendor_details(self, lendor_id):
         """
         Get details of a lender by ID.
@@ -102,39 +361,65 @@ class PersonalLibrary:
         Returns:
             tuple: Lender details (id, name, address, mobile) or None.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM lendors WHERE id = ?', (lendor_id,))
-        return cursor.fetchone()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM lendors WHERE id = ?', (lendor_id,))
+            return cursor.fetchone()
 
+    @cached('lendors')
     def get_all_lendors(self):
         """
         Get all lenders in the library.
         Returns:
             list: List of all lenders.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM lendors')
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM lendors')
+            return cursor.fetchall()
 
-    def __init__(self, db_name='library.db'):
+    def __init__(self, db_name='library.db', max_readers=MAX_READERS, busy_timeout=BUSY_TIMEOUT, cache_size=0):
         """
         Initialize the PersonalLibrary with a SQLite database.
-        Creates tables if they do not exist.
+        Creates tables if they do not exist. Writes go through a single writer connection
+        (self.conn) and reads through a pool of read-only connections, so any thread may
+        call the library.
+        Args:
+            db_name (str): Path of the SQLite database.
+            max_readers (int): Maximum number of read-only connections.
+            busy_timeout (float): Seconds to wait on a locked database before failing.
+            cache_size (int): Number of read results kept in self.cache; 0 disables caching.
         """
         self.db_name = db_name
-        self.conn = sqlite3.connect(self.db_name)
+        self.pool = ConnectionPool(db_name, max_readers, busy_timeout)
+        self.conn = self.pool.writer_conn
+        self.last_import_stats = None
+        self.cache = QueryCache(cache_size) if cache_size > 0 else None
+        self.availability = AvailabilityIndex()
+        self.instrumentation = None
+        self.conn.create_function('title_key', 2, title_key, deterministic=True)
         self.create_tables()
 
     def create_tables(self):
         """
         Create the books, lendors, and borrowed tables if they do not exist.
         """
-        cursor = self.conn.cursor()
+        with self.pool.writer() as conn:
+            self.create_schema(conn.cursor())
+            conn.commit()
+
+    def create_schema(self, cursor):
+        """
+        Create every table, index and trigger of the schema if they do not exist.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        """
         cursor.execute('''CREATE TABLE IF NOT EXISTS books (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT NOT NULL,
             author TEXT NOT NULL,
-            added_date TEXT NOT NULL
+            added_date TEXT NOT NULL,
+            title_id INTEGER REFERENCES titles(id)
         )''')
         cursor.execute('''CREATE TABLE IF NOT EXISTS lendors (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -150,34 +435,200 @@ class PersonalLibrary:
             FOREIGN KEY(lendor_id) REFERENCES lendors(id),
             FOREIGN KEY(book_id) REFERENCES books(id)
         )''')
-        self.conn.commit()
+        self.create_indexes(cursor)
+        self.create_search_index(cursor)
+        self.create_circulation_counters(cursor)
+        self.create_change_log(cursor)
+        self.create_titles(cursor)
+
+    def create_indexes(self, cursor):
+        """
+        Create the secondary indexes on the borrowed table if they do not exist.
+        Before the one-active-loan index is created, on a database from an older version or
+        after a bulk load, all but the newest active loan of each book are marked returned.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        Returns:
+            int: Loans marked returned.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_borrowed_active_book'")
+        closed = 0
+        if cursor.fetchone() is None:
+            cursor.execute(CLOSE_DUPLICATE_LOANS.format(table='borrowed'))
+            closed = cursor.rowcount
+        for _, ddl in SECONDARY_INDEXES:
+            cursor.execute(ddl)
+        return closed
 
-    def add_book(self, title, author):
+    def create_titles(self, cursor):
         """
-        Add a new book to the library.
+        Create the titles table and the books.title_id index if they do not exist, adding the
+        title_id column to books created by older versions, and link any unlinked books.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        """
+        cursor.execute(TITLES_TABLE)
+        cursor.execute('PRAGMA table_info(books)')
+        if 'title_id' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE books ADD COLUMN title_id INTEGER REFERENCES titles(id)')
+        for _, ddl in TITLE_INDEXES:
+            cursor.execute(ddl)
+        self._link_titles(cursor, prune=False)
+
+    def _link_titles(self, cursor, prune=True):
+        """
+        Point every book without a title_id at its title, creating missing titles. The change log entries written by the relinking are removed, since
+        title_id is derived data that every library computes for itself.
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the writer connection.
+            prune (bool): Also delete titles left without copies.
+        Returns:
+            dict: titles created, books linked and duplicates (linked books whose title
+                already existed or was created by a lower-ID copy).
+        """
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+        seq = cursor.fetchone()[0]
+        cursor.execute('UPDATE books SET title_id = title_key(title, author) WHERE title_id IS NULL')
+        linked = cursor.rowcount
+        created = self._add_titles(cursor) if linked else 0
+        if linked:
+            cursor.execute("DELETE FROM change_log WHERE seq > ? AND table_name = 'books' AND op = 'update'", (seq,))
+        if prune:
+            cursor.execute('DELETE FROM titles WHERE NOT EXISTS (SELECT 1 FROM books WHERE books.title_id = titles.id)')
+        return {'titles': created, 'linked': linked, 'duplicates': linked - created}
+
+    def _add_titles(self, cursor):
+        """
+        Create the titles of linked books that have none, from each title's lowest-ID copy.
+        Returns:
+            int: Number of titles created.
+        """
+        cursor.execute('''INSERT OR IGNORE INTO titles (id, title, author)
+                          SELECT b.title_id, b.title, b.author FROM books b
+                          WHERE b.title_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM titles t WHERE t.id = b.title_id)
+                          ORDER BY b.id''')
+        return cursor.rowcount
+
+    def create_search_index(self, cursor):
+        """
+        Create the books_fts full-text index and its sync triggers if they do not exist.
+        An index created for an existing database is filled from the books table. Sets
+        self.search_enabled to False when SQLite is built without FTS5.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute(SEARCH_TABLE)
+        except sqlite3.OperationalError:
+            self.search_enabled = False
+            return
+        self.search_enabled = True
+        if not exists:
+            cursor.execute("INSERT INTO books_fts (books_fts, rank) VALUES ('rank', ?)",
+                           (f'bm25({SEARCH_WEIGHTS[0]}, {SEARCH_WEIGHTS[1]})',))
+            cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+        for _, ddl in SEARCH_TRIGGERS:
+            cursor.execute(ddl)
+
+    def create_circulation_counters(self, cursor):
+        """
+        Create the book_circulation counter table, its indexes and triggers if they do not exist.
+        A table created for an existing database is filled from books and borrowed.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'book_circulation'")
+        exists = cursor.fetchone() is not None
+        cursor.execute(CIRCULATION_TABLE)
+        if not exists:
+            cursor.execute(CIRCULATION_REBUILD)
+        for _, ddl in CIRCULATION_INDEXES + CIRCULATION_TRIGGERS:
+            cursor.execute(ddl)
+
+    def create_change_log(self, cursor):
+        """
+        Create the change_log table and its triggers if they do not exist.
+        A log created for an existing database starts with a 'reload' entry, so the first
+        delta export contains every row.
+        Args:
+            cursor (sqlite3.Cursor): Cursor to run the statements on.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'change_log'")
+        exists = cursor.fetchone() is not None
+        cursor.execute(CHANGE_LOG_TABLE)
+        if not exists:
+            cursor.execute("INSERT INTO change_log (op) VALUES ('reload')")
+        for _, ddl in CHANGE_TRIGGERS:
+            cursor.execute(ddl)
+
+    @invalidates('books')
+    def add_book(self, title, author, reject_duplicates=False):
+        """
+        Add a new book to the library, as a copy of its title (see find_title).
         Args:
             title (str): Book title.
             author (str): Book author.
+            reject_duplicates (bool): Fail instead of adding another copy of a title already held.
         Returns:
             int: ID of the added book.
+        Raises:
+            Exception: If reject_duplicates is set and the title already has a copy.
         """
-        cursor = self.conn.cursor()
-        added_date = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute(
-            'INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)', (title, author, added_date))
-        self.conn.commit()
-        return cursor.lastrowid
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            added_date = datetime.now().strftime('%Y-%m-%d')
+            title_id = self._title_id(cursor, title, author, reject_duplicates)
+            cursor.execute('INSERT INTO books (title, author, added_date, title_id) VALUES (?, ?, ?, ?)',
+                           (title, author, added_date, title_id))
+            book_id = cursor.lastrowid
+            self._add_title(cursor, title_id, title, author)
+            conn.commit()
+            self.availability.mark((book_id,), True)
+            return book_id
+
+    def _title_id(self, cursor, title, author, reject_duplicates=False):
+        """
+        Get the title ID of a new copy. The title row is created by _add_title once the book
+        is written, so a book write that fails leaves no title behind.
+        Returns:
+            int: Title ID.
+        Raises:
+            Exception: If reject_duplicates is set and the title already has a copy.
+        """
+        title_id = title_key(title, author)
+        if reject_duplicates:
+            cursor.execute('SELECT id FROM books WHERE title_id = ? LIMIT 1', (title_id,))
+            if cursor.fetchone() is not None:
+                raise Exception(f'Duplicate book: {title} by {author} is already in the library')
+        return title_id
 
+    def _add_title(self, cursor, title_id, title, author):
+        """
+        Create the title of a book just written, if it does not exist yet, without committing.
+        """
+        cursor.execute('INSERT OR IGNORE INTO titles (id, title, author) VALUES (?, ?, ?)', (title_id, title, author))
+
+    @invalidates('books')
     def remove_book(self, book_id):
         """
-        Remove a book from the library by its ID.
+        Remove a book from the library by its ID. A title left without copies is removed too.
         Args:
             book_id (int): ID of the book to remove.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM books WHERE id = ?', (book_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT title_id FROM books WHERE id = ?', (book_id,))
+            row = cursor.fetchone()
+            cursor.execute('DELETE FROM books WHERE id = ?', (book_id,))
+            if row and row[0] is not None:
+                cursor.execute('''DELETE FROM titles WHERE id = ?
+                                  AND NOT EXISTS (SELECT 1 FROM books WHERE title_id = ?)''', (row[0], row[0]))
+            conn.commit()
+            self.availability.mark((book_id,), False)
 
+    @invalidates('lendors')
     def add_lender(self, name, address, mobile):
         """
         Add a new lender.
@@ -188,22 +639,26 @@ class PersonalLibrary:
         Returns:
             int: ID of the added lender.
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'INSERT INTO lendors (name, address, mobile) VALUES (?, ?, ?)', (name, address, mobile))
-        self.conn.commit()
-        return cursor.lastrowid
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT INTO lendors (name, address, mobile) VALUES (?, ?, ?)', (name, address, mobile))
+            conn.commit()
+            return cursor.lastrowid
 
+    @invalidates('lendors')
     def remove_lender(self, lendor_id):
         """
         Remove a lender by ID.
         Args:
             lendor_id (int): ID of the lender to remove.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM lendors WHERE id = ?', (lendor_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM lendors WHERE id = ?', (lendor_id,))
+            conn.commit()
 
+    @invalidates('borrowed')
     def borrow_book(self, lendor_id, book_id):
         """
         Borrow a book for a lender.
@@ -215,152 +670,1189 @@ class PersonalLibrary:
         Raises:
             Exception: If the book is already borrowed.
         """
-        cursor = self.conn.cursor()
-        # Check if book is already borrowed and not returned
-        cursor.execute('''SELECT id FROM books WHERE id NOT IN (
-            SELECT book_id FROM borrowed WHERE returned = 1
-        )''')
-        if (book_id,) not in cursor.fetchall():
+        with self.pool.writer() as conn:
+            try:
+                borrowed_id = self._borrow(conn.cursor(), lendor_id, book_id)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            self.availability.mark((book_id,), False)
+            return borrowed_id
+
+    def _borrow(self, cursor, lendor_id, book_id):
+        """
+        Insert an active loan without committing.
+        Check and insert run as one statement: the book must exist and have no active loan.
+        The unique partial index rejects a concurrent insert that slips in between.
+        Returns:
+            int: ID of the borrowed record.
+        Raises:
+            Exception: If the book is already borrowed or does not exist.
+        """
+        try:
+            cursor.execute('''INSERT INTO borrowed (lendor_id, book_id, returned)
+                              SELECT ?, ?, 1
+                              WHERE EXISTS (SELECT 1 FROM books WHERE id = ?)
+                                AND NOT EXISTS (SELECT 1 FROM borrowed WHERE book_id = ? AND returned = 1)''',
+                           (lendor_id, book_id, book_id, book_id))
+        except sqlite3.IntegrityError:
+            raise Exception('Book is already borrowed')
+        if cursor.rowcount != 1:
             raise Exception('Book is already borrowed')
-        cursor.execute(
-            'INSERT INTO borrowed (lendor_id, book_id, returned) VALUES (?, ?, 1)', (lendor_id, book_id))
-        self.conn.commit()
         return cursor.lastrowid
 
+    @invalidates('borrowed')
     def return_borrowed_book(self, borrowed_id):
         """
         Return a borrowed book by borrowed record ID.
         Args:
             borrowed_id (int): ID of the borrowed record.
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'UPDATE borrowed SET returned = 0 WHERE id = ?', (borrowed_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            book_id = self._loaned_book(cursor, borrowed_id)
+            cursor.execute(
+                'UPDATE borrowed SET returned = 0 WHERE id = ?', (borrowed_id,))
+            conn.commit()
+            if book_id is not None:
+                self.availability.mark((book_id,), True)
+
+    def _loaned_book(self, cursor, borrowed_id):
+        """
+        Get the book of an active loan, for updating the availability index before the loan
+        is returned. Skipped while the index is not built.
+        Returns:
+            int: Book ID, or None if the index is not built, the loan is not active or the
+                book no longer exists.
+        """
+        if not self.availability.built:
+            return None
+        cursor.execute('''SELECT book_id FROM borrowed
+                          WHERE id = ? AND returned = 1 AND book_id IN (SELECT id FROM books)''', (borrowed_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _write_batch(self, items, write_item, committed=None):
+        """
+        Apply write_item to every item inside one transaction.
+        A failing item is recorded and skipped; SQLite undoes only that item's statement, so
+        the rest of the batch still commits.
+        Args:
+            items (iterable): Argument tuples, one per item.
+            write_item (callable): write_item(cursor, *item) returning the item's ID.
+            committed (callable): Optional callback run after the commit, still holding the writer.
+        Returns:
+            BatchResult: IDs in input order and (index, message) pairs for failed items.
+        """
+        ids, errors = [], []
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            try:
+                for index, item in enumerate(items):
+                    try:
+                        ids.append(write_item(cursor, *item))
+                    except Exception as e:
+                        ids.append(None)
+                        errors.append((index, str(e)))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if committed:
+                committed()
+        return BatchResult(ids, errors)
+
+    @invalidates('books')
+    def add_books_many(self, books, reject_duplicates=False):
+        """
+        Add many books in a single transaction, each as a copy of its title.
+        Args:
+            books (iterable): (title, author) pairs.
+            reject_duplicates (bool): Fail the items whose title is already held, including
+                titles added earlier in the same batch.
+        Returns:
+            BatchResult: New book IDs in input order (None for failed items) and errors.
+        """
+        added_date = datetime.now().strftime('%Y-%m-%d')
+
+        added = []
+
+        def add(cursor, title, author):
+            title_id = self._title_id(cursor, title, author, reject_duplicates)
+            cursor.execute('INSERT INTO books (title, author, added_date, title_id) VALUES (?, ?, ?, ?)',
+                           (title, author, added_date, title_id))
+            added.append(cursor.lastrowid)
+            self._add_title(cursor, title_id, title, author)
+            return added[-1]
+        return self._write_batch(books, add, lambda: self.availability.mark(added, True))
 
+    @invalidates('lendors')
+    def add_lenders_many(self, lenders):
+        """
+        Add many lenders in a single transaction.
+        Args:
+            lenders (iterable): (name, address, mobile) tuples.
+        Returns:
+            BatchResult: New lender IDs in input order (None for failed items) and errors.
+        """
+        def add(cursor, name, address, mobile):
+            cursor.execute('INSERT INTO lendors (name, address, mobile) VALUES (?, ?, ?)',
+                           (name, address, mobile))
+            return cursor.lastrowid
+        return self._write_batch(lenders, add)
+
+    @invalidates('borrowed')
+    def borrow_many(self, loans):
+        """
+        Borrow many books in a single transaction.
+        Args:
+            loans (iterable): (lendor_id, book_id) pairs.
+        Returns:
+            BatchResult: Borrowed record IDs in input order (None for failed items) and errors,
+                e.g. for books that are already borrowed.
+        """
+        lent = []
+
+        def borrow(cursor, lendor_id, book_id):
+            borrowed_id = self._borrow(cursor, lendor_id, book_id)
+            lent.append(book_id)
+            return borrowed_id
+        return self._write_batch(loans, borrow, lambda: self.availability.mark(lent, False))
+
+    @invalidates('borrowed')
+    def return_many(self, borrowed_ids):
+        """
+        Return many borrowed books in a single transaction.
+        Args:
+            borrowed_ids (iterable): Borrowed record IDs.
+        Returns:
+            BatchResult: The borrowed IDs in input order (None for failed items) and errors,
+                e.g. for unknown borrowed records.
+        """
+        released = []
+
+        def give_back(cursor, borrowed_id):
+            book_id = self._loaned_book(cursor, borrowed_id)
+            cursor.execute('UPDATE borrowed SET returned = 0 WHERE id = ?', (borrowed_id,))
+            if cursor.rowcount != 1:
+                raise Exception('Borrowed record not found')
+            if book_id is not None:
+                released.append(book_id)
+            return borrowed_id
+        return self._write_batch(((borrowed_id,) for borrowed_id in borrowed_ids), give_back,
+                                 lambda: self.availability.mark(released, True))
+
+    @invalidates(*TABLE_COLUMNS)
+    def upsert_many(self, table, rows):
+        """
+        Write rows with their own IDs in a single transaction: a row whose ID exists replaces
+        it, the others are inserted, as apply_changes replays an upsert. Books are linked to
+        their titles.
+        Args:
+            table (str): 'books', 'lendors' or 'borrowed'.
+            rows (iterable): Tuples in TABLE_COLUMNS order, starting with the ID.
+        Returns:
+            BatchResult: The row IDs in input order (None for failed items) and errors, e.g. for
+                an active loan of a book that is already lent.
+        """
+        columns = TABLE_COLUMNS[table] + self._derived(table)
+        updates = ', '.join(f'{c} = excluded.{c}' for c in columns[1:])
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT(id) DO UPDATE SET {updates}")
+
+        def upsert(cursor, *row):
+            if table != 'books':
+                cursor.execute(sql, row)
+                return row[0]
+            cursor.execute('SELECT title_id FROM books WHERE id = ?', (row[0],))
+            replaced = cursor.fetchone()
+            title_id = self._title_id(cursor, row[1], row[2])
+            cursor.execute(sql, row + (title_id,))
+            self._add_title(cursor, title_id, row[1], row[2])
+            if replaced and replaced[0] not in (None, title_id):
+                cursor.execute('''DELETE FROM titles WHERE id = ?
+                                  AND NOT EXISTS (SELECT 1 FROM books WHERE title_id = ?)''', (replaced[0], replaced[0]))
+            return row[0]
+        return self._write_batch(rows, upsert, self.availability.invalidate)
+
+    @cached('books')
     def get_all_books(self):
         """
         Get all books in the library.
         Returns:
             list: List of all books.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM books')
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {BOOK_COLUMNS} FROM books')
+            return cursor.fetchall()
 
+    @cached('books', 'lendors', 'borrowed')
     def get_books_borrowed_with_lender_details(self):
         """
         Get all borrowed books with lender details.
         Returns:
             list: List of borrowed books with lender info.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT b.id, b.title, b.author, l.name, l.address, l.mobile, br.id as borrowed_id
-                          FROM books b
-                          JOIN borrowed br ON b.id = br.book_id
-                          JOIN lendors l ON br.lendor_id = l.id
-                          WHERE br.returned = 1''')
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''SELECT b.id, b.title, b.author, l.name, l.address, l.mobile, br.id as borrowed_id
+                              FROM books b
+                              JOIN borrowed br ON b.id = br.book_id
+                              JOIN lendors l ON br.lendor_id = l.id
+                              WHERE br.returned = 1''')
+            return cursor.fetchall()
 
+    @cached('books', 'borrowed')
     def get_books_not_borrowed(self):
         """
         Get all books that are not currently borrowed.
         Returns:
             list: List of available books.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT * FROM books WHERE id NOT IN (
-            SELECT book_id FROM borrowed WHERE returned = 1
-        )''')
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''SELECT {BOOK_COLUMNS} FROM books WHERE id NOT IN (
+                SELECT book_id FROM borrowed WHERE returned = 1
+            )''')
+            return cursor.fetchall()
+
+    def is_available(self, book_id):
+        """
+        Check whether a book exists and is not currently borrowed, from the availability index.
+        Args:
+            book_id (int): ID of the book.
+        Returns:
+            bool: True if the book can be borrowed.
+        """
+        return self._availability().is_available(book_id)
+
+    def count_available(self):
+        """
+        Count the books that are not currently borrowed, from the availability index.
+        Returns:
+            int: Number of available books.
+        """
+        return self._availability().count()
+
+    def available_ids(self, after_id=0, limit=None):
+        """
+        List the IDs of books that are not currently borrowed, from the availability index.
+        Args:
+            after_id (int): Only IDs greater than this, for paging.
+            limit (int): Maximum IDs to return; None for all.
+        Returns:
+            list: Book IDs in ascending order.
+        """
+        return self._availability().ids(after_id, limit)
+
+    @cached('books')
+    def find_title(self, title, author):
+        """
+        Look up a title through its hash key, e.g. to warn about a duplicate before adding a book.
+        Args:
+            title (str): Book title; case, accents, punctuation and spacing are ignored.
+            author (str): Book author, compared the same way.
+        Returns:
+            tuple: (title_id, title, author, copies) or None if no copy is held.
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''SELECT t.id, t.title, t.author, (SELECT COUNT(*) FROM books b WHERE b.title_id = t.id)
+                              FROM titles t WHERE t.id = ?''', (title_key(title, author),))
+            row = cursor.fetchone()
+            return row if row and row[3] else None
+
+    @cached('books', 'borrowed')
+    def find_available_copy(self, title_id):
+        """
+        Find a copy of a title that can be borrowed, through the books.title_id index and the
+        active-loan index rather than a scan of all books.
+        Args:
+            title_id (int): ID of the title (see find_title).
+        Returns:
+            tuple: The lowest-ID available copy (id, title, author, added_date), or None.
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''SELECT {BOOK_COLUMNS} FROM books b WHERE b.title_id = ? AND NOT EXISTS (
+                                  SELECT 1 FROM borrowed br WHERE br.book_id = b.id AND br.returned = 1
+                              ) ORDER BY b.id LIMIT 1''', (title_id,))
+            return cursor.fetchone()
+
+    def _availability(self):
+        """
+        Get the availability index, building it on first use or after a whole-table write
+        or a commit from another connection.
+        Returns:
+            AvailabilityIndex: The current index.
+        """
+        if not self.availability.is_current(self.pool.data_version()):
+            with self.pool.writer() as conn:
+                self.availability.refresh(conn)
+        return self.availability
+
+    def _fetch_page(self, sql, after_id, limit, key_index=0):
+        """
+        Run a keyset query and split off the continuation token.
+        The query must take (after_id, limit) parameters, filter on key > after_id and
+        order by that key, so every page is an index seek regardless of its position.
+        Args:
+            sql (str): Keyset query with two placeholders.
+            after_id (int): Key of the last row of the previous page (0 for the first page).
+            limit (int): Maximum rows to return.
+            key_index (int): Position of the key column in each row.
+        Returns:
+            tuple: (rows, next_after_id); next_after_id is None on the last page.
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, (after_id, limit + 1))
+            rows = cursor.fetchall()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                return rows, rows[-1][key_index]
+            return rows, None
+
+    def _iter_pages(self, page_method, batch_size):
+        """
+        Yield rows from a page method until its continuation token runs out.
+        Args:
+            page_method (callable): One of the get_*_page methods.
+            batch_size (int): Rows fetched per page.
+        Yields:
+            tuple: One row at a time.
+        """
+        after_id = 0
+        while after_id is not None:
+            rows, after_id = page_method(after_id, batch_size)
+            yield from rows
+
+    @cached('books')
+    def get_books_page(self, after_id=0, limit=PAGE_SIZE):
+        """
+        Get the next page of books ordered by ID.
+        Args:
+            after_id (int): Continuation token from the previous page (0 for the first page).
+            limit (int): Maximum books to return.
+        Returns:
+            tuple: (list of books, next_after_id or None).
+        """
+        return self._fetch_page(f'SELECT {BOOK_COLUMNS} FROM books WHERE id > ? ORDER BY id LIMIT ?', after_id, limit)
+
+    @cached('lendors')
+    def get_lendors_page(self, after_id=0, limit=PAGE_SIZE):
+        """
+        Get the next page of lenders ordered by ID.
+        Args:
+            after_id (int): Continuation token from the previous page (0 for the first page).
+            limit (int): Maximum lenders to return.
+        Returns:
+            tuple: (list of lenders, next_after_id or None).
+        """
+        return self._fetch_page('SELECT * FROM lendors WHERE id > ? ORDER BY id LIMIT ?', after_id, limit)
+
+    @cached('books', 'borrowed')
+    def get_books_not_borrowed_page(self, after_id=0, limit=PAGE_SIZE):
+        """
+        Get the next page of books that are not currently borrowed, ordered by ID.
+        Args:
+            after_id (int): Continuation token from the previous page (0 for the first page).
+            limit (int): Maximum books to return.
+        Returns:
+            tuple: (list of available books, next_after_id or None).
+        """
+        return self._fetch_page(f'''SELECT {BOOK_COLUMNS} FROM books b WHERE b.id > ? AND NOT EXISTS (
+            SELECT 1 FROM borrowed br WHERE br.book_id = b.id AND br.returned = 1
+        ) ORDER BY b.id LIMIT ?''', after_id, limit)
+
+    @cached('books', 'lendors', 'borrowed')
+    def get_books_borrowed_with_lender_details_page(self, after_id=0, limit=PAGE_SIZE):
+        """
+        Get the next page of borrowed books with lender details, ordered by borrowed ID.
+        Args:
+            after_id (int): Borrowed ID continuation token from the previous page (0 for the first page).
+            limit (int): Maximum rows to return.
+        Returns:
+            tuple: (list of borrowed books with lender info, next_after_id or None).
+        """
+        return self._fetch_page('''SELECT b.id, b.title, b.author, l.name, l.address, l.mobile, br.id as borrowed_id
+                                  FROM borrowed br
+                                  JOIN books b ON b.id = br.book_id
+                                  JOIN lendors l ON br.lendor_id = l.id
+                                  WHERE br.returned = 1 AND br.id > ?
+                                  ORDER BY br.id LIMIT ?''', after_id, limit, key_index=6)
+
+    @cached('borrowed')
+    def get_borrowed_page(self, after_id=0, limit=PAGE_SIZE):
+        """
+        Get the next page of borrowed records, active and returned, ordered by ID.
+        Args:
+            after_id (int): Continuation token from the previous page (0 for the first page).
+            limit (int): Maximum records to return.
+        Returns:
+            tuple: (list of (id, lendor_id, book_id, returned) rows, next_after_id or None).
+        """
+        return self._fetch_page(f"SELECT {', '.join(TABLE_COLUMNS['borrowed'])} FROM borrowed "
+                                f"WHERE id > ? ORDER BY id LIMIT ?", after_id, limit)
+
+    def iter_books(self, batch_size=PAGE_SIZE):
+        """
+        Stream all books ordered by ID, one keyset page at a time.
+        Yields:
+            tuple: Book row.
+        """
+        return self._iter_pages(self.get_books_page, batch_size)
+
+    def iter_lendors(self, batch_size=PAGE_SIZE):
+        """
+        Stream all lenders ordered by ID, one keyset page at a time.
+        Yields:
+            tuple: Lender row.
+        """
+        return self._iter_pages(self.get_lendors_page, batch_size)
+
+    def iter_books_not_borrowed(self, batch_size=PAGE_SIZE):
+        """
+        Stream all available books ordered by ID, one keyset page at a time.
+        Yields:
+            tuple: Available book row.
+        """
+        return self._iter_pages(self.get_books_not_borrowed_page, batch_size)
+
+    def iter_books_borrowed_with_lender_details(self, batch_size=PAGE_SIZE):
+        """
+        Stream all borrowed books with lender details ordered by borrowed ID.
+        Yields:
+            tuple: Borrowed book row with lender info.
+        """
+        return self._iter_pages(self.get_books_borrowed_with_lender_details_page, batch_size)
+
+    def iter_borrowed(self, batch_size=PAGE_SIZE):
+        """
+        Stream all borrowed records ordered by ID.
+        Yields:
+            tuple: (id, lendor_id, book_id, returned) row.
+        """
+        return self._iter_pages(self.get_borrowed_page, batch_size)
+
+    @cached('books', 'borrowed')
+    def search_books(self, query, limit=20, available_only=False):
+        """
+        Search books by title and author words. Every word is prefix-matched and results
+        are ranked by relevance, with title matches weighted above author matches.
+        Args:
+            query (str): Words to search for, e.g. "fisch chess".
+            limit (int): Maximum books to return.
+            available_only (bool): Leave out books that are currently borrowed.
+        Returns:
+            list: Matching books (id, title, author, added_date), best match first.
+        """
+        available = ('NOT EXISTS (SELECT 1 FROM borrowed br WHERE br.book_id = b.id AND br.returned = 1)'
+                     if available_only else '1')
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            if not self.search_enabled:
+                terms = re.findall(r'\w+', query)
+                if not terms:
+                    return []
+                where = ' AND '.join('(b.title LIKE ? OR b.author LIKE ?)' for _ in terms)
+                params = [f'%{term}%' for term in terms for _ in range(2)]
+                cursor.execute(f'''SELECT b.id, b.title, b.author, b.added_date FROM books b
+                                   WHERE {where} AND {available} ORDER BY b.id LIMIT ?''', params + [limit])
+                return cursor.fetchall()
+            match = search_match_expression(query)
+            if match is None:
+                return []
+            if available_only:
+                # Availability needs the books join anyway, so filter the candidates before ranking.
+                cursor.execute(f'''SELECT b.id, b.title, b.author, b.added_date
+                                   FROM (SELECT rowid, rank FROM books_fts WHERE books_fts MATCH ? LIMIT ?) AS hits
+                                   JOIN books b ON b.id = hits.rowid
+                                   WHERE {available}
+                                   ORDER BY hits.rank LIMIT ?''', (match, max(limit, SEARCH_CANDIDATES), limit))
+                return cursor.fetchall()
+            # Score at most SEARCH_CANDIDATES hits so very common words cannot force a ranking
+            # pass over a large part of the catalog, then join only the top `limit` to books.
+            cursor.execute('''SELECT b.id, b.title, b.author, b.added_date
+                              FROM (SELECT rowid, rank FROM (
+                                        SELECT rowid, rank FROM books_fts WHERE books_fts MATCH ? LIMIT ?
+                                    ) ORDER BY rank LIMIT ?) AS hits
+                              JOIN books b ON b.id = hits.rowid
+                              ORDER BY hits.rank''', (match, max(limit, SEARCH_CANDIDATES), limit))
+            return cursor.fetchall()
 
     def get_most_borrowed_book(self):
         """
         Get the most borrowed book.
         Returns:
-            tuple: Book details and borrow count.
+            tuple: Book details and borrow count, or None if nothing was ever borrowed.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT b.id, b.title, b.author, COUNT(br.id) as borrow_count
-                          FROM books b
-                          JOIN borrowed br ON b.id = br.book_id
-                          GROUP BY b.id
-                          ORDER BY borrow_count DESC
-                          LIMIT 1''')
-        return cursor.fetchone()
+        books = self.top_borrowed(1)
+        return books[0] if books else None
 
     def get_least_borrowed_book(self):
         """
-        Get the least borrowed book.
+        Get the least borrowed book. Books that were never borrowed count as zero.
+        Returns:
+            tuple: Book details and borrow count, or None if the library has no books.
+        """
+        books = self.bottom_borrowed(1)
+        return books[0] if books else None
+
+    @cached('books', 'borrowed')
+    def top_borrowed(self, k=10):
+        """
+        Get the k most borrowed books, ties broken by lowest book ID.
+        Only books borrowed at least once are listed.
+        Args:
+            k (int): Number of books to return.
+        Returns:
+            list: (id, title, author, borrow_count) tuples, most borrowed first.
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''SELECT b.id, b.title, b.author, c.borrow_count
+                              FROM book_circulation c INDEXED BY idx_circulation_most
+                              JOIN books b ON b.id = c.book_id
+                              WHERE c.borrow_count > 0
+                              ORDER BY c.borrow_count DESC, c.book_id
+                              LIMIT ?''', (k,))
+            return cursor.fetchall()
+
+    @cached('books', 'borrowed')
+    def bottom_borrowed(self, k=10):
+        """
+        Get the k least borrowed books, including books never borrowed, ties broken by
+        lowest book ID.
+        Args:
+            k (int): Number of books to return.
         Returns:
-            tuple: Book details and borrow count.
+            list: (id, title, author, borrow_count) tuples, least borrowed first.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT b.id, b.title, b.author, COUNT(br.id) as borrow_count
-                          FROM books b
-                          LEFT JOIN borrowed br ON b.id = br.book_id
-                          GROUP BY b.id
-                          ORDER BY borrow_count ASC
-                          LIMIT 1''')
-        return cursor.fetchone()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''SELECT b.id, b.title, b.author, c.borrow_count
+                              FROM book_circulation c INDEXED BY idx_circulation_least
+                              JOIN books b ON b.id = c.book_id
+                              ORDER BY c.borrow_count, c.book_id
+                              LIMIT ?''', (k,))
+            return cursor.fetchall()
 
-    def clear_all_tables(self):
+    @invalidates(*TABLE_COLUMNS)
+    def clear_all_tables(self, progress=None):
         """
         Clear all rows from books, lendors, and borrowed tables.
+        The search, circulation and change triggers are dropped for the deletes, so each table
+        is emptied in one pass; the search index and borrow counters are emptied directly and
+        the change log is replaced by a single 'reload' entry.
+        Args:
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
         Returns:
             str: Success message or error.
         """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM books')
-            cursor.execute('DELETE FROM lendors')
-            cursor.execute('DELETE FROM borrowed')
-            self.conn.commit()
+            with self.pool.writer() as conn:
+                if conn.in_transaction:
+                    conn.commit()
+                cursor = conn.cursor()
+                cursor.execute('BEGIN')
+                try:
+                    for name, _ in SEARCH_TRIGGERS + CIRCULATION_TRIGGERS + CHANGE_TRIGGERS:
+                        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                    for table in ('books', 'lendors', 'borrowed'):
+                        cursor.execute(f'DELETE FROM {table}')
+                        if progress:
+                            progress(table, cursor.rowcount, True)
+                    if self.search_enabled:
+                        cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('delete-all')")
+                        for _, ddl in SEARCH_TRIGGERS:
+                            cursor.execute(ddl)
+                    cursor.execute('DELETE FROM book_circulation')
+                    for _, ddl in CIRCULATION_TRIGGERS:
+                        cursor.execute(ddl)
+                    cursor.execute('DELETE FROM titles')
+                    self._log_reload(cursor)
+                    self.availability.invalidate()
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
             return "All tables cleared."
         except Exception as e:
             return f"Error clearing tables: {e}"
 
-    def import_from_excel(self, file_path):
+    def _log_reload(self, cursor, after_seq=0):
+        """
+        Replace the change log with a single 'reload' entry and recreate its triggers.
+        Used by the whole-table writes, which run with the change triggers dropped.
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the writer connection.
+            after_seq (int): Seq the reload entry must follow, besides the ones already handed out.
+        """
+        cursor.execute('DELETE FROM change_log')
+        cursor.execute("INSERT INTO change_log (seq, op) VALUES (MAX(?, ?) + 1, 'reload')",
+                       (self._change_seq(cursor), after_seq))
+        for _, ddl in CHANGE_TRIGGERS:
+            cursor.execute(ddl)
+
+    def _change_seq(self, cursor):
+        """
+        Highest change log seq handed out so far, including entries that were since removed.
+        """
+        cursor.execute('''SELECT MAX(COALESCE((SELECT MAX(seq) FROM change_log), 0),
+                                     COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0))''')
+        return cursor.fetchone()[0]
+
+    @invalidates(*TABLE_COLUMNS)
+    def bulk_load(self, sources, chunk_size=BULK_CHUNK_SIZE, progress=None):
+        """
+        Replace the contents of books, lendors and borrowed in a single transaction.
+        Secondary indexes and the search, circulation and change triggers are dropped before
+        the load; afterwards the indexes are recreated, the search index, borrow counters and
+        titles are rebuilt in one pass each and the change log is reset to a 'reload' entry.
+        Throughput and the number of duplicate copies are recorded in self.last_import_stats.
+        Args:
+            sources (iterable): (table, rows) pairs; rows is an iterable of tuples in TABLE_COLUMNS order.
+            chunk_size (int): Rows sent to executemany per call.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
+        Returns:
+            dict: Row counts per table, total rows, duplicates (books that are another copy of
+                a title), closed_loans (older active loans of a book marked returned, see
+                create_indexes), elapsed seconds and rows per second.
+        """
+        start = time.perf_counter()
+        counts = {table: 0 for table in TABLE_COLUMNS}
+        with self.pool.writer() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            try:
+                for name, _ in SEARCH_TRIGGERS + CIRCULATION_TRIGGERS + CHANGE_TRIGGERS:
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                for table in TABLE_COLUMNS:
+                    cursor.execute(f'DELETE FROM {table}')
+                cursor.execute('DELETE FROM book_circulation')
+                cursor.execute('DELETE FROM titles')
+                for name, _ in SECONDARY_INDEXES + TITLE_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS {name}')
+                for table, rows in sources:
+                    columns = TABLE_COLUMNS[table]
+                    sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' * len(columns))})")
+                    if table == 'books':
+                        sql = BULK_BOOK_INSERT
+                    rows = iter(rows)
+                    while True:
+                        chunk = list(islice(rows, chunk_size))
+                        if not chunk:
+                            break
+                        cursor.executemany(sql, chunk)
+                        counts[table] += len(chunk)
+                        if progress:
+                            progress(table, counts[table], False)
+                    if progress:
+                        progress(table, counts[table], True)
+                closed_loans = self.create_indexes(cursor)
+                if self.search_enabled:
+                    cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+                    for _, ddl in SEARCH_TRIGGERS:
+                        cursor.execute(ddl)
+                cursor.execute(CIRCULATION_REBUILD)
+                for _, ddl in CIRCULATION_TRIGGERS:
+                    cursor.execute(ddl)
+                duplicates = counts['books'] - self._add_titles(cursor)
+                for _, ddl in TITLE_INDEXES:
+                    cursor.execute(ddl)
+                self._log_reload(cursor)
+                self.availability.invalidate()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        self.last_import_stats = {
+            'tables': counts,
+            'rows': total,
+            'duplicates': duplicates,
+            'closed_loans': closed_loans,
+            'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed > 0 else 0.0,
+        }
+        return self.last_import_stats
+
+    @invalidates(*TABLE_COLUMNS)
+    def merge_load(self, sources, chunk_size=BULK_CHUNK_SIZE, progress=None, dry_run=False):
+        """
+        Make books, lendors and borrowed match the incoming rows by writing only the difference.
+        Rows are staged in temporary tables and compared by primary key: new IDs are inserted,
+        rows with any changed column are updated, and IDs missing from the input are deleted,
+        so the end state is the same as bulk_load. Unchanged rows, the indexes and the derived
+        search, circulation and change-log data are left alone; inserted and updated books are
+        linked to their titles. Runs in a single transaction; a dry run computes the summary
+        and rolls back. The summary is also recorded in self.last_import_stats.
+        Args:
+            sources (iterable): (table, rows) pairs; rows is an iterable of tuples in TABLE_COLUMNS order.
+            chunk_size (int): Rows sent to executemany per call while staging.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows staged so far for each table. It may raise to cancel the operation.
+            dry_run (bool): Only report what would change.
+        Returns:
+            dict: Per-table insert/update/delete/unchanged counts, total incoming rows,
+                total changes, duplicates (inserted or updated books that are another copy of a
+                title), closed_loans (incoming older active loans of a book, imported as
+                returned), dry_run flag, elapsed seconds and rows per second.
+        """
+        start = time.perf_counter()
+        counts = {table: 0 for table in TABLE_COLUMNS}
+        diff = {}
+        with self.pool.writer() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            try:
+                for table, columns in TABLE_COLUMNS.items():
+                    cursor.execute(f'DROP TABLE IF EXISTS temp.merge_{table}')
+                    # CREATE TABLE AS keeps the column affinities, so staged values compare
+                    # exactly as they would be stored.
+                    cursor.execute(f"CREATE TEMP TABLE merge_{table} AS SELECT {', '.join(columns)} "
+                                   f"FROM main.{table} WHERE 0")
+                    cursor.execute(f'CREATE UNIQUE INDEX temp.merge_{table}_id ON merge_{table} (id)')
+                for table, rows in sources:
+                    columns = TABLE_COLUMNS[table]
+                    sql = (f"INSERT INTO temp.merge_{table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' * len(columns))})")
+                    rows = iter(rows)
+                    while True:
+                        chunk = list(islice(rows, chunk_size))
+                        if not chunk:
+                            break
+                        cursor.executemany(sql, chunk)
+                        counts[table] += len(chunk)
+                        if progress:
+                            progress(table, counts[table], False)
+                    if progress:
+                        progress(table, counts[table], True)
+                cursor.execute(CLOSE_DUPLICATE_LOANS.format(table='temp.merge_borrowed'))
+                closed_loans = cursor.rowcount
+
+                for table, columns in TABLE_COLUMNS.items():
+                    changed = ' OR '.join(f't.{c} IS NOT i.{c}' for c in columns[1:])
+                    cursor.execute(f'''SELECT COUNT(t.id IS NULL OR NULL),
+                                              COUNT((t.id IS NOT NULL AND ({changed})) OR NULL)
+                                       FROM temp.merge_{table} i LEFT JOIN main.{table} t ON t.id = i.id''')
+                    inserts, updates = cursor.fetchone()
+                    cursor.execute(f'SELECT COUNT(*) FROM main.{table} WHERE {self._merge_missing(table)}')
+                    deletes = cursor.fetchone()[0]
+                    diff[table] = {'insert': inserts, 'update': updates, 'delete': deletes,
+                                   'unchanged': counts[table] - inserts - updates}
+                if not dry_run:
+                    # Deletes go first and loans are returned before new ones start, so the
+                    # one-active-loan-per-book index never sees two active loans mid-merge.
+                    for table in reversed(list(TABLE_COLUMNS)):
+                        if diff[table]['delete']:
+                            cursor.execute(f'DELETE FROM main.{table} WHERE {self._merge_missing(table)}')
+                    for table, columns in TABLE_COLUMNS.items():
+                        if not diff[table]['insert'] and not diff[table]['update']:
+                            continue
+                        changed = ' OR '.join(f't.{c} IS NOT i.{c}' for c in columns[1:])
+                        order = 'i.returned, i.id' if table == 'borrowed' else 'i.id'
+                        updates = ', '.join(f'{c} = excluded.{c}' for c in columns[1:] + self._derived(table))
+                        cursor.execute(f'''INSERT INTO main.{table} ({', '.join(columns)})
+                                           SELECT {', '.join(f'i.{c}' for c in columns)}
+                                           FROM temp.merge_{table} i LEFT JOIN main.{table} t ON t.id = i.id
+                                           WHERE t.id IS NULL OR {changed}
+                                           ORDER BY {order}
+                                           ON CONFLICT(id) DO UPDATE SET {updates}''')
+                # A dry run links too, so it reports the same duplicates before rolling back.
+                titles = self._link_titles(cursor)
+                for table in TABLE_COLUMNS:
+                    cursor.execute(f'DROP TABLE temp.merge_{table}')
+                if dry_run:
+                    conn.rollback()
+                else:
+                    self.availability.invalidate()
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        self.last_import_stats = {
+            'tables': diff,
+            'rows': total,
+            'changes': sum(d['insert'] + d['update'] + d['delete'] for d in diff.values()),
+            'duplicates': titles['duplicates'],
+            'closed_loans': closed_loans,
+            'dry_run': dry_run,
+            'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed > 0 else 0.0,
+        }
+        return self.last_import_stats
+
+    def _import_loader(self, mode, dry_run):
+        """
+        Pick the loader for an import mode.
+        Returns:
+            callable: load(sources, chunk_size=..., progress=...).
+        Raises:
+            ValueError: If the mode is unknown or a dry run is asked of a replace.
+        """
+        if mode == 'merge':
+            return lambda sources, **kwargs: self.merge_load(sources, dry_run=dry_run, **kwargs)
+        if mode != 'replace':
+            raise ValueError(f'Unknown import mode: {mode}')
+        if dry_run:
+            raise ValueError('Dry run is only available in merge mode')
+        return self.bulk_load
+
+    def _import_message(self, source):
+        """
+        Describe the import just finished from self.last_import_stats.
+        """
+        stats = self.last_import_stats
+        if 'changes' not in stats:
+            return f"Data imported from {source} and tables overwritten."
+        totals = {op: sum(d[op] for d in stats['tables'].values()) for op in ('insert', 'update', 'delete')}
+        if stats['dry_run']:
+            return (f"Dry run of {source} merge: {totals['insert']} to insert, {totals['update']} to update, "
+                    f"{totals['delete']} to delete.")
+        return (f"Data merged from {source}: {totals['insert']} inserted, {totals['update']} updated, "
+                f"{totals['delete']} deleted.")
+
+    def _derived(self, table):
+        """
+        Columns of table that the library derives itself; an upsert of a changed row resets them
+        to NULL (excluded.column of an INSERT that does not name them) so they are recomputed.
+        """
+        return ('title_id',) if table == 'books' else ()
+
+    def _merge_missing(self, table):
+        """
+        WHERE clause matching the rows of table whose ID is not among the staged merge rows.
+        """
+        return f'NOT EXISTS (SELECT 1 FROM temp.merge_{table} i WHERE i.id = main.{table}.id)'
+
+    def import_from_excel(self, file_path, progress=None, mode='replace', dry_run=False, workers=None):
         """
         Import data from an Excel file and overwrite existing tables.
+        Sheets are streamed through bulk_load in one transaction.
         Args:
             file_path (str): Path to the Excel file.
+            progress (callable): Optional progress(table, rows, done) callback, called with the
+                rows processed so far for each table. It may raise to cancel the operation.
+            mode (str): 'replace' reloads every table; 'merge' writes only the rows that differ
+                (see merge_load).
+            dry_run (bool): In merge mode, only compute the summary in self.last_import_stats.
+            workers (int): Parse the sheets in up to this many worker processes while this
+                connection loads them in foreign-key order (see library_io.ParallelExcelReader).
+                None parses them here, streaming one row at a time.
         Returns:
             str: Success message or error.
         """
         try:
-            xls = pd.ExcelFile(file_path)
-            cursor = self.conn.cursor()
-            # Clear tables first
-            cursor.execute('DELETE FROM books')
-            cursor.execute('DELETE FROM lendors')
-            cursor.execute('DELETE FROM borrowed')
-            self.conn.commit()
-            # Import books
-            if 'Books' in xls.sheet_names:
-                df_books = pd.read_excel(xls, 'Books')
-                for _, row in df_books.iterrows():
-                    cursor.execute('INSERT INTO books (id, title, author, added_date) VALUES (?, ?, ?, ?)',
-                                   (row['id'], row['title'], row['author'], row['added_date']))
-            # Import lendors
-            if 'Lendors' in xls.sheet_names:
-                df_lendors = pd.read_excel(xls, 'Lendors')
-                for _, row in df_lendors.iterrows():
-                    cursor.execute('INSERT INTO lendors (id, name, address, mobile) VALUES (?, ?, ?, ?)',
-                                   (row['id'], row['name'], row['address'], row['mobile']))
-            # Import borrowed
-            if 'Borrowed' in xls.sheet_names:
-                df_borrowed = pd.read_excel(xls, 'Borrowed', dtype=object)
-                for _, row in df_borrowed.iterrows():
-                    cursor.execute('INSERT INTO borrowed (id, lendor_id, book_id, returned) VALUES (?, ?, ?, ?)',
-                                   (row['id'], row['lendor_id'], row['book_id'], row['returned']))
-            self.conn.commit()
-            return "Data imported from Excel and tables overwritten."
+            load = self._import_loader(mode, dry_run)
+            from src import library_io
+            if workers:
+                with library_io.ParallelExcelReader(file_path, TABLE_COLUMNS, workers) as workbook:
+                    sources = workbook.sources()
+                    # Wait for the first sheet before the load takes the write lock.
+                    first = next(sources, None)
+                    load(chain([first], sources) if first else [], progress=progress)
+                return self._import_message('Excel')
+            with library_io.ExcelReader(file_path) as workbook:
+                sources = [(table, workbook.rows(sheet, TABLE_COLUMNS[table]))
+                           for sheet, table in library_io.SHEETS if sheet in workbook.sheet_names]
+                load(sources, progress=progress)
+            return self._import_message('Excel')
         except Exception as e:
             return f"Error importing from Excel: {e}"
 
+    def change_watermark(self):
+        """
+        Get the sequence number of the latest logged change.
+        Returns:
+            int: Watermark to pass as since_seq to the next export_changes call.
+        """
+        with self.pool.reader() as conn:
+            return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+
+    def export_changes(self, since_seq, file_path, progress=None):
+        """
+        Write the rows changed after since_seq to a delta file.
+        Each changed row is written once with its current values, or as a delete if it no
+        longer exists, so the file grows with the number of rows touched rather than the size
+        of the library. If the tables were reloaded or cleared after since_seq, the delta is
+        a full snapshot marked as a reload.
+        Args:
+            since_seq (int): Watermark of the previous delta (0 for everything).
+            file_path (str): Path to save the delta file.
+            progress (callable): Optional progress(table, rows, done) callback.
+        Returns:
+            dict: since_seq, until_seq (the new watermark), reload flag, rows and deletes written.
+        """
+        from src import library_io
+        written = 0
+
+        def counting(rows):
+            nonlocal written
+            for row in rows:
+                written += 1
+                yield row
+
+        with self.pool.reader() as conn:
+            began = not conn.in_transaction
+            if began:
+                # One read transaction, so the watermark and the rows come from the same snapshot.
+                conn.execute('BEGIN')
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+                until_seq = cursor.fetchone()[0]
+                cursor.execute("SELECT 1 FROM change_log WHERE seq > ? AND op = 'reload' LIMIT 1", (since_seq,))
+                reload = cursor.fetchone() is not None
+                if reload:
+                    tables, deletes = self._table_rows(conn), []
+                else:
+                    tables, deletes = self._changed_rows(conn, since_seq, until_seq)
+                header = {'since_seq': since_seq, 'until_seq': until_seq, 'reload': reload}
+                library_io.write_changes(file_path, header,
+                                         ((t, c, counting(rows)) for t, c, rows in tables), deletes, progress)
+            finally:
+                if began:
+                    conn.commit()
+        header.update(rows=written, deletes=len(deletes))
+        return header
+
+    def _changed_rows(self, conn, since_seq, until_seq):
+        """
+        Collect the current state of every row logged in (since_seq, until_seq].
+        Returns:
+            tuple: ((table, columns, rows) triples of existing rows, [(table, id)] of deleted rows).
+        """
+        touched = {table: set() for table in TABLE_COLUMNS}
+        cursor = conn.cursor()
+        cursor.execute('SELECT table_name, row_id FROM change_log WHERE seq > ? AND seq <= ? AND row_id IS NOT NULL',
+                       (since_seq, until_seq))
+        for table, row_id in cursor:
+            touched[table].add(row_id)
+        tables, deletes = [], []
+        for table, ids in touched.items():
+            ids = sorted(ids)
+            rows, columns = [], None
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cursor.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} "
+                               f"WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id", chunk)
+                columns = [d[0] for d in cursor.description]
+                rows.extend(cursor.fetchall())
+            if rows:
+                tables.append((table, columns, rows))
+            found = {row[0] for row in rows}
+            deletes.extend((table, row_id) for row_id in ids if row_id not in found)
+        return tables, deletes
+
+    @invalidates(*TABLE_COLUMNS)
+    def apply_changes(self, file_path, progress=None):
+        """
+        Apply a delta file written by export_changes, in one transaction.
+        A reload delta replaces every table through bulk_load.
+        Args:
+            file_path (str): Path to the delta file.
+            progress (callable): Optional progress(table, rows, done) callback, used for reloads.
+        Returns:
+            dict: since_seq, until_seq and reload flag of the delta, upserts and deletes applied.
+        Raises:
+            ValueError: If the file is not a delta file or names an unknown table or operation.
+        """
+        from src import library_io
+        with open(file_path, 'r', encoding='utf-8') as f:
+            header, records = library_io.read_changes(f)
+            counts = {'upsert': 0, 'delete': 0}
+            if header.get('reload'):
+                upserts = ((table, record) for table, op, record in records if op == 'upsert')
+                sources = ((table, library_io.record_rows((r for _, r in group), TABLE_COLUMNS[table]))
+                           for table, group in groupby(upserts, key=lambda item: item[0]))
+                counts['upsert'] = self.bulk_load(sources, progress=progress)['rows']
+            else:
+                with self.pool.writer() as conn:
+                    if conn.in_transaction:
+                        conn.commit()
+                    cursor = conn.cursor()
+                    cursor.execute('BEGIN')
+                    try:
+                        for table, op, record in records:
+                            if table not in TABLE_COLUMNS or op not in counts:
+                                raise ValueError(f'Unknown change {op!r} on {table!r}')
+                            columns = TABLE_COLUMNS[table]
+                            if op == 'upsert':
+                                updates = ', '.join(f'{c} = excluded.{c}' for c in columns[1:] + self._derived(table))
+                                cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                                               f"VALUES ({', '.join('?' * len(columns))}) "
+                                               f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                                               [record.get(c) for c in columns])
+                            else:
+                                cursor.execute(f'DELETE FROM {table} WHERE id = ?', (record['id'],))
+                            counts[op] += 1
+                        self._link_titles(cursor)
+                        self.availability.invalidate()
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+        return {'since_seq': header.get('since_seq'), 'until_seq': header.get('until_seq'),
+                'reload': bool(header.get('reload')), 'upserts': counts['upsert'], 'deletes': counts['delete']}
+
+    def snapshot(self, file_path, compression=None, pages=SNAPSHOT_PAGES, progress=None):
+        """
+        Save a binary copy of the whole database with the SQLite backup API, pages steps at a
+        time. The copy is read inside one read transaction on a pooled reader, so it is a
+        consistent snapshot and writes carry on while it runs. A sha256sum-style checksum file
+        is written next to it.
+        Args:
+            file_path (str): Path to save the snapshot.
+            compression (str): None, 'gzip' or 'lzma'.
+            pages (int): Pages copied per step.
+            progress (callable): Optional progress('snapshot', pages_copied, done) callback.
+                It may raise to cancel the operation.
+        Returns:
+            str: Success message or error.
+        """
+        database_path = file_path + '.tmp'
+        try:
+            from src import library_io
+            if compression not in library_io.SNAPSHOT_COMPRESSIONS:
+                raise ValueError(f'Unknown compression: {compression}')
+            dest = sqlite3.connect(database_path)
+            try:
+                with self.pool.reader() as conn:
+                    began = not conn.in_transaction
+                    if began:
+                        conn.execute('BEGIN')
+                        conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+                    try:
+                        conn.backup(dest, pages=pages, progress=self._backup_progress('snapshot', progress))
+                    finally:
+                        if began:
+                            conn.commit()
+                # A rollback-journal file is self-contained, so the snapshot is a single file.
+                dest.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                dest.close()
+            checksum = library_io.write_snapshot_file(database_path, file_path, compression)
+            return f"Snapshot saved to {file_path} (sha256 {checksum[:12]})."
+        except Exception as e:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(database_path + suffix):
+                    os.remove(database_path + suffix)
+            return f"Snapshot failed: {e}"
+
+    @invalidates(*TABLE_COLUMNS)
+    def restore(self, file_path, verify=True, pages=SNAPSHOT_PAGES, progress=None):
+        """
+        Replace the whole database with a snapshot written by snapshot(), pages steps at a time.
+        Readers keep seeing the old contents until the restore commits, and a cancelled or
+        failed restore leaves the database unchanged. Snapshots of older schemas are upgraded,
+        and the change log is reset to a 'reload' entry.
+        Args:
+            file_path (str): Path of the snapshot; gzip and lzma compression are detected.
+            verify (bool): Check the checksum file, if present, and run PRAGMA quick_check.
+            pages (int): Pages copied per step.
+            progress (callable): Optional progress('restore', pages_copied, done) callback.
+                It may raise to cancel the operation.
+        Returns:
+            str: Success message or error.
+        """
+        try:
+            from src import library_io
+            folder = None if self.pool.in_memory else os.path.dirname(os.path.abspath(self.db_name))
+            with tempfile.TemporaryDirectory(dir=folder) as tmp:
+                database_path = os.path.join(tmp, 'restore.db')
+                library_io.read_snapshot_file(file_path, database_path, verify)
+                source = sqlite3.connect(database_path)
+                try:
+                    if verify:
+                        result = source.execute('PRAGMA quick_check').fetchone()[0]
+                        if result != 'ok':
+                            raise ValueError(f'Snapshot is damaged: {result}')
+                    if source.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books'").fetchone() is None:
+                        raise ValueError('Not a library snapshot')
+                    with self.pool.writer() as conn:
+                        if conn.in_transaction:
+                            conn.commit()
+                        # The backup copies the snapshot's change log sequence as well, so the
+                        # reload entry must follow the live one for earlier watermarks to see it.
+                        cursor = conn.cursor()
+                        last_seq = self._change_seq(cursor)
+                        source.backup(conn, pages=pages, progress=self._backup_progress('restore', progress))
+                        cursor.execute('BEGIN')
+                        try:
+                            self.create_schema(cursor)
+                            self._log_reload(cursor, last_seq)
+                            self.availability.invalidate()
+                            conn.commit()
+                        except Exception:
+                            conn.rollback()
+                            raise
+                finally:
+                    source.close()
+            return f"Restored from {file_path}."
+        except Exception as e:
+            return f"Error restoring snapshot: {e}"
+
+    def _backup_progress(self, name, progress):
+        """
+        Adapt a progress(table, rows, done) callback to the sqlite3 backup progress signature.
+        """
+        if progress is None:
+            return None
+
+        def report(status, remaining, total):
+            progress(name, total - remaining, remaining == 0)
+        return report
+
+    def enable_instrumentation(self, slow_ms=SLOW_QUERY_MS):
+        """
+        Start recording per-method latency histograms and traced SQL statements, logging
+        statements at least slow_ms milliseconds long with their query plans. Calling it again
+        only changes the threshold.
+        Args:
+            slow_ms (float): Slow-query threshold in milliseconds.
+        Returns:
+            Instrumentation: The recorder; its stats() returns everything as a dict.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(slow_ms)
+            self.instrumentation.attach(self)
+        self.instrumentation.slow_ms = slow_ms
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Stop recording and restore the uninstrumented methods and connections.
+        Returns:
+            dict: Final stats, or None if instrumentation was not enabled.
+        """
+        if self.instrumentation is None:
+            return None
+        stats = self.instrumentation.stats()
+        self.instrumentation.detach()
+        self.instrumentation = None
+        return stats
+
     def close(self):
         """
-        Close the database connection.
+        Close the writer connection and every pooled reader connection.
         """
-        self.conn.close()
+        self.pool.close()
+
+
+if __name__ == '__main__':
+    from src.cli import main
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+"""
+query_cache.py
+
+Opt-in read-through cache for PersonalLibrary query results. Entries are tagged with the tables
+they read; library writes invalidate only the affected tables, and a change of SQLite's
+PRAGMA data_version (a commit from another connection or process) drops everything. Statements
+run directly on PersonalLibrary.conn bypass both, so call cache.clear() after using it.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+# Number of results kept by the cache the app enables.
+DEFAULT_CACHE_SIZE = 128
+
+
+class QueryCache:
+    """
+    Bounded LRU map of query results with per-table invalidation and hit/miss counters.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            max_entries (int): Maximum number of results kept; the least recently used is evicted.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._by_table = defaultdict(set)
+        self._generations = defaultdict(int)
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key, data_version):
+        """
+        Look up a cached result.
+        Args:
+            key (hashable): Query key.
+            data_version (int): Current PRAGMA data_version of the database.
+        Returns:
+            tuple: (found, value, token); pass token to store() after a miss.
+        """
+        with self._lock:
+            if data_version != self._data_version:
+                self._drop_all()
+                self._data_version = data_version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][1], None
+            self.misses += 1
+            return False, None, (data_version, dict(self._generations))
+
+    def store(self, key, tables, value, token):
+        """
+        Cache a result unless one of its tables was invalidated since the lookup that
+        produced token, so a query racing a write never caches stale rows.
+        Args:
+            key (hashable): Query key.
+            tables (tuple): Tables the query read.
+            value: Query result.
+            token (tuple): Token returned by the missed lookup.
+        """
+        data_version, generations = token
+        with self._lock:
+            if data_version != self._data_version:
+                return
+            if any(self._generations[t] != generations.get(t, 0) for t in tables):
+                return
+            self._entries[key] = (tables, value)
+            self._entries.move_to_end(key)
+            for table in tables:
+                self._by_table[table].add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (old_tables, _) = self._entries.popitem(last=False)
+                for table in old_tables:
+                    self._by_table[table].discard(old_key)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """
+        Drop every cached result that read one of the tables.
+        Args:
+            tables (iterable): Table names that were written.
+        """
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+                for key in self._by_table.pop(table, ()):
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        for other in entry[0]:
+                            if other != table:
+                                self._by_table[other].discard(key)
+
+    def clear(self):
+        """
+        Drop every cached result and reset the counters.
+        """
+        with self._lock:
+            self._drop_all()
+            self.hits = self.misses = self.evictions = 0
+
+    def _drop_all(self):
+        for table in list(self._by_table):
+            self._generations[table] += 1
+        self._entries.clear()
+        self._by_table.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, evictions, entries, max_entries and hit_rate.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+def cached(*tables):
+    """
+    Decorate a PersonalLibrary read method so its results are served from self.cache.
+    Calls pass straight through when the cache is disabled or a write is in flight.
+    Args:
+        tables (str): Tables the method reads.
+    """
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+            data_version = self.pool.data_version()
+            if data_version is None:
+                return method(self, *args, **kwargs)
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            found, value, token = self.cache.lookup(key, data_version)
+            if found:
+                return value
+            value = method(self, *args, **kwargs)
+            self.cache.store(key, tables, value, token)
+            return value
+        return wrapper
+    return decorate
+
+
+def invalidates(*tables):
+    """
+    Decorate a PersonalLibrary write method so it invalidates the cached results of the
+    tables it writes, whether or not the write succeeds.
+    Args:
+        tables (str): Tables the method writes.
+    """
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(tables)
+        return wrapper
+    return decorate
@@ -0,0 +1,460 @@
+"""
+server.py
+
+Headless JSON HTTP service for PersonalLibrary, so several front desks can share one library
+database. Connections are HTTP/1.1 keep-alive and are served by a fixed pool of worker
+threads, with a capped queue of connections waiting for one; beyond it, clients get 503.
+Single-item writes arriving at the same time are coalesced by a WriteBatcher into one
+transaction through the batch write methods, and /batch/* endpoints accept many items at once.
+
+Run from the repo root:
+    python -m src.server --db library.db --port 8765 --workers 8 --export-dir exports
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import groupby
+from urllib.parse import parse_qs, urlsplit
+
+from src.personal_library import PAGE_SIZE, PersonalLibrary
+from src.query_cache import DEFAULT_CACHE_SIZE
+
+DEFAULT_PORT = 8765
+
+# Worker threads; each keep-alive connection holds one while it is open.
+DEFAULT_WORKERS = 8
+
+# Accepted connections allowed to wait for a free worker; further ones get 503 at once.
+MAX_PENDING_CONNECTIONS = 64
+
+# Directory /export writes into; clients name only the file.
+DEFAULT_EXPORT_DIR = 'exports'
+
+# Seconds an idle keep-alive connection is kept before its worker is released.
+KEEP_ALIVE_TIMEOUT = 5.0
+
+# Largest number of single-item writes committed together by the WriteBatcher.
+MAX_WRITE_BATCH = 256
+
+# Largest request body accepted, in bytes.
+MAX_BODY = 16 * 1024 * 1024
+
+# Response to a connection refused because every worker is busy and the queue is full.
+BUSY_BODY = b'{"error": "Server is busy"}'
+BUSY_RESPONSE = (b'HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n'
+                 b'Content-Length: %d\r\nRetry-After: 1\r\nConnection: close\r\n\r\n' % len(BUSY_BODY)) + BUSY_BODY
+
+
+class HTTPError(Exception):
+    """
+    Error returned to the client with an HTTP status code.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class WriteBatcher:
+    """
+    Coalesces concurrent single-item writes into batch calls. Each request thread submits its
+    write and waits; a background thread takes whatever is queued, up to MAX_WRITE_BATCH items,
+    and applies runs of the same kind with one batch method call, i.e. one transaction and one
+    commit for the whole run. Items keep their submission order.
+    """
+
+    # Kind of write -> PersonalLibrary batch method.
+    METHODS = {
+        'add_book': 'add_books_many',
+        'add_lender': 'add_lenders_many',
+        'borrow': 'borrow_many',
+        'return': 'return_many',
+    }
+
+    def __init__(self, library, max_batch=MAX_WRITE_BATCH):
+        self.library = library
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, *args):
+        """
+        Queue one write and wait for its result.
+        Args:
+            kind (str): One of METHODS.
+            args: Item arguments, as for the batch method.
+        Returns:
+            The ID returned by the batch method for this item.
+        Raises:
+            Exception: The error recorded for this item.
+        """
+        future = Future()
+        self._queue.put((kind, args, future))
+        return future.result()
+
+    def close(self):
+        """
+        Stop the background thread once the queued writes are done.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            while len(pending) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+            for kind, run in groupby(pending, key=lambda item: item[0]):
+                self._apply(kind, list(run))
+
+    def _apply(self, kind, run):
+        # return_many takes bare IDs; the other batch methods take argument tuples.
+        items = [args[0] if kind == 'return' else args for _, args, _ in run]
+        try:
+            result = getattr(self.library, self.METHODS[kind])(items)
+        except Exception as e:
+            for _, _, future in run:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(run)
+        errors = dict(result.errors)
+        for index, (_, _, future) in enumerate(run):
+            if index in errors:
+                future.set_exception(Exception(errors[index]))
+            else:
+                future.set_result(result.ids[index])
+
+
+def _int(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        raise HTTPError(400, f'{name} must be an integer')
+
+
+def _page(rows, next_after_id):
+    return {'items': rows, 'next_after_id': next_after_id}
+
+
+class LibraryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes JSON requests to the server's PersonalLibrary. Handler methods take the URL match,
+    the parsed query string and the decoded JSON body, and return (status, payload).
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle on, keep-alive clients would
+    # wait for a delayed ACK (~40 ms) on every response.
+    disable_nagle_algorithm = True
+
+    ROUTES = (
+        ('GET', r'/books', 'list_books'),
+        ('POST', r'/books', 'add_book'),
+        ('GET', r'/books/available', 'list_available'),
+        ('GET', r'/books/search', 'search_books'),
+        ('GET', r'/books/(\d+)', 'get_book'),
+        ('DELETE', r'/books/(\d+)', 'remove_book'),
+        ('GET', r'/lendors', 'list_lendors'),
+        ('POST', r'/lendors', 'add_lender'),
+        ('GET', r'/lendors/(\d+)', 'get_lender'),
+        ('DELETE', r'/lendors/(\d+)', 'remove_lender'),
+        ('GET', r'/loans', 'list_loans'),
+        ('POST', r'/loans', 'borrow'),
+        ('POST', r'/loans/(\d+)/return', 'return_book'),
+        ('POST', r'/batch/books', 'batch_books'),
+        ('POST', r'/batch/lendors', 'batch_lendors'),
+        ('POST', r'/batch/loans', 'batch_loans'),
+        ('POST', r'/batch/returns', 'batch_returns'),
+        ('GET', r'/reports/most-borrowed', 'most_borrowed'),
+        ('GET', r'/reports/least-borrowed', 'least_borrowed'),
+        ('POST', r'/export', 'export'),
+        ('GET', r'/stats', 'stats'),
+    )
+    COMPILED_ROUTES = tuple((verb, re.compile(pattern + '$'), name) for verb, pattern, name in ROUTES)
+
+    @property
+    def library(self):
+        return self.server.library
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def dispatch(self, verb):
+        url = urlsplit(self.path)
+        try:
+            body = self.read_body()
+            for route_verb, pattern, name in self.COMPILED_ROUTES:
+                match = pattern.match(url.path)
+                if match and route_verb == verb:
+                    status, payload = getattr(self, name)(match, parse_qs(url.query), body)
+                    break
+            else:
+                raise HTTPError(404, f'No route for {verb} {url.path}')
+        except HTTPError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        self.send_json(status, payload)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            raise HTTPError(413, 'Request body too large')
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise HTTPError(400, 'Request body is not valid JSON')
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def field(self, body, name):
+        if not isinstance(body, dict) or name not in body:
+            raise HTTPError(400, f'Missing field: {name}')
+        return body[name]
+
+    def items(self, body, size=None):
+        """
+        The body's items: lists of size values each, or integer IDs when size is None.
+        """
+        items = self.field(body, 'items')
+        if not isinstance(items, list):
+            raise HTTPError(400, 'items must be a list')
+        for index, item in enumerate(items):
+            if size is None:
+                if not isinstance(item, int) or isinstance(item, bool):
+                    raise HTTPError(400, f'items[{index}] must be an integer ID')
+            elif not isinstance(item, list) or len(item) != size:
+                raise HTTPError(400, f'items[{index}] must be a list of {size} values')
+        return items
+
+    def found(self, row, what):
+        if row is None:
+            raise HTTPError(404, f'{what} not found')
+        return 200, row
+
+    # Books
+
+    def list_books(self, match, query, body):
+        return 200, _page(*self.library.get_books_page(_int(query, 'after_id', 0), _int(query, 'limit', PAGE_SIZE)))
+
+    def list_available(self, match, query, body):
+        return 200, _page(*self.library.get_books_not_borrowed_page(
+            _int(query, 'after_id', 0), _int(query, 'limit', PAGE_SIZE)))
+
+    def search_books(self, match, query, body):
+        return 200, {'items': self.library.search_books(query.get('q', [''])[0], _int(query, 'limit', 20))}
+
+    def get_book(self, match, query, body):
+        return self.found(self.library.get_book_details(int(match.group(1))), 'Book')
+
+    def add_book(self, match, query, body):
+        book_id = self.server.batcher.submit('add_book', self.field(body, 'title'), self.field(body, 'author'))
+        return 201, {'id': book_id}
+
+    def remove_book(self, match, query, body):
+        self.library.remove_book(int(match.group(1)))
+        return 200, {'removed': int(match.group(1))}
+
+    # Lenders
+
+    def list_lendors(self, match, query, body):
+        return 200, _page(*self.library.get_lendors_page(_int(query, 'after_id', 0), _int(query, 'limit', PAGE_SIZE)))
+
+    def get_lender(self, match, query, body):
+        return self.found(self.library.get_lendor_details(int(match.group(1))), 'Lender')
+
+    def add_lender(self, match, query, body):
+        lendor_id = self.server.batcher.submit('add_lender', self.field(body, 'name'),
+                                               body.get('address'), body.get('mobile'))
+        return 201, {'id': lendor_id}
+
+    def remove_lender(self, match, query, body):
+        self.library.remove_lender(int(match.group(1)))
+        return 200, {'removed': int(match.group(1))}
+
+    # Loans
+
+    def list_loans(self, match, query, body):
+        return 200, _page(*self.library.get_books_borrowed_with_lender_details_page(
+            _int(query, 'after_id', 0), _int(query, 'limit', PAGE_SIZE)))
+
+    def borrow(self, match, query, body):
+        try:
+            borrowed_id = self.server.batcher.submit('borrow', self.field(body, 'lendor_id'), self.field(body, 'book_id'))
+        except HTTPError:
+            raise
+        except Exception as e:
+            raise HTTPError(409, str(e))
+        return 201, {'id': borrowed_id}
+
+    def return_book(self, match, query, body):
+        try:
+            self.server.batcher.submit('return', int(match.group(1)))
+        except Exception as e:
+            raise HTTPError(404, str(e))
+        return 200, {'returned': int(match.group(1))}
+
+    # Batches
+
+    def batch_result(self, result):
+        return 200, {'ids': result.ids, 'errors': result.errors}
+
+    def batch_books(self, match, query, body):
+        return self.batch_result(self.library.add_books_many(self.items(body, 2)))
+
+    def batch_lendors(self, match, query, body):
+        return self.batch_result(self.library.add_lenders_many(self.items(body, 3)))
+
+    def batch_loans(self, match, query, body):
+        return self.batch_result(self.library.borrow_many(self.items(body, 2)))
+
+    def batch_returns(self, match, query, body):
+        return self.batch_result(self.library.return_many(self.items(body)))
+
+    # Reports and maintenance
+
+    def most_borrowed(self, match, query, body):
+        return 200, {'items': self.library.top_borrowed(_int(query, 'k', 10))}
+
+    def least_borrowed(self, match, query, body):
+        return 200, {'items': self.library.bottom_borrowed(_int(query, 'k', 10))}
+
+    def export(self, match, query, body):
+        exports = {'json': self.library.export_to_json, 'ndjson': self.library.export_to_ndjson,
+                   'xls': self.library.export_to_excel}
+        file_format = body.get('format', 'ndjson') if isinstance(body, dict) else None
+        if file_format not in exports:
+            raise HTTPError(400, f"format must be one of {', '.join(exports)}")
+        name = self.field(body, 'path')
+        # Only a file name is accepted, so clients cannot write outside the export directory.
+        if (not isinstance(name, str) or name in ('', '.', '..') or os.path.basename(name) != name
+                or (os.path.altsep and os.path.altsep in name)):
+            raise HTTPError(400, 'path must be a file name, without directories')
+        os.makedirs(self.server.export_dir, exist_ok=True)
+        message = exports[file_format](os.path.join(self.server.export_dir, name))
+        return (500 if message.startswith('Export failed') else 200), {'message': message}
+
+    def stats(self, match, query, body):
+        cache, instrumentation = self.library.cache, self.library.instrumentation
+        return 200, {'write_batches': self.server.batcher.batches, 'batched_writes': self.server.batcher.items,
+                     'cache': cache.stats() if cache is not None else None,
+                     'instrumentation': instrumentation.stats() if instrumentation is not None else None}
+
+
+class LibraryServer(HTTPServer):
+    """
+    HTTP server that hands each accepted connection to a fixed thread pool. At most
+    max_pending accepted connections wait for a worker; beyond that, connections are answered
+    with 503 and closed, so a burst cannot build an unbounded backlog.
+    """
+    daemon_threads = True
+
+    def __init__(self, library, address=('127.0.0.1', DEFAULT_PORT), workers=DEFAULT_WORKERS, verbose=False,
+                 export_dir=DEFAULT_EXPORT_DIR, max_pending=MAX_PENDING_CONNECTIONS):
+        """
+        Args:
+            library (PersonalLibrary): Library to serve.
+            address (tuple): (host, port) to listen on; port 0 picks a free port.
+            workers (int): Connections served at the same time.
+            verbose (bool): Log every request to stderr.
+            export_dir (str): Directory /export writes files into.
+            max_pending (int): Accepted connections that may wait for a worker.
+        """
+        self.library = library
+        self.verbose = verbose
+        self.export_dir = export_dir
+        self.batcher = WriteBatcher(library)
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='library-http')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        super().__init__(address, LibraryRequestHandler)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._workers.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._workers.shutdown(wait=True)
+        self.batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a PersonalLibrary database as a JSON HTTP API.')
+    parser.add_argument('--db', default='library.db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--export-dir', default=DEFAULT_EXPORT_DIR, help='Directory /export writes files into.')
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--slow-ms', type=float, help='Instrument the library; /stats then reports method and '
+                                                     'SQL timings and statements at least this slow.')
+    args = parser.parse_args()
+    library = PersonalLibrary(args.db, max_readers=args.workers, cache_size=DEFAULT_CACHE_SIZE)
+    if args.slow_ms is not None:
+        library.enable_instrumentation(args.slow_ms)
+    server = LibraryServer(library, (args.host, args.port), args.workers, args.verbose, args.export_dir)
+    print(f'Serving {args.db} on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        library.close()
+
+
+if __name__ == '__main__':
+    main()
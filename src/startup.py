@@ -0,0 +1,119 @@
+"""
+startup.py
+
+Startup helpers for the Kivy app. StartupTimer records named phases (imports, build, first frame,
+library open, screen builds) against one start time so time-to-main-menu can be reported and
+tracked. DeferredLibrary opens the PersonalLibrary on a background thread, so connecting and
+checking the schema do not delay the first frame; attribute access waits until it is open.
+"""
+import threading
+import time
+
+
+class StartupTimer:
+    """
+    Milliseconds elapsed from a start time to each named phase. Phases may be marked from any
+    thread; a phase marked twice keeps its first time.
+    """
+
+    def __init__(self, start=None):
+        """
+        Args:
+            start (float): time.perf_counter() value to measure from; defaults to now.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """
+        Record that a phase finished now.
+        Returns:
+            float: Milliseconds since the start.
+        """
+        elapsed = (time.perf_counter() - self.start) * 1e3
+        with self._lock:
+            return self._phases.setdefault(phase, elapsed)
+
+    def has(self, phase):
+        return phase in self._phases
+
+    def phases(self):
+        """
+        Returns:
+            dict: Phase -> milliseconds since the start, in the order the phases finished.
+        """
+        with self._lock:
+            return dict(sorted(self._phases.items(), key=lambda item: item[1]))
+
+    def report(self):
+        """
+        Returns:
+            str: One "phase: ms" line per phase.
+        """
+        return '\n'.join(f'{phase}: {ms:.1f} ms' for phase, ms in self.phases().items())
+
+
+class DeferredLibrary:
+    """
+    Stand-in for a PersonalLibrary that is opened later on a worker thread.
+    Any attribute access waits for the open to finish and is then forwarded to the library;
+    if the open failed, the access raises its error.
+    """
+
+    def __init__(self, factory, on_open=None):
+        """
+        Args:
+            factory (callable): Returns the opened library; runs on the worker thread.
+            on_open (callable): Optional on_open(library, error) callback, called on the worker
+                thread once the open finished or failed.
+        """
+        self._factory = factory
+        self._on_open = on_open
+        self._library = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def opened(self):
+        """True once the open has finished, successfully or not."""
+        return self._ready.is_set()
+
+    def open_async(self):
+        """
+        Start opening the library on a daemon thread. Calling it again does nothing.
+        """
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._open, name='library-open', daemon=True)
+                self._thread.start()
+
+    def _open(self):
+        try:
+            self._library = self._factory()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
+        if self._on_open is not None:
+            self._on_open(self._library, self._error)
+
+    def wait(self, timeout=None):
+        """
+        Start the open if needed and wait for it.
+        Returns:
+            PersonalLibrary: The opened library.
+        Raises:
+            TimeoutError: If the library is not open after timeout seconds.
+        """
+        self.open_async()
+        if not self._ready.wait(timeout):
+            raise TimeoutError('Library is still opening')
+        if self._error is not None:
+            raise self._error
+        return self._library
+
+    def __getattr__(self, name):
+        return getattr(self.wait(), name)
@@ -0,0 +1,113 @@
+"""
+test_async_library.py
+
+Unit tests for AsyncPersonalLibrary. Tests that every public PersonalLibrary method has an
+awaitable counterpart, that reads and writes give the same results as the blocking library,
+that writes are serialized, and that async iteration lets other coroutines run.
+"""
+import asyncio
+import inspect
+import os
+import unittest
+from src.async_library import AsyncPersonalLibrary
+from src.personal_library import PersonalLibrary
+
+
+class TestAsyncPersonalLibrary(unittest.TestCase):
+    """
+    Unit tests for AsyncPersonalLibrary.
+    Creates a temporary database for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_async_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+
+    def tearDown(self):
+        """
+        Clean up the test database after each test.
+        """
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def run_async(self, test):
+        async def run():
+            async with AsyncPersonalLibrary(self.test_db) as lib:
+                return await test(lib)
+        return asyncio.run(run())
+
+    def test_every_public_method_is_wrapped(self):
+        """
+        Test that each public PersonalLibrary method has an awaitable or async-iterator version.
+        """
+        for name, _ in inspect.getmembers(PersonalLibrary, inspect.isfunction):
+            if name.startswith('_') or name.startswith('create_') or name == 'close':
+                continue
+            method = getattr(AsyncPersonalLibrary, name, None)
+            self.assertIsNotNone(method, name)
+            if name.startswith('iter_'):
+                self.assertFalse(inspect.iscoroutinefunction(method), name)
+            else:
+                self.assertTrue(inspect.iscoroutinefunction(method), name)
+
+    def test_reads_and_writes(self):
+        """
+        Test borrowing and listing through the awaitable methods.
+        """
+        async def scenario(lib):
+            book_id = await lib.add_book('Async Book', 'Author')
+            lendor_id = await lib.add_lender('Lender', 'Addr', '123')
+            await lib.borrow_book(lendor_id, book_id)
+            with self.assertRaises(Exception):
+                await lib.borrow_book(lendor_id, book_id)
+            borrowed, available = await asyncio.gather(lib.get_books_borrowed_with_lender_details(),
+                                                       lib.get_books_not_borrowed())
+            return book_id, borrowed, available
+
+        book_id, borrowed, available = self.run_async(scenario)
+        self.assertEqual(borrowed[0][0], book_id)
+        self.assertEqual(available, [])
+
+    def test_concurrent_writes_are_serialized(self):
+        """
+        Test that many concurrent borrows of one book produce exactly one active loan.
+        """
+        async def scenario(lib):
+            book_id = await lib.add_book('Contested', 'Author')
+            lendors = await lib.add_lenders_many((f'L{i}', None, None) for i in range(20))
+            results = await asyncio.gather(*(lib.borrow_book(l, book_id) for l in lendors.ids),
+                                           return_exceptions=True)
+            return [r for r in results if not isinstance(r, Exception)]
+
+        self.assertEqual(len(self.run_async(scenario)), 1)
+
+    def test_async_iteration_yields_to_other_coroutines(self):
+        """
+        Test that an async listing returns every row while a concurrent coroutine keeps running.
+        """
+        async def scenario(lib):
+            await lib.add_books_many((f'Book {i}', 'Author') for i in range(1000))
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            ids = [row[0] async for row in lib.iter_books(batch_size=50)]
+            task.cancel()
+            return ids, len(ticks)
+
+        ids, ticks = self.run_async(scenario)
+        self.assertEqual(ids, list(range(1, 1001)))
+        self.assertGreater(ticks, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
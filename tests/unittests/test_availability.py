@@ -0,0 +1,107 @@
+"""
+test_availability.py
+
+Unit tests for the PersonalLibrary availability index. Tests that is_available, count_available
+and available_ids agree with get_books_not_borrowed across single and batch writes, that
+whole-table writes and commits from other connections trigger a rebuild, and the memory report.
+"""
+import os
+import sqlite3
+import unittest
+from src.personal_library import PersonalLibrary
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+    """
+    Unit tests for AvailabilityIndex through PersonalLibrary.
+    Creates a temporary database for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_availability_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.lib = PersonalLibrary(self.test_db)
+        self.lib.add_books_many((f'Book {i}', 'Author') for i in range(20))
+        self.lendor_id = self.lib.add_lender('Lender', 'Addr', '123')
+
+    def tearDown(self):
+        """
+        Clean up the test database after each test.
+        """
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def assertMatchesQuery(self):
+        expected = [row[0] for row in self.lib.get_books_not_borrowed()]
+        self.assertEqual(self.lib.available_ids(), expected)
+        self.assertEqual(self.lib.count_available(), len(expected))
+
+    def test_tracks_single_and_batch_writes(self):
+        """
+        Test that borrow, return, add and remove keep the index in step without rebuilding.
+        """
+        self.assertEqual(self.lib.count_available(), 20)
+        loan = self.lib.borrow_book(self.lendor_id, 3)
+        self.assertFalse(self.lib.is_available(3))
+        self.assertTrue(self.lib.is_available(4))
+        loans = self.lib.borrow_many([(self.lendor_id, 5), (self.lendor_id, 3), (self.lendor_id, 6)])
+        self.assertEqual(len(loans.errors), 1)
+        self.lib.remove_book(7)
+        self.lib.add_books_many([('New', 'Author')] * 3)
+        new_id = self.lib.add_book('Late', 'Author')
+        self.assertTrue(self.lib.is_available(new_id))
+        self.assertFalse(self.lib.is_available(7))
+        self.assertFalse(self.lib.is_available(10_000))
+        self.assertMatchesQuery()
+        self.lib.return_borrowed_book(loan)
+        self.lib.return_many([loan] + [i for i in loans.ids if i is not None])
+        self.assertTrue(self.lib.is_available(3))
+        self.assertMatchesQuery()
+        self.assertEqual(self.lib.available_ids(after_id=20, limit=2), [21, 22])
+        self.assertEqual(self.lib.availability.rebuilds, 1)
+
+    def test_whole_table_writes_rebuild(self):
+        """
+        Test that clearing and bulk loading drop the index and the next query rebuilds it.
+        """
+        self.lib.borrow_book(self.lendor_id, 1)
+        self.assertEqual(self.lib.count_available(), 19)
+        self.lib.clear_all_tables()
+        self.assertEqual(self.lib.count_available(), 0)
+        self.lib.bulk_load([('books', [(1, 'A', 'B', '2024-01-01'), (9, 'C', 'D', '2024-01-01')]),
+                            ('lendors', [(1, 'L', None, None)]),
+                            ('borrowed', [(1, 1, 9, 1)])])
+        self.assertEqual(self.lib.available_ids(), [1])
+        self.assertEqual(self.lib.availability.rebuilds, 3)
+
+    def test_external_write_detected(self):
+        """
+        Test that a commit from another connection triggers a rebuild.
+        """
+        self.assertTrue(self.lib.is_available(2))
+        other = sqlite3.connect(self.test_db)
+        other.execute('INSERT INTO borrowed (lendor_id, book_id, returned) VALUES (?, 2, 1)', (self.lendor_id,))
+        other.commit()
+        other.close()
+        self.assertFalse(self.lib.is_available(2))
+        self.assertMatchesQuery()
+
+    def test_memory_report(self):
+        """
+        Test that the memory report covers every book id at one bit each.
+        """
+        self.lib.count_available()
+        memory = self.lib.availability.memory()
+        self.assertGreaterEqual(memory['capacity'], 21)
+        self.assertEqual(memory['available'], 20)
+        self.assertEqual(memory['bitmap_bytes'], memory['capacity'] // 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
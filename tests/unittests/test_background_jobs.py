@@ -0,0 +1,112 @@
+"""
+test_background_jobs.py
+
+Unit tests for BackgroundJob running PersonalLibrary export/import/clear operations on a worker
+thread. Tests progress reporting, that cancellation rolls the operation back, and that a cancel
+arriving after the last progress report leaves the job finished.
+"""
+import os
+import unittest
+from src.background_jobs import CANCELLED, FAILED, FINISHED, BackgroundJob
+from src.personal_library import PersonalLibrary
+
+
+class TestBackgroundJobs(unittest.TestCase):
+    """
+    Unit tests for BackgroundJob.
+    Creates a temporary database with a few thousand books for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_jobs_library.db'
+        self.export_path = 'test_jobs_export.ndjson'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.lib = PersonalLibrary(self.test_db)
+        self.lib.conn.executemany('INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)',
+                                  ((f'T{i}', 'A', '2025-01-01') for i in range(2500)))
+        self.lib.conn.commit()
+        self.lib.add_lender('Lender', 'Addr', '123')
+
+    def tearDown(self):
+        """
+        Clean up the test database and export file after each test.
+        """
+        self.lib.close()
+        for path in (self.test_db, self.export_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_export_reports_progress(self):
+        """
+        Test that an export job reports rows and tables and finishes with the library result.
+        """
+        updates = []
+        job = BackgroundJob('Export', lambda progress: self.lib.export_to_ndjson(self.export_path, progress),
+                            on_progress=lambda j: updates.append((j.rows_processed, j.tables_done)))
+        job.start().join(timeout=10)
+        self.assertEqual(job.status, FINISHED)
+        self.assertTrue(job.result.startswith('Exported to'))
+        self.assertEqual(updates[-1], (2501, 3))
+        self.assertEqual(job.rows_processed, 2501)
+
+    def test_cancelled_import_rolls_back(self):
+        """
+        Test that cancelling an import mid-way leaves the existing tables untouched.
+        """
+        self.lib.export_to_ndjson(self.export_path)
+        self.lib.add_book('Only after export', 'A')
+
+        def cancel_after_first_batch(job):
+            if job.rows_processed >= 1000:
+                job.cancel()
+
+        job = BackgroundJob('Import', lambda progress: self.lib.import_from_json(
+            self.export_path, batch_size=500, progress=progress), on_progress=cancel_after_first_batch)
+        job.start().join(timeout=10)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(len(self.lib.get_all_books()), 2501)
+
+    def test_cancelled_clear_rolls_back(self):
+        """
+        Test that cancelling a clear keeps every row.
+        """
+        job = BackgroundJob('Clear', lambda progress: self.lib.clear_all_tables(progress))
+        job.cancel()
+        job.start().join(timeout=10)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(len(self.lib.get_all_books()), 2500)
+        self.assertEqual(len(self.lib.get_all_lendors()), 1)
+
+    def test_late_cancel_still_finishes(self):
+        """
+        Test that a job cancelled after its last progress report ends FINISHED with its result,
+        or FAILED if it raised, rather than CANCELLED.
+        """
+        def export_then_cancel(progress):
+            result = self.lib.export_to_ndjson(self.export_path, progress)
+            job.cancel()
+            return result
+
+        job = BackgroundJob('Export', export_then_cancel)
+        job.start().join(timeout=10)
+        self.assertTrue(job.cancelled)
+        self.assertFalse(job.stopped)
+        self.assertEqual(job.status, FINISHED)
+        self.assertTrue(job.result.startswith('Exported to'))
+
+        def fail_after_cancel(progress):
+            failing.cancel()
+            raise OSError('disk full')
+
+        failing = BackgroundJob('Export', fail_after_cancel)
+        failing.start().join(timeout=10)
+        self.assertEqual(failing.status, FAILED)
+        self.assertIsInstance(failing.error, OSError)
+
+
+if __name__ == '__main__':
+    unittest.main()
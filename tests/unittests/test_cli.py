@@ -0,0 +1,159 @@
+"""
+test_cli.py
+
+Unit tests for the CSV command line. Tests that imports are written in batches and report
+bad rows by line number, that a missing column is rejected, that an export can be imported
+back with its IDs, dates and loan history, and that main() returns the documented exit codes.
+"""
+import contextlib
+import io
+import os
+import unittest
+from src.cli import EXPORT_ITERATORS, export_csv, import_csv, main
+from src.personal_library import PersonalLibrary
+
+
+class TestCli(unittest.TestCase):
+    """
+    Unit tests for import_csv, export_csv and main.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_cli_library.db'
+        self.csv_path = 'test_cli_books.csv'
+        self._remove()
+        self.library = PersonalLibrary(self.test_db)
+
+    def tearDown(self):
+        """
+        Close the library and clean up the test files after each test.
+        """
+        self.library.close()
+        self._remove()
+
+    def _remove(self):
+        for path in (self.test_db, self.test_db + '-wal', self.test_db + '-shm', self.csv_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_import_books_in_batches(self):
+        """
+        Test that books are imported in batches of batch_size and linked to their titles.
+        """
+        rows = ''.join(f'Book {i},Author {i % 3}\n' for i in range(5))
+        stats = import_csv(self.library, 'books', io.StringIO('title,author\n' + rows), batch_size=2)
+        self.assertEqual((stats['rows'], stats['written'], stats['failed'], stats['batches']), (5, 5, 0, 3))
+        self.assertEqual(len(self.library.get_all_books()), 5)
+        self.assertEqual(self.library.find_title('Book 4', 'Author 1')[3], 1)
+
+    def test_bad_rows_reported_by_line(self):
+        """
+        Test that unparsable and rejected rows are skipped and reported with their CSV line numbers.
+        """
+        lendor_id = self.library.add_lender('Alice', 'Main St', '555')
+        book_id = self.library.add_book('Dune', 'Frank Herbert')
+        loans = f'lendor_id,book_id\n{lendor_id},{book_id}\nx,{book_id}\n{lendor_id},{book_id}\n'
+        errors = []
+        stats = import_csv(self.library, 'borrowed', io.StringIO(loans),
+                           on_error=lambda line, message: errors.append(line))
+        self.assertEqual((stats['written'], stats['failed']), (1, 2))
+        self.assertEqual(errors, [3, 4])
+        self.assertEqual(len(self.library.get_borrowed_page()[0]), 1)
+
+    def test_errors_reported_in_line_order(self):
+        """
+        Test that parse and write errors are reported together in line order, batch by batch.
+        """
+        lendor_id = self.library.add_lender('Alice', 'Main St', '555')
+        book_ids = self.library.add_books_many([('Dune', 'Frank Herbert'), ('Emma', 'Jane Austen')]).ids
+        loans = (f'lendor_id,book_id\n{lendor_id},{book_ids[0]}\n{lendor_id},{book_ids[0]}\nx,1\n'
+                 f'{lendor_id},{book_ids[1]}\n{lendor_id},{book_ids[1]}\n')
+        errors = []
+        stats = import_csv(self.library, 'borrowed', io.StringIO(loans), batch_size=3,
+                           on_error=lambda line, message: errors.append(line))
+        self.assertEqual((stats['written'], stats['failed'], stats['batches']), (2, 3, 2))
+        self.assertEqual(errors, [3, 4, 6])
+
+    def test_missing_column(self):
+        """
+        Test that a header without a required column raises ValueError before anything is written.
+        """
+        with self.assertRaises(ValueError):
+            import_csv(self.library, 'lendors', io.StringIO('name,mobile\nAlice,555\n'))
+        self.assertEqual(self.library.get_all_lendors(), [])
+
+    def test_export_round_trip(self):
+        """
+        Test that an exported table, including empty values, imports back into another library.
+        """
+        self.library.add_lenders_many([('Alice', 'Main St', '555'), ('Bob', None, '556')])
+        out = io.StringIO()
+        self.assertEqual(export_csv(self.library, 'lendors', out, batch_size=1)['rows'], 2)
+        self.library.clear_all_tables()
+        stats = import_csv(self.library, 'lendors', io.StringIO(out.getvalue()))
+        self.assertEqual(stats['written'], 2)
+        self.assertEqual([row[1:] for row in self.library.get_all_lendors()],
+                         [('Alice', 'Main St', '555'), ('Bob', None, '556')])
+
+    def test_export_import_round_trip_keeps_ids(self):
+        """
+        Test that exported books, lenders and loans, including returned loans and gaps in the IDs,
+        import into an empty library unchanged.
+        """
+        lendor_ids = self.library.add_lenders_many([('Alice', 'Main St', '555'), ('Bob', None, '556')]).ids
+        book_ids = self.library.add_books_many([('Dune', 'Frank Herbert'), ('Emma', 'Jane Austen'),
+                                                ('Ulysses', 'James Joyce')]).ids
+        self.library.remove_lender(lendor_ids[0])
+        self.library.remove_book(book_ids[0])
+        first = self.library.borrow_book(lendor_ids[1], book_ids[1])
+        self.library.return_borrowed_book(first)
+        self.library.borrow_book(lendor_ids[1], book_ids[1])
+        with self.library.pool.writer() as conn:
+            conn.execute("UPDATE books SET added_date = '2001-02-03' WHERE id = ?", (book_ids[2],))
+            conn.commit()
+        exported = {}
+        for table in ('books', 'lendors', 'borrowed'):
+            out = io.StringIO()
+            export_csv(self.library, table, out)
+            exported[table] = (out.getvalue(), list(getattr(self.library, EXPORT_ITERATORS[table])()))
+        self.library.close()
+        self._remove()
+        self.library = PersonalLibrary(self.test_db)
+        for table, (text, rows) in exported.items():
+            stats = import_csv(self.library, table, io.StringIO(text))
+            self.assertEqual((stats['written'], stats['failed']), (len(rows), 0))
+            self.assertEqual(list(getattr(self.library, EXPORT_ITERATORS[table])()), rows)
+        self.assertFalse(self.library.is_available(book_ids[1]))
+        self.assertEqual(self.library.find_title('Emma', 'Jane Austen')[3], 1)
+        with self.assertRaises(ValueError):
+            import_csv(self.library, 'books', io.StringIO(exported['books'][0]), reject_duplicates=True)
+
+    def test_main_exit_codes(self):
+        """
+        Test that main returns 0 for a clean import, 1 when rows fail and 2 for a usage error.
+        """
+        self.library.close()
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            f.write('title,author\nDune,Frank Herbert\nDune,Frank Herbert\n')
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(['--db', self.test_db, 'import', 'books', self.csv_path]), 0)
+            self.assertEqual(main(['--db', self.test_db, 'import', 'books', self.csv_path,
+                                   '--reject-duplicates']), 1)
+            with self.assertRaises(SystemExit) as raised:
+                main(['--db', self.test_db, 'import', 'shelves', self.csv_path])
+            self.assertEqual(raised.exception.code, 2)
+        self.assertIn('line 2: ', stderr.getvalue())
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(['--db', self.test_db, 'export', 'books']), 0)
+        self.assertEqual(stdout.getvalue().splitlines()[0], 'id,title,author,added_date')
+        self.assertEqual(len(stdout.getvalue().splitlines()), 3)
+        self.library = PersonalLibrary(self.test_db)
+
+
+if __name__ == '__main__':
+    unittest.main()
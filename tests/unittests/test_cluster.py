@@ -0,0 +1,107 @@
+"""
+test_cluster.py
+
+Unit tests for LibraryCluster. Tests routing single-branch operations by branch key, and that
+fan-out search, availability and most/least borrowed queries merge every shard's results and
+report per-shard metadata, including a failing shard.
+"""
+import os
+import unittest
+from src.cluster import LibraryCluster
+
+
+class TestLibraryCluster(unittest.TestCase):
+    """
+    Unit tests for LibraryCluster.
+    Creates a temporary database per branch for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up fresh branch databases before each test.
+        """
+        self.dbs = {branch: f'test_cluster_{branch}.db' for branch in ('north', 'south', 'east')}
+        self.remove_dbs()
+        self.cluster = LibraryCluster(self.dbs)
+
+    def tearDown(self):
+        """
+        Close the cluster and clean up the branch databases after each test.
+        """
+        self.cluster.close()
+        self.remove_dbs()
+
+    def remove_dbs(self):
+        for db in self.dbs.values():
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db + suffix):
+                    os.remove(db + suffix)
+
+    def stock(self):
+        """
+        Add 'Dune' to every branch; borrow it twice in north and once in south, leaving south's copy out.
+        """
+        for branch in self.dbs:
+            self.cluster.add_book(branch, 'Dune', 'Frank Herbert')
+            self.cluster.add_book(branch, f'{branch} guide', 'Local')
+            self.cluster.add_lender(branch, 'Reader', 'Addr', '1')
+        loan = self.cluster.borrow_book('north', 1, 1)
+        self.cluster.return_borrowed_book('north', loan)
+        loan = self.cluster.borrow_book('north', 1, 1)
+        self.cluster.return_borrowed_book('north', loan)
+        self.cluster.borrow_book('south', 1, 1)
+
+    def test_routes_by_branch(self):
+        """
+        Test that routed methods act on the named branch only, and unknown branches are rejected.
+        """
+        self.cluster.add_book('north', 'Only North', 'Author')
+        self.assertEqual(len(self.cluster.get_all_books('north')), 1)
+        self.assertEqual(self.cluster.get_all_books('south'), [])
+        with self.assertRaises(KeyError):
+            self.cluster.get_all_books('west')
+
+    def test_search_across_branches(self):
+        """
+        Test that search merges every branch and available_only skips copies that are out.
+        """
+        self.stock()
+        result = self.cluster.search_books('dune')
+        self.assertEqual(sorted(row[0] for row in result.items), ['east', 'north', 'south'])
+        self.assertEqual(set(result.shards), set(self.dbs))
+        self.assertTrue(all(meta['error'] is None and meta['seconds'] >= 0 for meta in result.shards.values()))
+        available = self.cluster.find_available('dune')
+        self.assertEqual(sorted(row[0] for row in available.items), ['east', 'north'])
+        self.assertEqual(available.shards['south']['rows'], 0)
+
+    def test_most_and_least_borrowed(self):
+        """
+        Test that most/least borrowed rank books from all branches together.
+        """
+        self.stock()
+        top = self.cluster.top_borrowed(2).items
+        self.assertEqual([(row[0], row[1], row[4]) for row in top], [('north', 1, 2), ('south', 1, 1)])
+        self.assertEqual(self.cluster.get_most_borrowed_book().items[0][:2], ('north', 1))
+        self.assertEqual(self.cluster.get_least_borrowed_book().items[0][4], 0)
+        counts = dict(self.cluster.count_available().items)
+        self.assertEqual(counts, {'north': 2, 'south': 1, 'east': 2})
+
+    def test_failing_shard_is_reported(self):
+        """
+        Test that a shard error is reported in the metadata while the other shards still answer.
+        """
+        self.stock()
+        east = self.cluster.shard('east')
+
+        def query(library):
+            if library is east:
+                raise RuntimeError('shard offline')
+            return library.search_books('dune')
+
+        result = self.cluster.fan_out(query)
+        self.assertEqual(result.shards['east']['error'], 'shard offline')
+        self.assertEqual(sorted(result.items), ['north', 'south'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+test_connection_pool.py
+
+Unit tests for ConnectionPool and multi-threaded use of PersonalLibrary. Tests WAL mode,
+read-only pooled connections, and that readers are not blocked by an open write transaction.
+"""
+import os
+import sqlite3
+import threading
+import unittest
+from src.personal_library import PersonalLibrary
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    Unit tests for the connection pool behind PersonalLibrary.
+    Creates a temporary database for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_pool_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.lib = PersonalLibrary(self.test_db, max_readers=2)
+
+    def tearDown(self):
+        """
+        Clean up the test database after each test.
+        """
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def test_wal_mode(self):
+        """
+        Test that the database is switched to WAL journal mode.
+        """
+        mode = self.lib.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_readers_are_read_only(self):
+        """
+        Test that pooled reader connections reject writes.
+        """
+        with self.lib.pool.reader() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO lendors (name) VALUES ('x')")
+
+    def test_nested_reads_reuse_connection(self):
+        """
+        Test that nested reader blocks and reads inside the writer reuse the held connection.
+        """
+        with self.lib.pool.reader() as outer:
+            with self.lib.pool.reader() as inner:
+                self.assertIs(outer, inner)
+        with self.lib.pool.writer() as writer:
+            with self.lib.pool.reader() as conn:
+                self.assertIs(conn, writer)
+
+    def test_reads_not_blocked_by_writer(self):
+        """
+        Test that another thread reads committed data while a write transaction is open.
+        """
+        book_id = self.lib.add_book('Committed', 'Author')
+        results = []
+        with self.lib.pool.writer() as conn:
+            conn.execute("INSERT INTO books (title, author, added_date) VALUES ('Pending', 'A', '2025-01-01')")
+            reader = threading.Thread(target=lambda: results.append(self.lib.get_all_books()))
+            reader.start()
+            reader.join(timeout=5)
+            conn.commit()
+        self.assertFalse(reader.is_alive())
+        self.assertEqual([b[0] for b in results[0]], [book_id])
+        self.assertEqual(len(self.lib.get_all_books()), 2)
+
+    def test_concurrent_writers(self):
+        """
+        Test that writes from several threads are serialized without errors.
+        """
+        def add_books(n):
+            for i in range(20):
+                self.lib.add_book(f'T{n}-{i}', 'Author')
+
+        threads = [threading.Thread(target=add_books, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.lib.get_all_books()), 80)
+
+
+if __name__ == '__main__':
+    unittest.main()
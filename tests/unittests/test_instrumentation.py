@@ -0,0 +1,94 @@
+"""
+test_instrumentation.py
+
+Unit tests for PersonalLibrary query instrumentation. Tests per-method call counts, histograms
+and row counts, traced statement aggregation, the slow-query log with query plans, and that
+disabling restores the uninstrumented library.
+"""
+import os
+import unittest
+from src.personal_library import PersonalLibrary
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Unit tests for Instrumentation through PersonalLibrary.
+    Creates a temporary database for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_instrumentation_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.lib = PersonalLibrary(self.test_db)
+        self.lib.add_books_many((f'Book {i}', 'Author') for i in range(10))
+        self.lendor_id = self.lib.add_lender('Lender', 'Addr', '123')
+
+    def tearDown(self):
+        """
+        Clean up the test database after each test.
+        """
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def test_method_timings(self):
+        """
+        Test call, error and row counts per method, including streamed results.
+        """
+        instrumentation = self.lib.enable_instrumentation()
+        self.lib.get_all_books()
+        self.lib.get_all_books()
+        self.lib.borrow_book(self.lendor_id, 1)
+        with self.assertRaises(Exception):
+            self.lib.borrow_book(self.lendor_id, 1)
+        self.assertEqual(len(list(self.lib.iter_books(batch_size=3))), 10)
+        methods = instrumentation.stats()['methods']
+        self.assertEqual(methods['get_all_books']['calls'], 2)
+        self.assertEqual(methods['get_all_books']['rows'], 20)
+        self.assertEqual(sum(methods['get_all_books']['histogram'].values()), 2)
+        self.assertEqual(methods['borrow_book']['errors'], 1)
+        self.assertEqual(methods['iter_books']['rows'], 10)
+        self.assertEqual(methods['get_books_page']['calls'], 4)
+
+    def test_statements_and_slow_log(self):
+        """
+        Test that traced statements are grouped by shape with the rows they return and write, and
+        slow ones are logged with a plan.
+        """
+        instrumentation = self.lib.enable_instrumentation(slow_ms=0)
+        for book_id in (1, 2, 3):
+            self.lib.get_book_details(book_id)
+        self.lib.add_book('Traced', 'Author')
+        stats = instrumentation.stats()
+        select = stats['statements']['SELECT id, title, author, added_date FROM books WHERE id = ?']
+        self.assertEqual((select['calls'], select['rows'], select['changes']), (3, 3, 0))
+        insert = next(st for sql, st in stats['statements'].items() if sql.startswith('INSERT INTO books'))
+        self.assertGreaterEqual(insert['changes'], 1)
+        self.assertEqual(insert['rows'], 0)
+        lookup = next(e for e in stats['slow_queries'] if e['sql'] == 'SELECT id, title, author, added_date FROM books WHERE id = 1')
+        self.assertEqual(lookup['method'], 'get_book_details')
+        self.assertEqual((lookup['rows'], lookup['changes']), (1, 0))
+        self.assertTrue(any('USING INTEGER PRIMARY KEY' in step for step in lookup['plan']))
+
+    def test_disable_restores_library(self):
+        """
+        Test that disabling returns the final stats and stops recording.
+        """
+        instrumentation = self.lib.enable_instrumentation()
+        self.lib.get_all_books()
+        stats = self.lib.disable_instrumentation()
+        self.assertEqual(stats['methods']['get_all_books']['calls'], 1)
+        self.assertIsNone(self.lib.instrumentation)
+        self.assertNotIn('get_all_books', vars(self.lib))
+        self.lib.get_all_books()
+        self.assertEqual(instrumentation.stats()['methods']['get_all_books']['calls'], 1)
+        self.assertIsNone(self.lib.disable_instrumentation())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,158 @@ class TestPersonalLibrary(unittest.TestCase):
         self.assertIn('Borrowed', xl.sheet_names)
         os.remove(file_path)
 
+    def test_excel_round_trip(self):
+        """
+        Test that an exported workbook imports back to the same rows and records throughput.
+        """
+        file_path = 'test_round_trip.xlsx'
+        book_id = self.lib.add_book('RoundTrip', 'RoundAuthor')
+        lendor_id = self.lib.add_lender('RoundLender', None, '555')
+        self.lib.borrow_book(lendor_id, book_id)
+        self.lib.export_to_excel(file_path)
+        books = self.lib.get_all_books()
+        lendors = self.lib.get_all_lendors()
+        self.lib.add_book('Extra', 'Extra')
+        result = self.lib.import_from_excel(file_path)
+        os.remove(file_path)
+        self.assertEqual(result, "Data imported from Excel and tables overwritten.")
+        self.assertEqual(self.lib.get_all_books(), books)
+        self.assertEqual(self.lib.get_all_lendors(), lendors)
+        self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 1)
+        self.assertEqual(self.lib.last_import_stats['rows'], 3)
+        self.assertGreater(self.lib.last_import_stats['rows_per_sec'], 0)
+
+    def test_xls_named_round_trip(self):
+        """
+        Test that the .xls file names used by the app export and import without pandas.
+        """
+        file_path = 'test_round_trip.xls'
+        self.lib.add_book('XlsBook', 'XlsAuthor')
+        self.lib.add_lender('XlsLender', None, None)
+        self.lib.export_to_excel(file_path)
+        books = self.lib.get_all_books()
+        lendors = self.lib.get_all_lendors()
+        self.lib.clear_all_tables()
+        result = self.lib.import_from_excel(file_path)
+        os.remove(file_path)
+        self.assertEqual(result, "Data imported from Excel and tables overwritten.")
+        self.assertEqual(self.lib.get_all_books(), books)
+        self.assertEqual(self.lib.get_all_lendors(), lendors)
+
+    def test_parallel_excel_import(self):
+        """
+        Test that parsing the sheets in worker processes imports the same tables, titles and
+        search index, and that a sheet that fails to parse leaves the library unchanged.
+        """
+        file_path = 'test_parallel_import.xlsx'
+        book_ids = self.lib.add_books_many([('Dune', 'Frank Herbert'), ('Dune', 'Frank Herbert'),
+                                            ('Emma', 'Jane Austen')]).ids
+        lendor_id = self.lib.add_lender('Alice', None, '555')
+        self.lib.borrow_book(lendor_id, book_ids[1])
+        self.lib.export_to_excel(file_path)
+        books = self.lib.get_all_books()
+        lendors = self.lib.get_all_lendors()
+        self.lib.clear_all_tables()
+        try:
+            from openpyxl import load_workbook
+            # Sheets record their size, so workers can open the workbook without reading every sheet.
+            workbook = load_workbook(file_path, read_only=True)
+            self.assertEqual((workbook['Books'].max_row, workbook['Borrowed'].max_row), (4, 2))
+            workbook.close()
+
+            result = self.lib.import_from_excel(file_path, workers=2)
+            self.assertEqual(result, "Data imported from Excel and tables overwritten.")
+            self.assertEqual(self.lib.get_all_books(), books)
+            self.assertEqual(self.lib.get_all_lendors(), lendors)
+            self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 1)
+            self.assertEqual(self.lib.last_import_stats['duplicates'], 1)
+            self.assertEqual(self.lib.find_title('Dune', 'Frank Herbert')[3], 2)
+            self.assertEqual([b[0] for b in self.lib.search_books('emma')], [book_ids[2]])
+
+            workbook = load_workbook(file_path)
+            workbook['Borrowed']['B1'] = 'lender'
+            workbook.save(file_path)
+            result = self.lib.import_from_excel(file_path, workers=2)
+            self.assertTrue(result.startswith("Error importing from Excel"))
+            self.assertEqual(self.lib.get_all_books(), books)
+        finally:
+            os.remove(file_path)
+
+    def test_import_does_not_load_pandas(self):
+        """
+        Test that importing the library module does not import pandas or openpyxl.
+        """
+        import subprocess
+        import sys
+        code = ("import sys, src.personal_library; "
+                "print('pandas' in sys.modules or 'openpyxl' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_bulk_load_rolls_back_on_error(self):
+        """
+        Test that a failing bulk load leaves the existing data and indexes untouched.
+        """
+        self.lib.add_book('Keep', 'Me')
+        with self.assertRaises(Exception):
+            self.lib.bulk_load([('books', [(1, 'A', 'B', '2025-01-01'), (1, 'Dup', 'Id', '2025-01-01')])])
+        self.assertEqual(self.lib.get_all_books()[0][1], 'Keep')
+        cursor = self.lib.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_borrowed_%'")
+        self.assertEqual(len(cursor.fetchall()), 2)
+
+    def test_ndjson_round_trip(self):
+        """
+        Test that an NDJSON export imports back to the same rows through import_from_json.
+        """
+        file_path = 'test_export.ndjson'
+        book_id = self.lib.add_book('Stream', 'Author')
+        lendor_id = self.lib.add_lender('Reader', 'Addr', '123')
+        self.lib.borrow_book(lendor_id, book_id)
+        self.lib.export_to_ndjson(file_path)
+        books = self.lib.get_all_books()
+        borrowed = self.lib.get_books_borrowed_with_lender_details()
+        self.lib.clear_all_tables()
+        result = self.lib.import_from_json(file_path, batch_size=1)
+        os.remove(file_path)
+        self.assertEqual(result, "Data imported from JSON and tables overwritten.")
+        self.assertEqual(self.lib.get_all_books(), books)
+        self.assertEqual(self.lib.get_books_borrowed_with_lender_details(), borrowed)
+
+    def test_import_interleaved_ndjson(self):
+        """
+        Test that NDJSON records from different tables may be interleaved.
+        """
+        import json
+        file_path = 'test_interleaved.ndjson'
+        records = [
+            {'table': 'books', 'id': 1, 'title': 'T1', 'author': 'A1', 'added_date': '2025-01-01'},
+            {'table': 'lendors', 'id': 1, 'name': 'L1', 'address': None, 'mobile': None},
+            {'table': 'books', 'id': 2, 'title': 'T2', 'author': 'A2', 'added_date': '2025-01-01'},
+            {'table': 'borrowed', 'id': 1, 'lendor_id': 1, 'book_id': 2, 'returned': 1},
+        ]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(json.dumps(r) for r in records) + '\n')
+        self.lib.import_from_json(file_path)
+        os.remove(file_path)
+        self.assertEqual(len(self.lib.get_all_books()), 2)
+        self.assertEqual(self.lib.last_import_stats['tables'], {'books': 2, 'lendors': 1, 'borrowed': 1})
+        self.assertEqual([b[0] for b in self.lib.get_books_not_borrowed()], [1])
+
+    def test_import_legacy_json(self):
+        """
+        Test that the export_to_json layout still imports through import_from_json.
+        """
+        file_path = 'test_export.json'
+        self.lib.add_book('Legacy', 'Author')
+        self.lib.export_to_json(file_path)
+        books = self.lib.get_all_books()
+        self.lib.clear_all_tables()
+        result = self.lib.import_from_json(file_path)
+        os.remove(file_path)
+        self.assertEqual(result, "Data imported from JSON and tables overwritten.")
+        self.assertEqual(self.lib.get_all_books(), books)
+
     def test_get_all_lendors(self):
         """
         Test getting all lenders.
@@ -94,6 +246,62 @@ class TestPersonalLibrary(unittest.TestCase):
         borrowed = self.lib.get_books_borrowed_with_lender_details()
         self.assertEqual(len(borrowed), 0)
 
+    def test_borrow_book_already_borrowed(self):
+        """
+        Test that a book with an active loan cannot be borrowed again until returned.
+        """
+        book_id = self.lib.add_book('Book6', 'Author6')
+        lendor_id = self.lib.add_lender('Lender6', 'Addr6', '666')
+        borrowed_id = self.lib.borrow_book(lendor_id, book_id)
+        with self.assertRaises(Exception):
+            self.lib.borrow_book(lendor_id, book_id)
+        self.lib.return_borrowed_book(borrowed_id)
+        self.assertIsNotNone(self.lib.borrow_book(lendor_id, book_id))
+
+    def test_borrow_missing_book(self):
+        """
+        Test that borrowing a book that does not exist raises and records nothing.
+        """
+        lendor_id = self.lib.add_lender('Lender7', 'Addr7', '777')
+        with self.assertRaises(Exception):
+            self.lib.borrow_book(lendor_id, 12345)
+        self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 0)
+
+    def test_borrow_check_uses_index(self):
+        """
+        Test that the active-loan lookup is served by the borrowed indexes.
+        """
+        cursor = self.lib.conn.cursor()
+        cursor.execute('EXPLAIN QUERY PLAN SELECT 1 FROM borrowed WHERE book_id = ? AND returned = 1', (1,))
+        plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('idx_borrowed_', plan)
+
+    def test_add_many(self):
+        """
+        Test batch adds return IDs in input order and report failed items without aborting.
+        """
+        result = self.lib.add_books_many([('B1', 'A1'), ('B2', None), ('B3', 'A3')])
+        self.assertIsNone(result.ids[1])
+        self.assertEqual([e[0] for e in result.errors], [1])
+        self.assertEqual([b[0] for b in self.lib.get_all_books()], [result.ids[0], result.ids[2]])
+        lenders = self.lib.add_lenders_many([('L1', 'Addr1', '1'), ('L2', None, None)])
+        self.assertEqual(lenders.errors, [])
+        self.assertEqual([l[0] for l in self.lib.get_all_lendors()], lenders.ids)
+
+    def test_borrow_and_return_many(self):
+        """
+        Test batch borrow/return, including a repeated book and an unknown borrowed ID.
+        """
+        books = self.lib.add_books_many([('B1', 'A'), ('B2', 'A')]).ids
+        lendor_id = self.lib.add_lender('Lender', 'Addr', '1')
+        loans = self.lib.borrow_many([(lendor_id, books[0]), (lendor_id, books[0]), (lendor_id, books[1])])
+        self.assertEqual([e[0] for e in loans.errors], [1])
+        self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 2)
+        returned = self.lib.return_many([loans.ids[0], 999])
+        self.assertEqual(returned.ids, [loans.ids[0], None])
+        self.assertEqual(returned.errors, [(1, 'Borrowed record not found')])
+        self.assertEqual([b[0] for b in self.lib.get_books_not_borrowed()], [books[0]])
+
     def test_get_books_not_borrowed(self):
         """
         Test getting books that are not borrowed.
@@ -106,6 +314,60 @@ class TestPersonalLibrary(unittest.TestCase):
         available = self.lib.get_books_not_borrowed()
         self.assertFalse(any(b[0] == book_id for b in available))
 
+    def test_keyset_pages(self):
+        """
+        Test that keyset pages walk every book once and end with a None token.
+        """
+        book_ids = [self.lib.add_book(f'Paged{i}', 'Author') for i in range(5)]
+        rows, token = self.lib.get_books_page(limit=2)
+        self.assertEqual([b[0] for b in rows], book_ids[:2])
+        self.assertEqual(token, book_ids[1])
+        rows, token = self.lib.get_books_page(after_id=token, limit=3)
+        self.assertEqual([b[0] for b in rows], book_ids[2:])
+        self.assertIsNone(token)
+        self.assertEqual(list(self.lib.iter_books(batch_size=2)), self.lib.get_all_books())
+
+    def test_iter_availability_lists(self):
+        """
+        Test that the streaming availability iterators match the full-table queries.
+        """
+        lendor_id = self.lib.add_lender('Pager', 'Addr', '000')
+        book_ids = [self.lib.add_book(f'Avail{i}', 'Author') for i in range(6)]
+        for book_id in book_ids[::2]:
+            self.lib.borrow_book(lendor_id, book_id)
+        self.assertEqual(list(self.lib.iter_books_not_borrowed(batch_size=2)),
+                         self.lib.get_books_not_borrowed())
+        self.assertEqual(list(self.lib.iter_books_borrowed_with_lender_details(batch_size=2)),
+                         self.lib.get_books_borrowed_with_lender_details())
+        self.assertEqual(list(self.lib.iter_lendors(batch_size=1)), self.lib.get_all_lendors())
+
+    def test_search_books(self):
+        """
+        Test prefix and ranked search, and that removed books drop out of the index.
+        """
+        chess = self.lib.add_book('Bobby Fischer Teaches Chess', 'Bobby Fischer')
+        endgame = self.lib.add_book("Pandolfini's Endgame Course", 'Bruce Pandolfini')
+        about = self.lib.add_book('Endgames', 'Someone on Fischer')
+        self.assertEqual([b[0] for b in self.lib.search_books('fisch')], [chess, about])
+        self.assertEqual([b[0] for b in self.lib.search_books('endg pando')], [endgame])
+        self.assertEqual(self.lib.search_books('   '), [])
+        self.lib.remove_book(chess)
+        self.assertEqual([b[0] for b in self.lib.search_books('teaches')], [])
+
+    def test_search_after_import(self):
+        """
+        Test that the search index is rebuilt after a bulk import.
+        """
+        file_path = 'test_search.ndjson'
+        self.lib.add_book('Searchable Title', 'Author')
+        self.lib.export_to_ndjson(file_path)
+        self.lib.clear_all_tables()
+        self.lib.import_from_json(file_path)
+        os.remove(file_path)
+        self.assertEqual(len(self.lib.search_books('searchable')), 1)
+        self.lib.add_book('Searchable Sequel', 'Author')
+        self.assertEqual(len(self.lib.search_books('searchable')), 2)
+
     def test_most_and_least_borrowed(self):
         """
         Test getting the most and least borrowed books.
@@ -124,6 +386,376 @@ class TestPersonalLibrary(unittest.TestCase):
         self.assertEqual(most[0], b1)
         self.assertEqual(least[0], b2)
 
+    def test_circulation_counters_match_group_by(self):
+        """
+        Test that top_borrowed/bottom_borrowed match a GROUP BY over the loan history,
+        including never-borrowed books, after bulk loads, borrows and removals.
+        """
+        def expected(order, inner):
+            join = 'JOIN' if inner else 'LEFT JOIN'
+            return self.lib.conn.execute(f'''SELECT b.id, b.title, b.author, COUNT(br.id) AS borrow_count
+                                             FROM books b {join} borrowed br ON b.id = br.book_id
+                                             GROUP BY b.id ORDER BY borrow_count {order}, b.id''').fetchall()
+
+        books = [(i, f'T{i}', 'A', '2025-01-01') for i in range(1, 21)]
+        loans = [(i, 1, i % 7 + 1, 0) for i in range(1, 41)]
+        self.lib.bulk_load([('books', books), ('lendors', [(1, 'L', 'Addr', '1')]), ('borrowed', loans)])
+        self.assertEqual(self.lib.top_borrowed(50), expected('DESC', True))
+        self.assertEqual(self.lib.bottom_borrowed(50), expected('ASC', False))
+
+        self.lib.borrow_book(1, 20)
+        self.lib.remove_book(3)
+        new_book = self.lib.add_book('New', 'A')
+        self.assertEqual(self.lib.top_borrowed(50), expected('DESC', True))
+        self.assertEqual(self.lib.bottom_borrowed(50), expected('ASC', False))
+        self.assertEqual(self.lib.get_least_borrowed_book(), (8, 'T8', 'A', 0))
+        self.assertIn((new_book, 'New', 'A', 0), self.lib.bottom_borrowed(50))
+
+        self.lib.clear_all_tables()
+        self.assertIsNone(self.lib.get_most_borrowed_book())
+        self.assertIsNone(self.lib.get_least_borrowed_book())
+
+    def test_circulation_counters_backfilled(self):
+        """
+        Test that opening a database created before the counter table fills it from the loans.
+        """
+        b1 = self.lib.add_book('Book', 'Author')
+        self.lib.add_book('Other', 'Author')
+        l1 = self.lib.add_lender('Lender', 'Addr', '1')
+        self.lib.return_borrowed_book(self.lib.borrow_book(l1, b1))
+        self.lib.borrow_book(l1, b1)
+        self.lib.conn.execute('DROP TABLE book_circulation')
+        self.lib.conn.commit()
+        self.lib.close()
+        self.lib = PersonalLibrary(self.test_db)
+        self.assertEqual(self.lib.top_borrowed(), [(b1, 'Book', 'Author', 2)])
+        self.assertEqual(self.lib.bottom_borrowed(1)[0][3], 0)
+
+    def test_export_changes_round_trip(self):
+        """
+        Test that a full delta followed by an incremental one reproduces the library elsewhere,
+        and that the incremental delta holds only the touched rows.
+        """
+        full_path, delta_path, replica_db = 'test_full.changes', 'test_delta.changes', 'test_replica.db'
+        self.lib.add_books_many((f'Book {i}', 'Author') for i in range(50))
+        lendor = self.lib.add_lender('Lender', 'Addr', '1')
+        self.lib.borrow_book(lendor, 1)
+        full = self.lib.export_changes(0, full_path)
+        self.assertTrue(full['reload'])
+        self.assertEqual(full['until_seq'], self.lib.change_watermark())
+
+        loan = self.lib.borrow_book(lendor, 2)
+        self.lib.return_borrowed_book(loan)
+        self.lib.remove_book(3)
+        new_book = self.lib.add_book('New', 'Author')
+        delta = self.lib.export_changes(full['until_seq'], delta_path)
+        self.assertFalse(delta['reload'])
+        self.assertEqual((delta['rows'], delta['deletes']), (2, 1))
+        with open(delta_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        replica = PersonalLibrary(replica_db)
+        try:
+            replica.apply_changes(full_path)
+            result = replica.apply_changes(delta_path)
+            self.assertEqual((result['upserts'], result['deletes']), (2, 1))
+            self.assertEqual(replica.get_all_books(), self.lib.get_all_books())
+            self.assertEqual(replica.get_books_borrowed_with_lender_details(),
+                             self.lib.get_books_borrowed_with_lender_details())
+            self.assertEqual(replica.search_books('new'), [self.lib.get_book_details(new_book)])
+        finally:
+            replica.close()
+            for path in (full_path, delta_path, replica_db):
+                os.remove(path)
+
+    def test_clear_resets_change_log(self):
+        """
+        Test that clearing the tables makes the next delta a reload without a row per delete.
+        """
+        self.lib.add_book('Gone', 'Author')
+        since = self.lib.change_watermark()
+        self.lib.clear_all_tables()
+        count = self.lib.conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0]
+        self.assertEqual(count, 1)
+        self.assertGreater(self.lib.change_watermark(), since)
+        self.lib.add_book('After', 'Author')
+        file_path = 'test_clear.changes'
+        result = self.lib.export_changes(since, file_path)
+        os.remove(file_path)
+        self.assertTrue(result['reload'])
+        self.assertEqual(result['rows'], 1)
+
+    def test_clear_empties_search_and_counters(self):
+        """
+        Test that clearing empties the search index and borrow counters without their per-row
+        triggers, and that the triggers are back in place for the next writes.
+        """
+        lendor_id = self.lib.add_lender('Lender', 'Addr', '1')
+        self.lib.borrow_book(lendor_id, self.lib.add_book('Gone', 'Author'))
+        self.assertEqual(self.lib.clear_all_tables(), 'All tables cleared.')
+        self.assertEqual(self.lib.search_books('gone'), [])
+        self.assertEqual(self.lib.top_borrowed(5), [])
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM book_circulation').fetchone()[0], 0)
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM books_fts').fetchone()[0], 0)
+        lendor_id = self.lib.add_lender('Lender', 'Addr', '1')
+        book_id = self.lib.add_book('After', 'Author')
+        self.lib.borrow_book(lendor_id, book_id)
+        self.assertEqual([book[0] for book in self.lib.search_books('after')], [book_id])
+        self.assertEqual(self.lib.top_borrowed(5)[0][0], book_id)
+
+    def test_merge_import_writes_only_differences(self):
+        """
+        Test that a merge import ends in the same state as a replace import while writing
+        only the rows that differ, and that a dry run changes nothing.
+        """
+        file_path = 'test_merge.ndjson'
+        self.lib.add_books_many((f'Book {i}', 'Author') for i in range(20))
+        lendor = self.lib.add_lender('Lender', 'Addr', '1')
+        self.lib.borrow_book(lendor, 1)
+        self.lib.export_to_ndjson(file_path)
+        expected_books = self.lib.get_all_books()
+        expected_loans = self.lib.get_books_borrowed_with_lender_details()
+
+        self.lib.remove_book(5)
+        self.lib.conn.execute("UPDATE books SET title = 'Renamed' WHERE id = 6")
+        self.lib.conn.commit()
+        self.lib.add_book('Not in file', 'Author')
+        self.lib.return_borrowed_book(1)
+
+        before = self.lib.get_all_books()
+        result = self.lib.import_from_json(file_path, mode='merge', dry_run=True)
+        self.assertEqual(result, 'Dry run of JSON merge: 1 to insert, 2 to update, 1 to delete.')
+        self.assertEqual(self.lib.last_import_stats['tables']['books'],
+                         {'insert': 1, 'update': 1, 'delete': 1, 'unchanged': 18})
+        self.assertEqual(self.lib.get_all_books(), before)
+
+        watermark = self.lib.change_watermark()
+        result = self.lib.import_from_json(file_path, mode='merge')
+        os.remove(file_path)
+        self.assertEqual(result, 'Data merged from JSON: 1 inserted, 2 updated, 1 deleted.')
+        self.assertEqual(self.lib.change_watermark() - watermark, 4)
+        self.assertEqual(self.lib.get_all_books(), expected_books)
+        self.assertEqual(self.lib.get_books_borrowed_with_lender_details(), expected_loans)
+        self.assertEqual([b[0] for b in self.lib.search_books('book 4')], [5])
+        self.assertEqual(self.lib.search_books('renamed'), [])
+        self.assertEqual(self.lib.get_most_borrowed_book()[0], 1)
+
+    def test_merge_rejects_unknown_mode(self):
+        """
+        Test that an unknown import mode or a replace dry run is reported as an error.
+        """
+        self.assertTrue(self.lib.import_from_json('missing.json', mode='upsert').startswith('Error'))
+        self.assertTrue(self.lib.import_from_json('missing.json', dry_run=True).startswith('Error'))
+
+    def test_titles_group_copies(self):
+        """
+        Test that spelling variants of a title become copies of one title and find_available_copy
+        skips lent copies.
+        """
+        first = self.lib.add_book('Bobby Fischer Teaches Chess', 'Bobby Fischer')
+        second = self.lib.add_book('bobby fischer  teaches chess.', 'BOBBY FISCHER')
+        self.lib.add_book('Other', 'Author')
+        title_id, title, author, copies = self.lib.find_title('Bobby Fischer Teaches Chess', 'Bobby Fischer')
+        self.assertEqual((title, author, copies), ('Bobby Fischer Teaches Chess', 'Bobby Fischer', 2))
+        self.assertEqual(self.lib.find_available_copy(title_id)[0], first)
+        lendor_id = self.lib.add_lender('Lender', 'Addr', '1')
+        self.lib.borrow_book(lendor_id, first)
+        self.assertEqual(self.lib.find_available_copy(title_id)[0], second)
+        self.lib.borrow_book(lendor_id, second)
+        self.assertIsNone(self.lib.find_available_copy(title_id))
+        self.lib.remove_book(first)
+        self.lib.remove_book(second)
+        self.assertIsNone(self.lib.find_title('Bobby Fischer Teaches Chess', 'Bobby Fischer'))
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT title FROM titles').fetchall(), [('Other',)])
+
+    def test_reject_duplicates(self):
+        """
+        Test that reject_duplicates fails single and batch adds of titles already held.
+        """
+        self.lib.add_book('Dune', 'Frank Herbert')
+        with self.assertRaises(Exception):
+            self.lib.add_book('DUNE', 'frank herbert', reject_duplicates=True)
+        result = self.lib.add_books_many([('Emma', 'Jane Austen'), ('Dune', 'Frank Herbert'), ('emma', 'Jane Austen')],
+                                         reject_duplicates=True)
+        self.assertIsNotNone(result.ids[0])
+        self.assertEqual([index for index, _ in result.errors], [1, 2])
+        self.assertEqual(len(self.lib.get_all_books()), 2)
+
+    def test_failed_book_writes_leave_no_titles(self):
+        """
+        Test that book writes rejected by the database, and books rewritten under another title,
+        leave no title without copies.
+        """
+        self.assertEqual(len(self.lib.add_books_many([('Kept', 'A'), ('No author', None)]).errors), 1)
+        result = self.lib.upsert_many('books', [(10, 'Dune', 'Frank Herbert', '2020-01-01'),
+                                                (11, 'Emma', 'Jane Austen', None)])
+        self.assertEqual([index for index, _ in result.errors], [1])
+        self.lib.upsert_many('books', [(10, 'Ulysses', 'James Joyce', '2020-01-01')])
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT title FROM titles ORDER BY title').fetchall(),
+                             [('Kept',), ('Ulysses',)])
+
+    def test_import_links_titles(self):
+        """
+        Test that replace and merge imports link books to titles and count the duplicate copies.
+        """
+        file_path = 'test_titles.ndjson'
+        for title in ('Dune', 'dune', 'Emma'):
+            self.lib.add_book(title, 'Author')
+        try:
+            self.lib.export_to_ndjson(file_path)
+            self.lib.import_from_json(file_path)
+            self.assertEqual(self.lib.last_import_stats['duplicates'], 1)
+            self.assertEqual(self.lib.find_title('Dune', 'Author')[3], 2)
+            self.lib.clear_all_tables()
+            self.lib.import_from_json(file_path, mode='merge')
+            self.assertEqual(self.lib.last_import_stats['duplicates'], 1)
+            self.assertEqual(self.lib.find_title('Emma', 'Author')[3], 1)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_titles_added_to_existing_database(self):
+        """
+        Test that opening a database without titles links its books without logging changes.
+        """
+        import sqlite3
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+        conn = sqlite3.connect(self.test_db)
+        conn.execute('''CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                        author TEXT NOT NULL, added_date TEXT NOT NULL)''')
+        conn.executemany('INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)',
+                         [('Dune', 'Frank Herbert', '2025-01-01'), ('Dune', 'frank herbert', '2025-01-02')])
+        conn.commit()
+        conn.close()
+        self.lib = PersonalLibrary(self.test_db)
+        self.assertEqual(self.lib.get_book_details(1), (1, 'Dune', 'Frank Herbert', '2025-01-01'))
+        self.assertEqual(self.lib.find_title('Dune', 'Frank Herbert')[3], 2)
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT op FROM change_log').fetchall(), [('reload',)])
+
+    def test_duplicate_active_loans_in_existing_database(self):
+        """
+        Test that a database from before the one-active-loan index opens, keeping only the
+        newest active loan of a book that has several.
+        """
+        import sqlite3
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+        conn = sqlite3.connect(self.test_db)
+        conn.execute('''CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                        author TEXT NOT NULL, added_date TEXT NOT NULL)''')
+        conn.execute('''CREATE TABLE lendors (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                        address TEXT, mobile TEXT)''')
+        conn.execute('''CREATE TABLE borrowed (id INTEGER PRIMARY KEY AUTOINCREMENT, lendor_id INTEGER NOT NULL,
+                        book_id INTEGER NOT NULL, returned INTEGER NOT NULL DEFAULT 0)''')
+        conn.executemany('INSERT INTO books (title, author, added_date) VALUES (?, ?, ?)',
+                         [('Dune', 'Frank Herbert', '2025-01-01'), ('Emma', 'Jane Austen', '2025-01-01')])
+        conn.execute("INSERT INTO lendors (name) VALUES ('Alice')")
+        conn.executemany('INSERT INTO borrowed (lendor_id, book_id, returned) VALUES (1, ?, 1)', [(1,), (1,), (2,)])
+        conn.commit()
+        conn.close()
+        self.lib = PersonalLibrary(self.test_db)
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT id, returned FROM borrowed ORDER BY id').fetchall(),
+                             [(1, 0), (2, 1), (3, 1)])
+        self.assertEqual(self.lib.count_available(), 0)
+        with self.assertRaises(Exception):
+            self.lib.borrow_book(1, 1)
+
+    def test_import_closes_duplicate_active_loans(self):
+        """
+        Test that replace and merge imports keep only the newest active loan of a book and
+        report the loans imported as returned.
+        """
+        sources = [('books', [(1, 'Dune', 'Frank Herbert', '2025-01-01')]),
+                   ('lendors', [(1, 'Alice', None, None)]),
+                   ('borrowed', [(1, 1, 1, 1), (2, 1, 1, 1)])]
+        self.assertEqual(self.lib.bulk_load(sources)['closed_loans'], 1)
+        self.lib.clear_all_tables()
+        self.assertEqual(self.lib.merge_load(sources)['closed_loans'], 1)
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT id, returned FROM borrowed ORDER BY id').fetchall(),
+                             [(1, 0), (2, 1)])
+
+    def test_snapshot_round_trip(self):
+        """
+        Test that compressed snapshots restore the exact rows and reset the change log.
+        """
+        book_id = self.lib.add_book('Snapshot', 'Author')
+        lendor_id = self.lib.add_lender('Lender', None, '1')
+        self.lib.borrow_book(lendor_id, book_id)
+        for compression, file_path in ((None, 'test_snapshot.db'), ('gzip', 'test_snapshot.db.gz'),
+                                       ('lzma', 'test_snapshot.db.xz')):
+            try:
+                self.assertTrue(self.lib.snapshot(file_path, compression, pages=1).startswith('Snapshot saved'))
+                self.assertTrue(os.path.exists(file_path + '.sha256'))
+                self.lib.add_book('After snapshot', 'Author')
+                self.assertEqual(self.lib.restore(file_path, pages=1), f'Restored from {file_path}.')
+                self.assertEqual([b[1] for b in self.lib.get_all_books()], ['Snapshot'])
+                self.assertEqual(self.lib.count_available(), 0)
+                self.assertEqual(self.lib.get_books_borrowed_with_lender_details()[0][0], book_id)
+                self.assertTrue(self.lib.search_books('snapshot'))
+            finally:
+                for suffix in ('', '.sha256'):
+                    if os.path.exists(file_path + suffix):
+                        os.remove(file_path + suffix)
+        with self.lib.pool.reader() as conn:
+            self.assertEqual(conn.execute('SELECT op FROM change_log').fetchall(), [('reload',)])
+
+    def test_restore_keeps_change_log_moving_forward(self):
+        """
+        Test that a delta taken from a watermark older than a restore is a reload ending after it,
+        even though the snapshot's change log sequence is lower.
+        """
+        file_path = 'test_snapshot_seq.db'
+        self.lib.add_book('Snapshot', 'Author')
+        try:
+            self.lib.snapshot(file_path)
+            for i in range(10):
+                self.lib.add_book(f'After snapshot {i}', 'Author')
+            watermark = self.lib.change_watermark()
+            self.assertEqual(self.lib.restore(file_path), f'Restored from {file_path}.')
+            self.lib.add_book('After restore', 'Author')
+            stats = self.lib.export_changes(watermark, 'test_changes.ndjson')
+            self.assertTrue(stats['reload'])
+            self.assertGreater(stats['until_seq'], watermark)
+            self.assertGreater(self.lib.change_watermark(), watermark)
+        finally:
+            for path in (file_path, file_path + '.sha256', 'test_changes.ndjson'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_restore_rejects_bad_snapshots(self):
+        """
+        Test that a checksum mismatch or a cancelled restore leaves the database unchanged.
+        """
+        file_path = 'test_snapshot_bad.db'
+        self.lib.add_book('Kept', 'Author')
+        try:
+            self.lib.snapshot(file_path)
+            self.lib.add_book('Also kept', 'Author')
+
+            def cancel(table, rows, done):
+                raise RuntimeError('cancelled')
+            self.assertTrue(self.lib.restore(file_path, pages=1, progress=cancel).startswith('Error'))
+            with open(file_path, 'r+b') as f:
+                f.seek(200)
+                f.write(b'corrupt')
+            self.assertIn('Checksum mismatch', self.lib.restore(file_path))
+            self.assertEqual(len(self.lib.get_all_books()), 2)
+        finally:
+            for suffix in ('', '.sha256'):
+                if os.path.exists(file_path + suffix):
+                    os.remove(file_path + suffix)
+
     def test_clear_all_tables(self, tmp_path):
         from src.personal_library import PersonalLibrary
         db_path = tmp_path / "test.db"
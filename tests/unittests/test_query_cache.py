@@ -0,0 +1,119 @@
+"""
+test_query_cache.py
+
+Unit tests for the PersonalLibrary read-through query cache. Tests hit/miss counting, per-table
+invalidation on library writes, invalidation on commits from other connections, and LRU eviction.
+"""
+import os
+import sqlite3
+import unittest
+from src.personal_library import PersonalLibrary
+
+
+class TestQueryCache(unittest.TestCase):
+    """
+    Unit tests for QueryCache through PersonalLibrary.
+    Creates a temporary database with caching enabled for each test.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database before each test.
+        """
+        self.test_db = 'test_cache_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.lib = PersonalLibrary(self.test_db, cache_size=4)
+        self.book_id = self.lib.add_book('Cached', 'Author')
+        self.lendor_id = self.lib.add_lender('Lender', 'Addr', '123')
+
+    def tearDown(self):
+        """
+        Clean up the test database after each test.
+        """
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def test_disabled_by_default(self):
+        """
+        Test that a library created without cache_size does not cache.
+        """
+        lib = PersonalLibrary(':memory:')
+        self.assertIsNone(lib.cache)
+        lib.add_book('A', 'B')
+        self.assertEqual(len(lib.get_all_books()), 1)
+        lib.close()
+
+    def test_repeated_read_hits(self):
+        """
+        Test that a repeated read is served from the cache.
+        """
+        first = self.lib.get_all_books()
+        second = self.lib.get_all_books()
+        self.assertIs(first, second)
+        stats = self.lib.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_write_invalidates_only_its_tables(self):
+        """
+        Test that a lender write keeps cached book results and drops cached lender results.
+        """
+        self.lib.get_all_books()
+        self.lib.get_all_lendors()
+        self.lib.add_lender('Second', 'Addr', '456')
+        self.assertEqual(len(self.lib.get_all_lendors()), 2)
+        self.lib.get_all_books()
+        self.assertEqual(self.lib.cache.stats()['hits'], 1)
+
+    def test_add_book_invalidates_book_lists(self):
+        """
+        Test that adding a single book refreshes cached book lists.
+        """
+        self.assertEqual(len(self.lib.get_all_books()), 1)
+        self.lib.add_book('Second', 'Author')
+        self.assertEqual(len(self.lib.get_all_books()), 2)
+
+    def test_borrow_invalidates_joined_results(self):
+        """
+        Test that borrowing refreshes the available, borrowed and circulation queries.
+        """
+        self.assertEqual(len(self.lib.get_books_not_borrowed()), 1)
+        self.assertEqual(self.lib.get_books_borrowed_with_lender_details(), [])
+        self.assertIsNone(self.lib.get_most_borrowed_book())
+        self.lib.borrow_book(self.lendor_id, self.book_id)
+        self.assertEqual(self.lib.get_books_not_borrowed(), [])
+        self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 1)
+        self.assertEqual(self.lib.get_most_borrowed_book()[0], self.book_id)
+
+    def test_external_write_detected(self):
+        """
+        Test that a commit from another connection is seen through PRAGMA data_version.
+        """
+        self.assertEqual(len(self.lib.get_all_books()), 1)
+        other = sqlite3.connect(self.test_db)
+        other.execute("INSERT INTO books (title, author, added_date) VALUES ('Other', 'A', '2025-01-01')")
+        other.commit()
+        other.close()
+        self.assertEqual(len(self.lib.get_all_books()), 2)
+        self.assertEqual(self.lib.cache.stats()['hits'], 0)
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used result is evicted once the cache is full.
+        """
+        for book_id in range(1, 5):
+            self.lib.get_book_details(book_id)
+        self.lib.get_book_details(1)
+        self.lib.get_book_details(5)
+        stats = self.lib.cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (4, 1))
+        self.lib.get_book_details(1)
+        self.assertEqual(self.lib.cache.stats()['hits'], 2)
+        self.lib.get_book_details(2)
+        self.assertEqual(self.lib.cache.stats()['hits'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+test_server.py
+
+Unit tests for the PersonalLibrary JSON HTTP service. Runs the server on a free local port and
+tests the book, lender, loan, batch and report endpoints over keep-alive connections, that
+concurrent single writes are coalesced without double-lending a book, that malformed batch
+items and export paths outside the export directory are rejected, and that connections
+beyond the pending queue get 503.
+"""
+import http.client
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import unittest
+from src.personal_library import PersonalLibrary
+from src.server import LibraryServer
+
+
+class TestLibraryServer(unittest.TestCase):
+    """
+    Unit tests for LibraryServer.
+    Starts a server on a temporary database for each test.
+    """
+
+    def setUp(self):
+        """
+        Start a server on a fresh test database before each test.
+        """
+        self.test_db = 'test_server_library.db'
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+        self.export_dir = 'test_server_exports'
+        self.lib = PersonalLibrary(self.test_db, cache_size=16)
+        self.server = LibraryServer(self.lib, ('127.0.0.1', 0), workers=4, export_dir=self.export_dir)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.conn = self.connect()
+
+    def tearDown(self):
+        """
+        Stop the server and clean up the test database after each test.
+        """
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+
+    def connect(self):
+        return http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=10)
+
+    def request(self, method, path, body=None, conn=None):
+        conn = conn or self.conn
+        data = json.dumps(body) if body is not None else None
+        conn.request(method, path, body=data, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_book_lender_and_loan_flow(self):
+        """
+        Test adding, borrowing, listing and returning over a single keep-alive connection.
+        """
+        status, book = self.request('POST', '/books', {'title': 'Served', 'author': 'Author'})
+        self.assertEqual(status, 201)
+        status, lender = self.request('POST', '/lendors', {'name': 'Desk', 'address': 'Front', 'mobile': '1'})
+        self.assertEqual(status, 201)
+        status, loan = self.request('POST', '/loans', {'lendor_id': lender['id'], 'book_id': book['id']})
+        self.assertEqual(status, 201)
+        status, error = self.request('POST', '/loans', {'lendor_id': lender['id'], 'book_id': book['id']})
+        self.assertEqual(status, 409)
+        self.assertEqual(self.request('GET', '/books/available')[1], {'items': [], 'next_after_id': None})
+        status, loans = self.request('GET', '/loans')
+        self.assertEqual(loans['items'][0][0], book['id'])
+        self.assertEqual(self.request('POST', f"/loans/{loan['id']}/return")[0], 200)
+        self.assertEqual(len(self.request('GET', '/books/available')[1]['items']), 1)
+        self.assertEqual(self.request('GET', f"/books/{book['id']}")[1][1], 'Served')
+        self.assertEqual(self.request('GET', '/reports/most-borrowed?k=1')[1]['items'][0][0], book['id'])
+        self.assertEqual(self.request('GET', '/books/search?q=serv')[1]['items'][0][0], book['id'])
+
+    def test_errors(self):
+        """
+        Test the status codes for unknown routes, missing rows and bad requests.
+        """
+        self.assertEqual(self.request('GET', '/nowhere')[0], 404)
+        self.assertEqual(self.request('GET', '/books/99')[0], 404)
+        self.assertEqual(self.request('POST', '/books', {'title': 'No author'})[0], 400)
+        self.assertEqual(self.request('GET', '/books?limit=x')[0], 400)
+
+    def test_batch_endpoints(self):
+        """
+        Test that batch endpoints report per-item errors and keep the rest.
+        """
+        status, books = self.request('POST', '/batch/books', {'items': [['A', 'B'], ['C', 'D'], [None, 'E']]})
+        self.assertEqual(status, 200)
+        self.assertEqual(books['ids'][:2], [1, 2])
+        self.assertEqual(books['errors'][0][0], 2)
+        status, page = self.request('GET', '/books?limit=1')
+        self.assertEqual(page['next_after_id'], 1)
+
+    def test_batch_items_must_match_the_method(self):
+        """
+        Test that batch items of the wrong shape are rejected with 400 before anything is written.
+        """
+        self.assertEqual(self.request('POST', '/batch/lendors', {'items': ['abc']})[0], 400)
+        self.assertEqual(self.request('POST', '/batch/books', {'items': [['A', 'B'], ['C']]})[0], 400)
+        self.assertEqual(self.request('POST', '/batch/loans', {'items': [{'lendor_id': 1}]})[0], 400)
+        self.assertEqual(self.request('POST', '/batch/returns', {'items': ['1']})[0], 400)
+        self.assertEqual(self.lib.get_all_lendors(), [])
+        self.assertEqual(self.lib.get_all_books(), [])
+
+    def test_export_confined_to_export_dir(self):
+        """
+        Test that exports are written only into the export directory, by file name.
+        """
+        for path in ('../escaped.ndjson', os.path.abspath('escaped.ndjson'), 'sub/escaped.ndjson', '..', ''):
+            status, error = self.request('POST', '/export', {'format': 'ndjson', 'path': path})
+            self.assertEqual(status, 400, path)
+        self.assertFalse(os.path.exists('escaped.ndjson'))
+        self.assertEqual(self.request('POST', '/export', {'format': 'ndjson', 'path': 'library.ndjson'})[0], 200)
+        self.assertTrue(os.path.exists(os.path.join(self.export_dir, 'library.ndjson')))
+
+    def test_busy_connections_get_503(self):
+        """
+        Test that a connection arriving while the worker is busy and no queue slot is left is
+        answered with 503, and that the slot is free again once the busy connection closes.
+        """
+        server = LibraryServer(self.lib, ('127.0.0.1', 0), workers=1, max_pending=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            busy = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+            self.assertEqual(self.request('GET', '/books', conn=busy)[0], 200)
+            with socket.create_connection(('127.0.0.1', server.server_port), timeout=10) as refused:
+                self.assertTrue(refused.recv(1024).startswith(b'HTTP/1.1 503'))
+            busy.close()
+            # The slot is released once the worker sees the busy connection close.
+            deadline = time.monotonic() + 5
+            status = None
+            while status != 200 and time.monotonic() < deadline:
+                conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+                try:
+                    status = self.request('GET', '/books', conn=conn)[0]
+                except (http.client.HTTPException, ConnectionError, ValueError):
+                    status = None
+                finally:
+                    conn.close()
+                if status != 200:
+                    time.sleep(0.05)
+            self.assertEqual(status, 200)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_concurrent_borrows_are_coalesced(self):
+        """
+        Test that concurrent borrows of one book from many connections lend it exactly once.
+        """
+        self.lib.add_book('Contested', 'Author')
+        lenders = self.lib.add_lenders_many([(f'L{i}', None, None) for i in range(8)]).ids
+        statuses = []
+
+        def borrow(lendor_id):
+            conn = self.connect()
+            statuses.append(self.request('POST', '/loans', {'lendor_id': lendor_id, 'book_id': 1}, conn)[0])
+            conn.close()
+
+        threads = [threading.Thread(target=borrow, args=(l,)) for l in lenders]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(statuses), [201] + [409] * 7)
+        self.assertEqual(len(self.lib.get_books_borrowed_with_lender_details()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+test_startup.py
+
+Unit tests for the app startup helpers. Tests that StartupTimer orders phases and keeps the
+first mark, and that DeferredLibrary opens the library once on a worker thread, forwards
+attribute access after the open and re-raises a failed open.
+"""
+import os
+import threading
+import time
+import unittest
+from src.personal_library import PersonalLibrary
+from src.startup import DeferredLibrary, StartupTimer
+
+
+class TestStartupTimer(unittest.TestCase):
+    """
+    Unit tests for StartupTimer.
+    """
+
+    def test_phases_in_finish_order(self):
+        """
+        Test that phases are reported in the order they were marked, with increasing times.
+        """
+        timer = StartupTimer()
+        timer.mark('imports')
+        time.sleep(0.01)
+        timer.mark('build')
+        phases = timer.phases()
+        self.assertEqual(list(phases), ['imports', 'build'])
+        self.assertGreaterEqual(phases['build'] - phases['imports'], 5)
+        self.assertTrue(timer.has('build'))
+        self.assertFalse(timer.has('first_frame'))
+        self.assertIn('build: ', timer.report())
+
+    def test_mark_keeps_first_time(self):
+        """
+        Test that marking a phase again does not move it.
+        """
+        timer = StartupTimer()
+        first = timer.mark('first_frame')
+        time.sleep(0.01)
+        self.assertEqual(timer.mark('first_frame'), first)
+        self.assertEqual(timer.phases()['first_frame'], first)
+
+
+class TestDeferredLibrary(unittest.TestCase):
+    """
+    Unit tests for DeferredLibrary with a real PersonalLibrary.
+    """
+
+    def setUp(self):
+        """
+        Set up a fresh test database path before each test.
+        """
+        self.test_db = 'test_startup_library.db'
+        self.lib = None
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+
+    def tearDown(self):
+        """
+        Close the library and clean up the test database after each test.
+        """
+        if self.lib is not None and self.lib.opened:
+            self.lib.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def test_opens_on_worker_thread(self):
+        """
+        Test that the factory runs once, off the calling thread, and that the callback sees the library.
+        """
+        threads, opened = [], []
+
+        def factory():
+            threads.append(threading.current_thread())
+            return PersonalLibrary(self.test_db)
+
+        self.lib = DeferredLibrary(factory, on_open=lambda library, error: opened.append((library, error)))
+        self.assertFalse(self.lib.opened)
+        self.lib.open_async()
+        self.lib.open_async()
+        library = self.lib.wait(timeout=10)
+        self.assertTrue(self.lib.opened)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.lib._thread.join(timeout=10)
+        self.assertEqual(opened, [(library, None)])
+
+    def test_attribute_access_waits_for_open(self):
+        """
+        Test that calling a library method before open_async() opens the library and forwards the call.
+        """
+        self.lib = DeferredLibrary(lambda: PersonalLibrary(self.test_db))
+        book_id = self.lib.add_book('Dune', 'Frank Herbert')
+        self.assertEqual(self.lib.get_book_details(book_id)[1], 'Dune')
+        self.assertIsNone(self.lib.instrumentation)
+
+    def test_failed_open_raises_on_access(self):
+        """
+        Test that an error raised while opening is reported to the callback and raised on access.
+        """
+        errors = []
+
+        def factory():
+            raise OSError('disk not mounted')
+
+        lib = DeferredLibrary(factory, on_open=lambda library, error: errors.append(error))
+        with self.assertRaises(OSError):
+            lib.get_all_books()
+        lib._thread.join(timeout=10)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], OSError)
+
+
+if __name__ == '__main__':
+    unittest.main()